@@ -11,7 +11,9 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT_DIR))
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List
@@ -19,11 +21,14 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 import json
 
+# 配置
+from src.config import CRAWL_SCHEDULER_ENABLED, CRAWL_KEYWORD_ENABLED
+
 # 导入业务逻辑
 from src.tools.sentiment_tool import sentiment_analyzer
 from src.tools.topic_cluster import topic_clusterer
 from src.tools.risk_screener import risk_screener
-from src.tools.knowledge_tool import knowledge_searcher
+from src.tools.knowledge_tool import knowledge_searcher, knowledge_batch_searcher
 from src.workflows.risk_alert import run_alert_workflow
 from src.data_pipeline import KnowledgeBase
 
@@ -38,6 +43,7 @@ from src.agents.review_agent import ReviewAgent
 
 # 服务层
 from src.services.dashboard_service import DashboardService
+from src.services.response_cache import get_dashboard_cache, bump_data_version, etag_matches
 
 # Skill 系统
 from src.skills.base_skill import SkillRegistry
@@ -89,6 +95,22 @@ def startup():
         print(f"[API] 数据库初始化警告: {e}")
         print("[API] 如果MySQL未配置，仅AI分析功能可用")
 
+    # 增量采集调度器默认关闭，设置 CRAWL_SCHEDULER_ENABLED=true 后按系统设置的采集频率启动
+    if CRAWL_SCHEDULER_ENABLED:
+        _crawl_scheduler().start()
+    else:
+        print("[API] 增量采集调度器未启用（CRAWL_SCHEDULER_ENABLED=false）")
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """应用退出时停止采集调度器、常驻爬虫进程和后台事件循环"""
+    from src.crawler.background_loop import stop_background_loop
+    from src.crawler.crawler_worker import stop_crawler_workers
+    _crawl_scheduler().stop()
+    stop_crawler_workers()
+    stop_background_loop()
+
 
 # ========== 请求/响应模型 ==========
 
@@ -99,6 +121,10 @@ class QueryInput(BaseModel):
     query: str = Field(..., description="查询关键词")
     top_k: Optional[int] = Field(3, description="返回结果数量")
 
+class BatchQueryInput(BaseModel):
+    queries: List[str] = Field(..., description="查询关键词列表")
+    top_k: Optional[int] = Field(3, description="每个查询返回的结果数量")
+
 class AnalyzeInput(BaseModel):
     text: str = Field(..., description="要分析的文本")
     mode: Optional[str] = Field("full", description="分析模式: full/sentiment/topic/risk")
@@ -171,6 +197,19 @@ def search_knowledge(data: QueryInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/knowledge/search-batch")
+def search_knowledge_batch(data: BatchQueryInput):
+    """知识库批量检索（一次向量化全部查询）"""
+    try:
+        result = knowledge_batch_searcher.invoke({
+            "queries": data.queries,
+            "top_k": data.top_k,
+        })
+        return {"success": True, "data": json.loads(result)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/analyze")
 def full_analyze(data: AnalyzeInput):
     try:
@@ -331,123 +370,152 @@ def get_review_stats(
 # 4. 可视化面板 API
 # ========================================
 
+def _dashboard_response(request: Request, key: str, compute) -> Response:
+    """
+    面板接口的缓存响应：数据未变化时直接返回缓存结果，
+    带 ETag，If-None-Match 匹配时返回 304
+    """
+    cached = get_dashboard_cache().get(key, compute)
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", "X-Cache": cached.status}
+    if etag_matches(cached.etag, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder({"success": True, "data": cached.payload}), headers=headers)
+
+
+@app.get("/api/dashboard/cache-stats")
+def dashboard_cache_stats():
+    """可视化面板 - 响应缓存统计"""
+    return {"success": True, "data": get_dashboard_cache().stats()}
+
+
 @app.get("/api/dashboard/overview")
-def dashboard_overview(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_overview(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 总览数据"""
     try:
-        service = DashboardService(db)
-        data = service.get_overview(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"overview?days={days}",
+            lambda db: DashboardService(db).get_overview(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/sentiment-trend")
-def dashboard_sentiment_trend(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_sentiment_trend(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 情感趋势"""
     try:
-        service = DashboardService(db)
-        data = service.get_sentiment_trend(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"sentiment-trend?days={days}",
+            lambda db: DashboardService(db).get_sentiment_trend(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/risk-trend")
-def dashboard_risk_trend(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_risk_trend(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 风险趋势"""
     try:
-        service = DashboardService(db)
-        data = service.get_risk_trend(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"risk-trend?days={days}",
+            lambda db: DashboardService(db).get_risk_trend(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/topics")
-def dashboard_topics(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_topics(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 话题分布"""
     try:
-        service = DashboardService(db)
-        data = service.get_topic_distribution(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"topics?days={days}",
+            lambda db: DashboardService(db).get_topic_distribution(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/emotions")
-def dashboard_emotions(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_emotions(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 情绪词云"""
     try:
-        service = DashboardService(db)
-        data = service.get_emotion_cloud(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"emotions?days={days}",
+            lambda db: DashboardService(db).get_emotion_cloud(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/departments")
-def dashboard_departments(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_departments(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 院系统计"""
     try:
-        service = DashboardService(db)
-        data = service.get_department_stats(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"departments?days={days}",
+            lambda db: DashboardService(db).get_department_stats(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/recent-alerts")
-def dashboard_recent_alerts(limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+def dashboard_recent_alerts(request: Request, limit: int = Query(10, ge=1, le=50)):
     """可视化面板 - 最近预警"""
     try:
-        service = DashboardService(db)
-        data = service.get_recent_alerts(limit)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"recent-alerts?limit={limit}",
+            lambda db: DashboardService(db).get_recent_alerts(limit),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/sources")
-def dashboard_sources(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_sources(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 数据来源分布"""
     try:
-        service = DashboardService(db)
-        data = service.get_source_distribution(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"sources?days={days}",
+            lambda db: DashboardService(db).get_source_distribution(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/platform-sentiment")
-def dashboard_platform_sentiment(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_platform_sentiment(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 平台情感细表"""
     try:
-        service = DashboardService(db)
-        data = service.get_platform_sentiment(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"platform-sentiment?days={days}",
+            lambda db: DashboardService(db).get_platform_sentiment(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/recent-mentions")
-def dashboard_recent_mentions(limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+def dashboard_recent_mentions(request: Request, limit: int = Query(20, ge=1, le=100)):
     """可视化面板 - 最近舆情提及"""
     try:
-        service = DashboardService(db)
-        data = service.get_recent_mentions(limit)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"recent-mentions?limit={limit}",
+            lambda db: DashboardService(db).get_recent_mentions(limit),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dashboard/topic-detail")
-def dashboard_topic_detail(days: int = Query(30, ge=1, le=365), db: Session = Depends(get_db)):
+def dashboard_topic_detail(request: Request, days: int = Query(30, ge=1, le=365)):
     """可视化面板 - 话题详情（含平台、情感、趋势）"""
     try:
-        service = DashboardService(db)
-        data = service.get_topic_detail(days)
-        return {"success": True, "data": data}
+        return _dashboard_response(
+            request, f"topic-detail?days={days}",
+            lambda db: DashboardService(db).get_topic_detail(days),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -603,30 +671,138 @@ async def extract_topics():
 @app.post("/api/collector/collect-news")
 async def collect_news(
     sources: Optional[str] = Query(None, description="新闻源ID,逗号分隔: weibo,zhihu,tieba"),
+    only_new: bool = Query(False, description="只返回该调用方上一次采集之后新出现的条目"),
+    consumer: str = Query("api", pattern=r"^[\w-]{1,64}$", description="only_new 差量状态的归属方，各调用方互不影响"),
 ):
     """采集热点新闻（不做AI分析，仅采集原始新闻）"""
     try:
-        from src.crawler.news_collector import NewsCollector
-        collector = NewsCollector()
+        from src.crawler.news_collector import get_news_collector
+        collector = get_news_collector()
         source_list = sources.split(",") if sources else None
-        result = await collector.collect_news(sources=source_list)
+        result = await collector.collect_news(sources=source_list, only_new=only_new, consumer=consumer)
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/collector/analyze-pending")
-async def analyze_pending():
-    """对数据库中尚未进行情感分析的记录执行补充分析"""
+def analyze_pending(
+    response: Response,
+    drain: bool = Query(False, description="持续处理直到积压清空（后台运行，支持断点续跑）"),
+    batch_size: int = Query(500, ge=1, le=10000, description="每批处理条数"),
+    workers: int = Query(1, ge=1, le=32, description="并行分析进程数"),
+):
+    """
+    对数据库中尚未进行情感分析的记录执行补充分析
+
+    默认同步处理一批；drain=true 时在后台线程中排空积压并立即返回 202，
+    进度与结果通过 GET /api/collector/analyze-pending 查询。同一时间只允许一个补充分析运行（409）。
+    """
+    from src.crawler.crawler_pipeline import CrawlerPipeline
+    try:
+        if drain:
+            accepted = CrawlerPipeline.start_pending_analysis(
+                batch_size=batch_size, drain=True, workers=workers
+            )
+        else:
+            result = CrawlerPipeline().analyze_pending_records(batch_size=batch_size, workers=workers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if drain:
+        if not accepted:
+            raise HTTPException(status_code=409, detail="补充分析仍在运行")
+        response.status_code = 202
+        return {
+            "success": True,
+            "message": "补充分析已在后台开始，请稍后查询进度",
+            "data": CrawlerPipeline.pending_analysis_status(),
+        }
+    if result.get("busy"):
+        raise HTTPException(status_code=409, detail=result["error"])
+    return {"success": True, "data": result}
+
+
+@app.get("/api/collector/analyze-pending")
+def analyze_pending_status():
+    """后台补充分析的运行状态、检查点与最近一次结果"""
+    from src.crawler.crawler_pipeline import CrawlerPipeline
+    return {"success": True, "data": CrawlerPipeline.pending_analysis_status()}
+
+
+@app.post("/api/collector/backfill-terms")
+def backfill_terms(
+    batch_size: int = Query(1000, ge=1, le=10000, description="每批处理条数"),
+    resume: bool = Query(True, description="从上次中断的检查点继续"),
+):
+    """把历史记录的情绪标签回填到子表（可重复执行）"""
+    try:
+        from src.services.record_terms import backfill_record_terms
+        result = backfill_record_terms(batch_size=batch_size, resume=resume)
+        return {"success": result["success"], "data": result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/collector/stream-ingest")
+async def stream_ingest(
+    sources: Optional[str] = Query(None, description="新闻源ID,逗号分隔"),
+    batch_size: int = Query(200, ge=1, le=5000, description="各阶段 micro-batch 条数"),
+    queue_size: int = Query(500, ge=1, le=100000, description="阶段间队列容量"),
+    analyze_workers: int = Query(2, ge=1, le=32, description="分析进程数"),
+):
+    """流式采集入库（边采集边分析入库，返回各阶段吞吐与队列深度指标）"""
     try:
         from src.crawler.crawler_pipeline import CrawlerPipeline
         pipeline = CrawlerPipeline()
-        result = pipeline.analyze_pending_records()
+        source_list = sources.split(",") if sources else None
+        result = await pipeline.run_streaming_ingest(
+            news_sources=source_list,
+            batch_size=batch_size,
+            queue_size=queue_size,
+            analyze_workers=analyze_workers,
+        )
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/collector/scheduler")
+def scheduler_status(limit: int = Query(20, ge=1, le=50, description="返回的运行历史条数")):
+    """增量采集调度器状态、各来源水位线与运行历史"""
+    scheduler = _crawl_scheduler()
+    return {
+        "success": True,
+        "data": {**scheduler.get_status(), "history": scheduler.get_history(limit)},
+    }
+
+
+@app.post("/api/collector/scheduler/run", status_code=202)
+def scheduler_run_now():
+    """请求立即执行一轮增量采集，由调度线程在后台运行，结果通过 GET /api/collector/scheduler 查询"""
+    scheduler = _crawl_scheduler()
+    try:
+        accepted = scheduler.request_run()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not accepted:
+        raise HTTPException(status_code=409, detail="上一轮采集仍在运行")
+    return {"success": True, "message": "采集已开始，请稍后查询运行历史", "data": scheduler.get_status()}
+
+
+@app.post("/api/collector/scheduler/{action}")
+def scheduler_control(action: str):
+    """启动 / 停止增量采集调度器（action: start / stop）"""
+    scheduler = _crawl_scheduler()
+    if action == "start":
+        scheduler.start()
+    elif action == "stop":
+        scheduler.stop()
+    else:
+        raise HTTPException(status_code=400, detail=f"未知操作: {action}")
+    return {"success": True, "data": scheduler.get_status()}
+
+
 class KeywordCrawlInput(BaseModel):
     """自定义关键词爬取请求"""
     keywords: Optional[List[str]] = Field(None, description="搜索关键词列表，为空则使用默认校园关键词")
@@ -635,6 +811,9 @@ class KeywordCrawlInput(BaseModel):
     enable_comments: bool = Field(True, description="是否爬取评论")
     headless: bool = Field(True, description="无头模式（首次登录设False以便扫码）")
     import_to_db: bool = Field(True, description="是否自动做情感分析并入库")
+    max_parallel: int = Field(3, ge=1, le=7, description="同时爬取的最大平台数")
+    reuse_browser: bool = Field(False, description="使用常驻爬虫进程，复用已登录的浏览器")
+    adaptive_budget: bool = Field(False, description="按各关键词历史产出分配配额，跳过长期无产出的关键词")
 
 
 @app.post("/api/collector/keyword-crawl")
@@ -648,6 +827,7 @@ def keyword_crawl(data: KeywordCrawlInput):
     """
     try:
         from src.crawler.crawler_pipeline import CrawlerPipeline
+        from src.crawler.keyword_budget import KeywordBudget
         pipeline = CrawlerPipeline()
         result = pipeline.run_keyword_crawling(
             keywords=data.keywords,
@@ -656,22 +836,36 @@ def keyword_crawl(data: KeywordCrawlInput):
             enable_comments=data.enable_comments,
             headless=data.headless,
             import_to_db=data.import_to_db,
+            max_parallel=data.max_parallel,
+            reuse_browser=data.reuse_browser,
+            keyword_budget=KeywordBudget() if data.adaptive_budget else None,
         )
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/collector/keyword-yield")
+def keyword_yield():
+    """各平台关键词的产出统计（新内容、校园占比、风险占比）与下次爬取计划依据"""
+    try:
+        from src.crawler.keyword_budget import KeywordBudget
+        return {"success": True, "data": KeywordBudget().snapshot()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.delete("/api/collector/clear-test-data")
 def clear_test_data():
     """
     清空所有测试/模拟数据，保留表结构。
-    清空顺序：alerts → review_tasks → analysis_stats → sentiment_records
+    清空顺序：alerts → review_tasks → analysis_stats → 记录标签子表 → sentiment_records
     （遵守外键约束）
     """
     try:
         from src.database.connection import SessionLocal
-        from src.database.models import Alert, SentimentRecord, AnalysisStats
+        from src.database.models import Alert, SentimentRecord, AnalysisStats, StatsDirtyRecord
+        from src.services.record_terms import TERM_FIELDS
         session = SessionLocal()
         try:
             from src.database.models import ReviewTask
@@ -684,9 +878,15 @@ def clear_test_data():
         if has_review:
             counts["review_tasks"] = session.query(ReviewTask).delete()
         counts["analysis_stats"] = session.query(AnalysisStats).delete()
+        counts["stats_dirty_records"] = session.query(StatsDirtyRecord).delete()
+        for model, _ in TERM_FIELDS.values():
+            counts[model.__tablename__] = session.query(model).delete()
         counts["sentiment_records"] = session.query(SentimentRecord).delete()
+        from src.services.stats_rollup import reset_rollup_state
+        reset_rollup_state(session)
         session.commit()
         session.close()
+        bump_data_version()
         return {
             "success": True,
             "data": {
@@ -780,11 +980,22 @@ _system_settings = {
     "alertThreshold": "10%",
     "keywords": "食堂,宿舍,热水,教务,考试,图书馆",
     "crawlInterval": "30",
+    "autoCrawl": CRAWL_SCHEDULER_ENABLED,
     "autoAnalysis": True,
     "emailAlert": False,
 }
 
 
+def _crawl_scheduler():
+    """全局增量采集调度器（采集间隔与开关读取系统设置）"""
+    from src.crawler.scheduler import get_crawl_scheduler
+    return get_crawl_scheduler(
+        interval_getter=lambda: _system_settings["crawlInterval"],
+        enabled_getter=lambda: bool(_system_settings["autoCrawl"]),
+        keyword_crawl=CRAWL_KEYWORD_ENABLED,
+    )
+
+
 @app.get("/api/settings")
 def get_settings():
     """获取系统设置"""
@@ -798,6 +1009,8 @@ def save_settings(data: dict):
     for key, value in data.items():
         if key in _system_settings:
             _system_settings[key] = value
+    if "crawlInterval" in data or "autoCrawl" in data:
+        _crawl_scheduler().wake()
     return {"success": True, "message": "设置已保存", "data": _system_settings}
 
 
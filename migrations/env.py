@@ -0,0 +1,55 @@
+# migrations/env.py
+"""
+Alembic 运行环境 - 连接串与表结构元数据均来自项目本身
+
+数据库地址沿用 src/database/connection.py 的 MYSQL_* 环境变量；
+也可以用 alembic -x url=sqlite:///xxx.db upgrade head 临时指定。
+"""
+import sys
+from logging.config import fileConfig
+from pathlib import Path
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.connection import Base, DATABASE_URL  # noqa: E402
+import src.database.models  # noqa: E402,F401  注册所有表
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    return context.get_x_argument(as_dictionary=True).get("url") or DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    """只生成 SQL，不连接数据库"""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = create_engine(_database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,62 @@
+# migrations/schema_helpers.py
+"""
+迁移辅助函数 - 先检查再变更，使每个迁移都可以在以下数据库上重复执行:
+    - init_db() / generate_data.py 用 create_all 建出的库（可能已包含新列和索引）
+    - 按 README 手动补过 content_hash 的旧库
+    - 全新的空库
+"""
+from typing import List
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in _inspector().get_columns(table))
+
+
+def has_index(table: str, name: str) -> bool:
+    return any(ix["name"] == name for ix in _inspector().get_indexes(table))
+
+
+def add_column_if_missing(table: str, column: sa.Column) -> None:
+    if not has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def drop_column_if_exists(table: str, column: str) -> None:
+    if has_column(table, column):
+        op.drop_column(table, column)
+
+
+def _sqlite_index_name_taken(name: str) -> bool:
+    """SQLite 的索引名全库唯一（MySQL 按表区分），同名索引可能已建在其他表上"""
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return bind.execute(
+        sa.text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": name}
+    ).first() is not None
+
+
+def create_index_if_missing(name: str, table: str, columns: List[str], unique: bool = False) -> None:
+    if not has_index(table, name) and not _sqlite_index_name_taken(name):
+        op.create_index(name, table, columns, unique=unique)
+
+
+def drop_index_if_exists(name: str, table: str) -> None:
+    if has_index(table, name):
+        op.drop_index(name, table_name=table)
+
+
+def drop_table_if_exists(name: str) -> None:
+    if sa.inspect(op.get_bind()).has_table(name):
+        op.drop_table(name)
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
@@ -0,0 +1,179 @@
+"""基线：建出引入迁移之前的五张表
+
+    users / sentiment_records / review_tasks / alerts / analysis_stats
+
+列与索引按引入迁移前的模型逐一写出，不依赖当前的 Base.metadata，全新的库重放结果固定；
+之后新增的列、索引与表由 0002 及以后的迁移补齐。
+已有的库（init_db / generate_data.py 建出）中已存在的表直接跳过，不会被改动。
+
+枚举列与 SQLAlchemy Enum(<枚举类>) 一致，存的是成员名（大写）。
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.schema_helpers import create_index_if_missing, has_table
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SENTIMENT_TYPE = ("POSITIVE", "NEGATIVE", "NEUTRAL")
+RISK_LEVEL = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+REVIEW_STATUS = ("PENDING", "APPROVED", "REJECTED", "ESCALATED", "PROCESSING")
+ALERT_STATUS = ("ACTIVE", "ACKNOWLEDGED", "RESOLVED", "DISMISSED")
+DATA_SOURCE = ("WEIBO", "WECHAT", "FORUM", "SURVEY", "COUNSELING", "FEEDBACK", "OTHER")
+
+def _enum(values, name: str) -> sa.Enum:
+    return sa.Enum(*values, name=name)
+
+
+def _create_users() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True, comment="用户名"),
+        sa.Column("password_hash", sa.String(255), nullable=False, comment="密码哈希"),
+        sa.Column("real_name", sa.String(50), nullable=False, comment="真实姓名"),
+        sa.Column("role", sa.String(20), comment="角色: admin/counselor"),
+        sa.Column("department", sa.String(100), comment="所属院系"),
+        sa.Column("phone", sa.String(20), comment="联系电话"),
+        sa.Column("email", sa.String(100), comment="邮箱"),
+        sa.Column("is_active", sa.Boolean, comment="是否激活"),
+        sa.Column("created_at", sa.DateTime, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime),
+    )
+
+
+def _create_sentiment_records() -> None:
+    op.create_table(
+        "sentiment_records",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("content", sa.Text, nullable=False, comment="原始文本内容"),
+        sa.Column("source", _enum(DATA_SOURCE, "datasource"), comment="数据来源"),
+        sa.Column("author_id", sa.String(100), comment="原作者ID（脱敏）"),
+        sa.Column("author_grade", sa.String(20), comment="年级: 大一/大二/大三/大四/研一/研二/研三"),
+        sa.Column("author_department", sa.String(100), comment="院系"),
+        sa.Column("sentiment", _enum(SENTIMENT_TYPE, "sentimenttype"), comment="情感倾向"),
+        sa.Column("emotions", sa.JSON, comment="细粒度情绪列表"),
+        sa.Column("sentiment_confidence", sa.Float, comment="情感分析置信度"),
+        sa.Column("main_topic", sa.String(100), comment="主要话题"),
+        sa.Column("sub_topics", sa.JSON, comment="子话题列表"),
+        sa.Column("keywords", sa.JSON, comment="关键词列表"),
+        sa.Column("risk_level", _enum(RISK_LEVEL, "risklevel"), comment="风险等级"),
+        sa.Column("risk_indicators", sa.JSON, comment="风险信号列表"),
+        sa.Column("risk_confidence", sa.Float, comment="风险评估置信度"),
+        sa.Column("suggested_actions", sa.JSON, comment="建议行动"),
+        sa.Column("review_status", _enum(REVIEW_STATUS, "reviewstatus"), comment="审核状态"),
+        sa.Column("ai_summary", sa.Text, comment="AI生成的摘要"),
+        sa.Column("original_time", sa.DateTime, comment="原始发布时间"),
+        sa.Column("analyzed_at", sa.DateTime, comment="分析时间"),
+        sa.Column("created_at", sa.DateTime, comment="入库时间"),
+    )
+    for name, column in (
+        ("idx_sentiment", "sentiment"),
+        ("idx_risk_level", "risk_level"),
+        ("idx_review_status", "review_status"),
+        ("idx_source", "source"),
+        ("idx_created_at", "created_at"),
+        ("idx_main_topic", "main_topic"),
+        ("idx_author_department", "author_department"),
+    ):
+        op.create_index(name, "sentiment_records", [column])
+
+
+def _create_review_tasks() -> None:
+    op.create_table(
+        "review_tasks",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("record_id", sa.Integer, sa.ForeignKey("sentiment_records.id"),
+                  nullable=False, comment="关联记录ID"),
+        sa.Column("reviewer_id", sa.Integer, sa.ForeignKey("users.id"), nullable=True, comment="审核人ID"),
+        sa.Column("status", _enum(REVIEW_STATUS, "reviewstatus"), comment="审核状态"),
+        sa.Column("priority", sa.Integer, comment="优先级 0-5, 5最高"),
+        sa.Column("ai_risk_level", _enum(RISK_LEVEL, "risklevel"), comment="AI判定的风险等级"),
+        sa.Column("reviewer_risk_level", _enum(RISK_LEVEL, "risklevel"), comment="审核人判定的风险等级"),
+        sa.Column("review_comment", sa.Text, comment="审核意见"),
+        sa.Column("action_taken", sa.Text, comment="已采取的措施"),
+        sa.Column("follow_up_required", sa.Boolean, comment="是否需要后续跟进"),
+        sa.Column("follow_up_note", sa.Text, comment="跟进备注"),
+        sa.Column("assigned_at", sa.DateTime, comment="分配时间"),
+        sa.Column("reviewed_at", sa.DateTime, comment="审核完成时间"),
+        sa.Column("created_at", sa.DateTime, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    # 与 sentiment_records.idx_review_status 同名：SQLite 上名字已被占用时跳过，0003 会换成复合索引
+    create_index_if_missing("idx_review_status", "review_tasks", ["status"])
+    op.create_index("idx_review_priority", "review_tasks", ["priority"])
+    op.create_index("idx_reviewer_id", "review_tasks", ["reviewer_id"])
+
+
+def _create_alerts() -> None:
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("record_id", sa.Integer, sa.ForeignKey("sentiment_records.id"),
+                  nullable=False, comment="关联记录ID"),
+        sa.Column("handler_id", sa.Integer, sa.ForeignKey("users.id"), nullable=True, comment="处理人ID"),
+        sa.Column("alert_type", sa.String(50), comment="预警类型: risk/trend/anomaly"),
+        sa.Column("risk_level", _enum(RISK_LEVEL, "risklevel"), nullable=False, comment="风险等级"),
+        sa.Column("status", _enum(ALERT_STATUS, "alertstatus"), comment="预警状态"),
+        sa.Column("title", sa.String(200), comment="预警标题"),
+        sa.Column("description", sa.Text, comment="预警描述"),
+        sa.Column("ai_suggestion", sa.Text, comment="AI建议的处理方案"),
+        sa.Column("handler_note", sa.Text, comment="处理备注"),
+        sa.Column("resolved_at", sa.DateTime, comment="解决时间"),
+        sa.Column("triggered_at", sa.DateTime, comment="触发时间"),
+        sa.Column("created_at", sa.DateTime, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    op.create_index("idx_alert_status", "alerts", ["status"])
+    op.create_index("idx_alert_risk_level", "alerts", ["risk_level"])
+    op.create_index("idx_alert_triggered_at", "alerts", ["triggered_at"])
+
+
+def _create_analysis_stats() -> None:
+    op.create_table(
+        "analysis_stats",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("stat_date", sa.DateTime, nullable=False, comment="统计日期"),
+        sa.Column("period_type", sa.String(10), comment="统计周期: daily/weekly/monthly"),
+        sa.Column("total_records", sa.Integer, comment="总记录数"),
+        sa.Column("positive_count", sa.Integer, comment="积极数"),
+        sa.Column("negative_count", sa.Integer, comment="消极数"),
+        sa.Column("neutral_count", sa.Integer, comment="中性数"),
+        sa.Column("low_risk_count", sa.Integer, comment="低风险数"),
+        sa.Column("medium_risk_count", sa.Integer, comment="中风险数"),
+        sa.Column("high_risk_count", sa.Integer, comment="高风险数"),
+        sa.Column("critical_risk_count", sa.Integer, comment="危急数"),
+        sa.Column("pending_review_count", sa.Integer, comment="待审核数"),
+        sa.Column("completed_review_count", sa.Integer, comment="已完成审核数"),
+        sa.Column("top_topics", sa.JSON, comment="热门话题 Top10"),
+        sa.Column("top_emotions", sa.JSON, comment="热门情绪 Top10"),
+        sa.Column("avg_sentiment_confidence", sa.Float, comment="平均情感置信度"),
+        sa.Column("avg_risk_confidence", sa.Float, comment="平均风险置信度"),
+        sa.Column("created_at", sa.DateTime),
+    )
+    op.create_index("idx_stat_date", "analysis_stats", ["stat_date"])
+    op.create_index("idx_period_type", "analysis_stats", ["period_type"])
+
+
+def upgrade() -> None:
+    for name, create in (
+        ("users", _create_users),
+        ("sentiment_records", _create_sentiment_records),
+        ("review_tasks", _create_review_tasks),
+        ("alerts", _create_alerts),
+        ("analysis_stats", _create_analysis_stats),
+    ):
+        if not has_table(name):
+            create()
+
+
+def downgrade() -> None:
+    # 基线表可能是迁移引入之前就存在、带着数据的库，不随回退删除
+    pass
@@ -0,0 +1,59 @@
+"""采集去重、近重复聚类与统计汇总所需的列
+
+    sentiment_records.content_hash + uq_source_content_hash   采集按内容哈希去重
+    sentiment_records.cluster_size                            近重复簇成员数
+    analysis_stats.dimension / dimension_value / heat        按维度的统计汇总
+    + uq_stats_period_dimension
+
+Revision ID: 0002_dedup_cluster_rollup
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from migrations.schema_helpers import (
+    add_column_if_missing, create_index_if_missing,
+    drop_column_if_exists, drop_index_if_exists,
+)
+
+revision = "0002_dedup_cluster_rollup"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column_if_missing("sentiment_records", sa.Column(
+        "content_hash", sa.String(40), nullable=True, comment="归一化内容哈希（采集去重）"
+    ))
+    create_index_if_missing(
+        "uq_source_content_hash", "sentiment_records", ["source", "content_hash"], unique=True
+    )
+    add_column_if_missing("sentiment_records", sa.Column(
+        "cluster_size", sa.Integer, nullable=True, server_default="1", comment="近重复簇成员数（含本条）"
+    ))
+
+    add_column_if_missing("analysis_stats", sa.Column(
+        "dimension", sa.String(20), nullable=True, server_default="all",
+        comment="统计维度: all/department/source/topic/grade",
+    ))
+    add_column_if_missing("analysis_stats", sa.Column(
+        "dimension_value", sa.String(100), nullable=True, server_default="", comment="维度取值（all 维度为空）"
+    ))
+    add_column_if_missing("analysis_stats", sa.Column(
+        "heat", sa.Integer, nullable=True, server_default="0", comment="热度（近重复簇成员数之和）"
+    ))
+    create_index_if_missing(
+        "uq_stats_period_dimension", "analysis_stats",
+        ["period_type", "stat_date", "dimension", "dimension_value"], unique=True,
+    )
+
+
+def downgrade() -> None:
+    drop_index_if_exists("uq_stats_period_dimension", "analysis_stats")
+    drop_column_if_exists("analysis_stats", "heat")
+    drop_column_if_exists("analysis_stats", "dimension_value")
+    drop_column_if_exists("analysis_stats", "dimension")
+    drop_column_if_exists("sentiment_records", "cluster_size")
+    drop_index_if_exists("uq_source_content_hash", "sentiment_records")
+    drop_column_if_exists("sentiment_records", "content_hash")
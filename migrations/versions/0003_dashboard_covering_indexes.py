@@ -0,0 +1,76 @@
+"""面板原始记录查询与审核/预警列表的复合索引
+
+趋势、来源、话题、院系分布已改读 AnalysisStats 汇总（0002 + StatsRollup），
+仍直接查 sentiment_records 的是下面这些，都以 created_at 范围过滤开头：
+    总览计数 overview_counts、数据分析技能的情感/风险分布与趋势       只读 sentiment / risk_level
+    话题详情 get_topic_detail（本期与上期）、技能的话题排行           只读 main_topic / source / sentiment / cluster_size
+    StatsRollup._aggregate_day（汇总重算与窗口首日）、最近提及        要读审核状态、置信度或正文，无法覆盖，只需 created_at 范围
+据此只建两个 sentiment_records 索引，InnoDB 二级索引自带主键，COUNT(id) 同样被覆盖：
+
+    sentiment_records
+        idx_created_sentiment_risk     (created_at, sentiment, risk_level)        总览、技能分布/趋势（只读索引）；
+                                                                                  兼作 _aggregate_day 等的 created_at 范围索引
+        idx_created_topic_heat         (created_at, main_topic, source, sentiment, cluster_size)
+                                                                                  话题详情、话题排行（只读索引）
+    review_tasks  idx_review_status_priority_created (status, priority DESC, created_at)  审核队列
+    alerts        idx_alert_status_triggered         (status, triggered_at)          预警列表
+
+写入代价：每条入库记录为每个二级索引多一次 B 树插入。两个索引都以 created_at 开头，
+新记录基本追加在索引右端，页分裂少；替换掉的 idx_created_at 之后，sentiment_records 净增一个索引。
+cluster_size 在 idx_created_topic_heat 中，近重复簇计数更新会改写该索引项（每批一次批量 UPDATE）。
+院系、来源维度的复合索引只服务低频的技能查询或已改读汇总，不值得每次入库的写入，不建；
+这些查询走 idx_created_sentiment_risk 的 created_at 前缀范围扫描后回表。
+
+被新索引前缀覆盖的单列索引 idx_created_at / review_tasks.idx_review_status / idx_alert_status 随之删除。
+
+sentiment_records 上的单列索引 idx_sentiment / idx_risk_level / idx_main_topic / idx_author_department
+也删除：没有查询只按这些列过滤（院系报告同时带 created_at 范围），而它们会让规划器为省去
+GROUP BY 排序改走低选择性的单列索引再逐行回表，上面的查询因此用不上覆盖索引；
+每条入库记录还要为它们各多写一次 B 树。idx_source 是 uq_source_content_hash 的前缀，同样删除。
+效果可用 scripts/benchmark_indexes.py 验证（所有查询都应命中期望索引）。
+
+Revision ID: 0003_dashboard_covering_indexes
+Revises: 0002_dedup_cluster_rollup
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+
+from migrations.schema_helpers import create_index_if_missing, drop_index_if_exists
+
+revision = "0003_dashboard_covering_indexes"
+down_revision = "0002_dedup_cluster_rollup"
+branch_labels = None
+depends_on = None
+
+COVERING_INDEXES = [
+    ("idx_created_sentiment_risk", "sentiment_records", ["created_at", "sentiment", "risk_level"]),
+    ("idx_created_topic_heat", "sentiment_records",
+     ["created_at", "main_topic", "source", "sentiment", "cluster_size"]),
+    ("idx_review_status_priority_created", "review_tasks", ["status", sa.text("priority DESC"), "created_at"]),
+    ("idx_alert_status_triggered", "alerts", ["status", "triggered_at"]),
+]
+
+REPLACED_INDEXES = [
+    ("idx_created_at", "sentiment_records", ["created_at"]),
+    ("idx_review_status", "review_tasks", ["status"]),
+    ("idx_alert_status", "alerts", ["status"]),
+    ("idx_sentiment", "sentiment_records", ["sentiment"]),
+    ("idx_risk_level", "sentiment_records", ["risk_level"]),
+    ("idx_main_topic", "sentiment_records", ["main_topic"]),
+    ("idx_author_department", "sentiment_records", ["author_department"]),
+    ("idx_source", "sentiment_records", ["source"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in COVERING_INDEXES:
+        create_index_if_missing(name, table, columns)
+    for name, table, _ in REPLACED_INDEXES:
+        drop_index_if_exists(name, table)
+
+
+def downgrade() -> None:
+    for name, table, columns in REPLACED_INDEXES:
+        create_index_if_missing(name, table, columns)
+    for name, table, _ in COVERING_INDEXES:
+        drop_index_if_exists(name, table)
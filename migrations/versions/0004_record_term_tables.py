@@ -0,0 +1,42 @@
+"""记录标签子表：情绪
+
+    record_emotions         (record_id, emotion, created_at)
+
+(record_id, emotion) 唯一，(created_at, emotion) 索引供情绪云按时间窗口分组计数。
+关键词与风险信号没有按窗口聚合的查询，不建子表。
+只建表不搬数据：历史记录用 POST /api/collector/backfill-terms 回填（可断点续跑）。
+
+Revision ID: 0004_record_term_tables
+Revises: 0003_dashboard_covering_indexes
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.schema_helpers import drop_table_if_exists, has_table
+
+revision = "0004_record_term_tables"
+down_revision = "0003_dashboard_covering_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table("record_emotions"):
+        op.create_table(
+            "record_emotions",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column(
+                "record_id", sa.Integer,
+                sa.ForeignKey("sentiment_records.id", ondelete="CASCADE"),
+                nullable=False, comment="关联记录ID",
+            ),
+            sa.Column("emotion", sa.String(50), nullable=False, comment="情绪词"),
+            sa.Column("created_at", sa.DateTime, nullable=False, comment="记录入库时间"),
+        )
+        op.create_index("uq_record_emotion", "record_emotions", ["record_id", "emotion"], unique=True)
+        op.create_index("idx_record_emotions_created", "record_emotions", ["created_at", "emotion"])
+
+
+def downgrade() -> None:
+    drop_table_if_exists("record_emotions")
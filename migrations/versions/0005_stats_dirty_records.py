@@ -0,0 +1,36 @@
+"""统计汇总待重算标记表
+
+    stats_dirty_records (id, record_id, marked_at)
+
+已有记录被修改（审核状态、近重复簇大小、补充分析）时，写入方在同一事务中插入被修改的记录 ID，
+StatsRollup.refresh 重算对应日期后删除。代替进程内的脏记录集合，跨进程、重启后都不会丢。
+
+已有数据的库升级后执行一次 python scripts/build_stats_rollup.py 完成汇总的首次构建。
+
+Revision ID: 0005_stats_dirty_records
+Revises: 0004_record_term_tables
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.schema_helpers import drop_table_if_exists, has_table
+
+revision = "0005_stats_dirty_records"
+down_revision = "0004_record_term_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table("stats_dirty_records"):
+        op.create_table(
+            "stats_dirty_records",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("record_id", sa.Integer, nullable=False, comment="被修改的舆情记录ID"),
+            sa.Column("marked_at", sa.DateTime, nullable=True, comment="标记时间"),
+        )
+
+
+def downgrade() -> None:
+    drop_table_if_exists("stats_dirty_records")
@@ -0,0 +1,36 @@
+"""统计汇总水位线表
+
+    stats_rollup_state (id, max_record_id, updated_at)
+
+水位线原先保存在本机 state_store 的 JSON 文件中，换机器、新容器或文件丢失后面板汇总会停止更新。
+改为库中单行（id=1），与汇总行在同一事务中提交。
+升级后还没有水位线：首次面板请求会在后台自动执行一次完整构建（也可以手动执行
+python scripts/build_stats_rollup.py）。
+
+Revision ID: 0006_stats_rollup_state
+Revises: 0005_stats_dirty_records
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.schema_helpers import drop_table_if_exists, has_table
+
+revision = "0006_stats_rollup_state"
+down_revision = "0005_stats_dirty_records"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_table("stats_rollup_state"):
+        op.create_table(
+            "stats_rollup_state",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+            sa.Column("max_record_id", sa.Integer, nullable=False, comment="已汇总到的最大记录ID"),
+            sa.Column("updated_at", sa.DateTime, nullable=True, comment="更新时间"),
+        )
+
+
+def downgrade() -> None:
+    drop_table_if_exists("stats_rollup_state")
@@ -0,0 +1,46 @@
+# scripts/build_stats_rollup.py
+"""
+统计汇总首次构建
+
+已有历史数据的库（升级、导入备份后）还没有汇总水位线，面板请求中的 refresh() 会在后台自动构建；
+数据量大时可以在低峰期先执行本脚本：逐月重算全部日期的日/周/月汇总，完成后在库中写入水位线，
+之后由 refresh() 增量维护。可重复执行，结果一致。
+
+用法：
+    python scripts/build_stats_rollup.py
+    python scripts/build_stats_rollup.py --batch-days 7
+"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+import argparse
+import logging
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计汇总首次构建")
+    parser.add_argument("--batch-days", type=int, default=31, help="每次提交重算的天数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from src.database.connection import SessionLocal
+    from src.services.response_cache import bump_data_version
+    from src.services.stats_rollup import StatsRollup
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    try:
+        days = StatsRollup(session).build_all(batch_days=max(1, args.batch_days))
+        bump_data_version()
+        print(f"✓ 已构建 {days} 天的汇总，耗时 {time.perf_counter() - started:.1f}s")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ from tqdm import tqdm
 
 from src.database.connection import engine, SessionLocal, init_db
 from src.database.models import (
-    SentimentRecord, ReviewTask, Alert, User, AnalysisStats,
+    SentimentRecord, ReviewTask, Alert, User,
     SentimentType, RiskLevel, ReviewStatus, AlertStatus, DataSource
 )
 
@@ -506,88 +506,6 @@ def generate_alerts(session, records):
     return alerts
 
 
-def generate_daily_stats(session):
-    """基于已有数据生成每日统计"""
-    from sqlalchemy import func
-
-    stats_list = []
-    # 获取日期范围
-    min_date = session.query(func.min(SentimentRecord.created_at)).scalar()
-    max_date = session.query(func.max(SentimentRecord.created_at)).scalar()
-
-    if not min_date or not max_date:
-        return stats_list
-
-    current = min_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = max_date.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    while current <= end:
-        next_day = current + timedelta(days=1)
-
-        day_records = session.query(SentimentRecord).filter(
-            SentimentRecord.created_at >= current,
-            SentimentRecord.created_at < next_day
-        ).all()
-
-        if day_records:
-            total = len(day_records)
-            pos = sum(1 for r in day_records if r.sentiment == SentimentType.POSITIVE)
-            neg = sum(1 for r in day_records if r.sentiment == SentimentType.NEGATIVE)
-            neu = total - pos - neg
-
-            low = sum(1 for r in day_records if r.risk_level == RiskLevel.LOW)
-            med = sum(1 for r in day_records if r.risk_level == RiskLevel.MEDIUM)
-            high = sum(1 for r in day_records if r.risk_level == RiskLevel.HIGH)
-            crit = sum(1 for r in day_records if r.risk_level == RiskLevel.CRITICAL)
-
-            pending = sum(1 for r in day_records if r.review_status == ReviewStatus.PENDING)
-            completed = sum(1 for r in day_records if r.review_status == ReviewStatus.APPROVED)
-
-            # 统计话题分布
-            topic_counts = {}
-            emotion_counts = {}
-            for r in day_records:
-                if r.main_topic:
-                    topic_counts[r.main_topic] = topic_counts.get(r.main_topic, 0) + 1
-                for em in (r.emotions or []):
-                    emotion_counts[em] = emotion_counts.get(em, 0) + 1
-
-            top_topics = sorted(topic_counts.items(), key=lambda x: -x[1])[:10]
-            top_emotions = sorted(emotion_counts.items(), key=lambda x: -x[1])[:10]
-
-            avg_sent_conf = sum(
-                r.sentiment_confidence or 0 for r in day_records
-            ) / total
-            avg_risk_conf = sum(
-                r.risk_confidence or 0 for r in day_records
-            ) / total
-
-            stat = AnalysisStats(
-                stat_date=current,
-                period_type="daily",
-                total_records=total,
-                positive_count=pos,
-                negative_count=neg,
-                neutral_count=neu,
-                low_risk_count=low,
-                medium_risk_count=med,
-                high_risk_count=high,
-                critical_risk_count=crit,
-                pending_review_count=pending,
-                completed_review_count=completed,
-                top_topics=[{"topic": t, "count": c} for t, c in top_topics],
-                top_emotions=[{"emotion": e, "count": c} for e, c in top_emotions],
-                avg_sentiment_confidence=round(avg_sent_conf, 3),
-                avg_risk_confidence=round(avg_risk_conf, 3),
-                created_at=next_day,
-            )
-            stats_list.append(stat)
-
-        current = next_day
-
-    return stats_list
-
-
 def main():
     """主函数 - 生成全部数据"""
     print("=" * 60)
@@ -624,6 +542,11 @@ def main():
         session.flush()
         print(f"  ✓ 成功插入 {len(records)} 条记录")
 
+        # 情绪标签展开到子表（情绪云读子表）
+        from src.services.record_terms import backfill_record_terms
+        backfill = backfill_record_terms(resume=False)
+        print(f"  ✓ 标签子表写入 {sum(backfill['written'].values())} 行")
+
         # 重新查询获取有ID的记录
         all_records = session.query(SentimentRecord).all()
 
@@ -647,13 +570,11 @@ def main():
                 session.commit()
         print(f"  ✓ 创建了 {len(alerts)} 条预警记录")
 
-        # 6. 生成统计
-        print("\n[6/6] 生成每日统计数据...")
-        stats = generate_daily_stats(session)
-        if stats:
-            session.add_all(stats)
-            session.commit()
-        print(f"  ✓ 生成了 {len(stats)} 天的统计数据")
+        # 6. 生成统计（由 StatsRollup 按天重算日/周/月汇总并写入水位线，重复执行不会与已有汇总行冲突）
+        print("\n[6/6] 生成统计汇总...")
+        from src.services.stats_rollup import StatsRollup
+        stats_days = StatsRollup(session).build_all()
+        print(f"  ✓ 生成了 {stats_days} 天的统计数据")
 
         print("\n" + "=" * 60)
         print("  数据生成完成！")
@@ -661,7 +582,7 @@ def main():
         print(f"  - 情感记录: {len(records)}")
         print(f"  - 审核任务: {len(tasks)}")
         print(f"  - 预警记录: {len(alerts)}")
-        print(f"  - 统计数据: {len(stats)} 天")
+        print(f"  - 统计数据: {stats_days} 天")
         print("=" * 60)
 
     except Exception as e:
@@ -11,6 +11,8 @@ from src.database.models import (
     ReviewTask, SentimentRecord, Alert, User,
     ReviewStatus, RiskLevel, AlertStatus
 )
+from src.services.response_cache import bump_data_version
+from src.services.stats_rollup import mark_records_dirty
 
 
 class ReviewAgent:
@@ -61,6 +63,7 @@ class ReviewAgent:
         
         self.db.add(task)
         self.db.commit()
+        bump_data_version()
         self.db.refresh(task)
         return task
     
@@ -101,28 +104,30 @@ class ReviewAgent:
         page_size: int = 20
     ) -> dict:
         """获取待审核任务列表"""
-        query = self.db.query(ReviewTask).join(SentimentRecord)
-        
+        from sqlalchemy import func
+
+        filters = []
         if reviewer_id:
-            query = query.filter(ReviewTask.reviewer_id == reviewer_id)
+            filters.append(ReviewTask.reviewer_id == reviewer_id)
         
         if risk_level:
-            query = query.filter(ReviewTask.ai_risk_level == RiskLevel(risk_level))
+            filters.append(ReviewTask.ai_risk_level == RiskLevel(risk_level))
+        
+        total = self.db.query(func.count(ReviewTask.id)).join(
+            SentimentRecord, ReviewTask.record_id == SentimentRecord.id
+        ).filter(*filters).scalar() or 0
         
         # 按优先级降序、创建时间升序排列
-        query = query.order_by(
+        rows = self._task_query().filter(*filters).order_by(
             ReviewTask.priority.desc(),
             ReviewTask.created_at.asc()
-        )
-        
-        total = query.count()
-        tasks = query.offset((page - 1) * page_size).limit(page_size).all()
+        ).offset((page - 1) * page_size).limit(page_size).all()
         
         return {
             "total": total,
             "page": page,
             "page_size": page_size,
-            "tasks": [self._task_to_dict(t) for t in tasks]
+            "tasks": [self._task_to_dict(row) for row in rows]
         }
     
     def review_task(
@@ -157,7 +162,9 @@ class ReviewAgent:
         if record:
             record.review_status = ReviewStatus(status)
         
+        mark_records_dirty(self.db, [task.record_id])
         self.db.commit()
+        bump_data_version()
         self.db.refresh(task)
         return task
     
@@ -177,7 +184,9 @@ class ReviewAgent:
         if record:
             record.review_status = ReviewStatus.ESCALATED
         
+        mark_records_dirty(self.db, [task.record_id])
         self.db.commit()
+        bump_data_version()
         self.db.refresh(task)
         return task
     
@@ -206,26 +215,47 @@ class ReviewAgent:
             ) if total > 0 else 0,
         }
     
-    def _task_to_dict(self, task: ReviewTask) -> dict:
-        """将审核任务转为字典"""
-        record = self.db.query(SentimentRecord).get(task.record_id)
-        reviewer = self.db.query(User).get(task.reviewer_id) if task.reviewer_id else None
+    def _task_query(self):
+        """
+        审核任务 + 关联记录的展示列 + 审核人姓名，一条语句取回
+
+        审核需要阅读全文，content 不截断；记录的其他列只取展示用到的几列。
+        """
+        return self.db.query(
+            ReviewTask,
+            SentimentRecord.content,
+            SentimentRecord.source,
+            SentimentRecord.author_department,
+            SentimentRecord.author_grade,
+            SentimentRecord.sentiment,
+            SentimentRecord.emotions,
+            SentimentRecord.main_topic,
+            User.real_name.label("reviewer_name"),
+        ).join(
+            SentimentRecord, ReviewTask.record_id == SentimentRecord.id
+        ).outerjoin(
+            User, ReviewTask.reviewer_id == User.id
+        )
+    
+    def _task_to_dict(self, row) -> dict:
+        """将审核任务转为字典，row 为 _task_query() 的结果行"""
+        task = row.ReviewTask
         
         return {
             "id": task.id,
             "record_id": task.record_id,
-            "content": record.content if record else "",
-            "source": record.source.value if record and record.source else "",
-            "author_department": record.author_department if record else "",
-            "author_grade": record.author_grade if record else "",
-            "sentiment": record.sentiment.value if record and record.sentiment else "",
-            "emotions": record.emotions or [],
-            "main_topic": record.main_topic if record else "",
+            "content": row.content or "",
+            "source": row.source.value if row.source else "",
+            "author_department": row.author_department or "",
+            "author_grade": row.author_grade or "",
+            "sentiment": row.sentiment.value if row.sentiment else "",
+            "emotions": row.emotions or [],
+            "main_topic": row.main_topic or "",
             "ai_risk_level": task.ai_risk_level.value if task.ai_risk_level else "",
             "reviewer_risk_level": task.reviewer_risk_level.value if task.reviewer_risk_level else None,
             "status": task.status.value if task.status else "",
             "priority": task.priority,
-            "reviewer_name": reviewer.real_name if reviewer else None,
+            "reviewer_name": row.reviewer_name,
             "review_comment": task.review_comment,
             "action_taken": task.action_taken,
             "follow_up_required": task.follow_up_required,
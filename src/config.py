@@ -39,6 +39,12 @@ def get_deepseek_llm():
     )
 
 
+# 增量采集调度器：默认关闭，设置为 true 后 API 启动时自动开始定时采集
+CRAWL_SCHEDULER_ENABLED = os.getenv("CRAWL_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+# 调度器每轮是否执行关键词深度爬取（会启动 MediaCrawler 浏览器），默认关闭
+CRAWL_KEYWORD_ENABLED = os.getenv("CRAWL_KEYWORD_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
 # ChromaDB配置
 CHROMA_PERSIST_DIR = "./chroma_data"  # 向量数据库存储位置
 os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
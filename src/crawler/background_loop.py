@@ -0,0 +1,103 @@
+# src/crawler/background_loop.py
+"""
+后台事件循环 - 供同步代码提交协程的常驻 asyncio 循环线程
+
+同步调用方（FastAPI 同步端点、调度器线程、脚本）不再每次
+新建线程池 + asyncio.run，而是把协程提交到同一个常驻循环上执行，
+绑定在该循环上的 httpx 连接池和缓存可以跨调用复用。
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """在守护线程中常驻运行的事件循环"""
+
+    def __init__(self, name: str = "crawler-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """返回事件循环，首次访问时启动线程"""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self) -> None:
+        ready = threading.Event()
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name=self.name, daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info(f"[BackgroundLoop] {self.name} 已启动")
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """在后台循环中执行协程并阻塞等待结果"""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在后台循环线程内同步等待协程，请直接 await")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """把协程提交到后台循环，不等待结果"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止事件循环（先关闭共享的新闻采集客户端）"""
+        with self._lock:
+            if self._loop is None:
+                return
+            from src.crawler.news_collector import get_news_collector
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    get_news_collector().aclose(), self._loop
+                ).result(timeout)
+            except Exception as e:
+                logger.warning(f"[BackgroundLoop] 关闭 HTTP 客户端失败: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+_background_loop = BackgroundLoop()
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """在常驻后台循环中运行协程（同步代码调用异步采集的统一入口）"""
+    return _background_loop.run(coro, timeout)
+
+
+def submit_async(coro: Coroutine) -> concurrent.futures.Future:
+    """在常驻后台循环中启动协程，返回可在同步代码中等待的 Future"""
+    return _background_loop.submit(coro)
+
+
+def background_event_loop() -> asyncio.AbstractEventLoop:
+    return _background_loop.loop
+
+
+def stop_background_loop() -> None:
+    _background_loop.stop()
@@ -0,0 +1,355 @@
+# src/crawler/bulk_importer.py
+"""
+批量入库引擎 - 采集数据的高吞吐导入路径
+
+取代逐条 session.add + session.flush 的写法：
+1. 按 (source, content_hash) 批量查重，已入库的内容直接跳过，不再分析
+2. 近重复聚类（见 near_duplicate.py），同一事件的其他版本只累加代表记录的 cluster_size
+3. 对剩余内容做快速情感/风险分析
+4. 用一条多行 INSERT 写入 SentimentRecord，并批量取回自增 ID
+5. 情绪标签写入子表（见 services/record_terms.py）
+6. 用一条批量 INSERT 写入对应的 Alert
+7. 每 commit_size 条提交一次，控制事务大小
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import bindparam, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMIT_SIZE = 1000
+
+ALERT_RISK_LEVELS = ("high", "critical")
+
+
+# 归一化时去掉的空白与装饰性标点。数字之间的 "." ":"（3.5、12:30）和数字前的 "#"（#3）
+# 有实际含义，保留，否则 "3.5" 与 "35"、"12:30" 与 "1230" 会得到同一个哈希
+_HASH_STRIP_RE = re.compile(
+    r"[\s@【】\[\]()（），,。！!？?、\"'“”‘’]+"
+    r"|(?<!\d)[.:：]|[.:：](?!\d)"
+    r"|#(?!\d)"
+)
+
+
+def compute_content_hash(text: str) -> Optional[str]:
+    """
+    计算归一化内容哈希
+
+    全角转半角、转小写、去掉空白与装饰性标点（数字中的小数点、时间冒号与编号 # 保留）后取 SHA-1，
+    使同一条热搜/帖子在不同轮次的细微格式差异不影响去重。
+    归一化后为空（纯空白/纯标点）时返回 None：这类条目不参与去重，
+    否则同一来源的所有空内容共用一个哈希，只有第一条能入库。
+    """
+    normalized = unicodedata.normalize("NFKC", text or "").lower()
+    normalized = _HASH_STRIP_RE.sub("", normalized)
+    if not normalized:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def build_alert_row(record_id: int, content: str, analysis: Dict, now: datetime) -> Dict:
+    """根据分析结果构造一条风险预警的插入参数"""
+    from src.database.models import RiskLevel, AlertStatus
+
+    return {
+        "record_id": record_id,
+        "alert_type": "risk",
+        "risk_level": RiskLevel(analysis["risk_level"]),
+        "status": AlertStatus.ACTIVE,
+        "title": f"[{analysis['risk_level'].upper()}] {content[:50]}",
+        "description": f"风险指标: {', '.join(analysis['risk_indicators'])}",
+        "ai_suggestion": "; ".join(analysis["suggested_actions"]),
+        "triggered_at": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _chunks(items: List[Dict], size: int) -> Iterator[List[Dict]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BulkImporter:
+    """
+    批量入库引擎
+
+    输入为已完成过滤/归一化的条目，每个条目包含：
+        content:        入库文本
+        source:         DataSource 枚举
+        author_id:      原始条目 ID
+        fallback_topic: 分析器未识别出主题时使用的话题
+        keywords:       关键词列表（可为 None）
+    """
+
+    def __init__(self, commit_size: int = DEFAULT_COMMIT_SIZE):
+        self.commit_size = max(1, commit_size)
+
+    def import_items(self, items: List[Dict]) -> Dict:
+        """
+        查重、分析并批量写入
+
+        Returns:
+            {success, imported, skipped_duplicates, near_duplicates, alerts_created}
+        """
+        from src.crawler.near_duplicate import get_near_duplicate_index
+        from src.database.connection import SessionLocal
+
+        session = SessionLocal()
+        imported = 0
+        skipped_duplicates = 0
+        near_duplicates = 0
+        alerts_created = 0
+        index = get_near_duplicate_index()
+
+        try:
+            for chunk in _chunks(items, self.commit_size):
+                for item in chunk:
+                    item["content_hash"] = compute_content_hash(item["content"])
+
+                try:
+                    fresh = self.drop_known(session, chunk)
+                    representatives, bumped = self.fold_near_duplicates(session, fresh)
+                    chunk_imported, chunk_alerts = self._write_chunk(session, representatives, bumped)
+                except IntegrityError:
+                    # 并发导入抢先写入了同样的内容：回滚本批，重新查重后重试一次
+                    session.rollback()
+                    index.discard(chunk)
+                    fresh = self.drop_known(session, chunk)
+                    representatives, bumped = self.fold_near_duplicates(session, fresh)
+                    chunk_imported, chunk_alerts = self._write_chunk(session, representatives, bumped)
+                except Exception:
+                    index.discard(chunk)
+                    raise
+
+                imported += chunk_imported
+                alerts_created += chunk_alerts
+                skipped_duplicates += len(chunk) - len(fresh)
+                near_duplicates += len(fresh) - len(representatives)
+
+            return {
+                "success": True,
+                "imported": imported,
+                "skipped_duplicates": skipped_duplicates,
+                "near_duplicates": near_duplicates,
+                "alerts_created": alerts_created,
+            }
+        except Exception as e:
+            session.rollback()
+            logger.error(f"[BulkImporter] 批量入库失败: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "imported": imported,
+                "skipped_duplicates": skipped_duplicates,
+                "near_duplicates": near_duplicates,
+                "alerts_created": alerts_created,
+            }
+        finally:
+            session.close()
+
+    # ─────── 内部方法 ───────
+
+    def _write_chunk(self, session, chunk: List[Dict], bumped: int = 0) -> Tuple[int, int]:
+        """
+        分析并写入一批新内容，返回 (写入记录数, 创建预警数)
+
+        Args:
+            bumped: 本批并入已入库簇、累加了 cluster_size 的记录数
+        """
+        from src.services.record_terms import insert_record_terms
+        from src.services.response_cache import bump_data_version
+
+        if not chunk:
+            # 本批可能全部并入了已有簇，仍需提交 cluster_size 的累加；数据没变时不让面板缓存失效
+            session.commit()
+            if bumped:
+                bump_data_version()
+            return 0, 0
+
+        analyses = self._analyze(chunk)
+        now = datetime.now()
+
+        record_rows = [
+            self.build_record_row(item, analysis, now)
+            for item, analysis in zip(chunk, analyses)
+        ]
+        record_ids = self.insert_records(session, record_rows)
+        insert_record_terms(session, record_ids, record_rows)
+        # 回写分析出的风险等级，调用方据此统计新内容的产出（如关键词预算）
+        for item, analysis in zip(chunk, analyses):
+            item["risk_level"] = analysis["risk_level"]
+
+        alert_rows = [
+            build_alert_row(record_id, item["content"], analysis, now)
+            for record_id, item, analysis in zip(record_ids, chunk, analyses)
+            if analysis["risk_level"] in ALERT_RISK_LEVELS
+        ]
+        if alert_rows:
+            from src.database.models import Alert
+            session.execute(insert(Alert.__table__), alert_rows)
+
+        session.commit()
+        self.bind_clusters(session, chunk, record_ids)
+        bump_data_version()
+        return len(record_rows), len(alert_rows)
+
+    @staticmethod
+    def _analyze(chunk: List[Dict]) -> List[Dict]:
+        from src.sentiment.fast_analyzer import analyze_batch
+        return analyze_batch([item["content"] for item in chunk])
+
+    # ─────── 分步操作（StreamingPipeline 复用） ───────
+
+    @staticmethod
+    def drop_known(session, chunk: List[Dict]) -> List[Dict]:
+        """
+        去掉库中已存在或本批内重复的条目（按 source + content_hash）
+
+        按 (source, content_hash) 元组查询，命中唯一索引 uq_source_content_hash；
+        没有哈希（归一化后为空）的条目不参与去重。
+        """
+        from src.database.models import SentimentRecord, DataSource
+
+        keys = {
+            (DataSource(item["source"]), item["content_hash"])
+            for item in chunk if item["content_hash"]
+        }
+        known: Set[tuple] = set()
+        if keys:
+            known = set(
+                session.execute(
+                    select(SentimentRecord.source, SentimentRecord.content_hash)
+                    .where(tuple_(SentimentRecord.source, SentimentRecord.content_hash).in_(keys))
+                ).all()
+            )
+
+        fresh = []
+        for item in chunk:
+            if not item["content_hash"]:
+                fresh.append(item)
+                continue
+            key = (DataSource(item["source"]), item["content_hash"])
+            if key in known:
+                continue
+            known.add(key)
+            fresh.append(item)
+        return fresh
+
+    @staticmethod
+    def fold_near_duplicates(session, chunk: List[Dict]) -> Tuple[List[Dict], int]:
+        """
+        近重复聚类：返回 (需要分析入库的簇代表条目, 累加了 cluster_size 的记录数)
+
+        并入已入库簇的条目在本事务中累加代表记录的 cluster_size，随本批一起提交；
+        并入待定簇的条目只计在内存里，不改动数据库。
+        """
+        from src.crawler.near_duplicate import get_near_duplicate_index
+
+        representatives, bumps = get_near_duplicate_index().assign(chunk)
+        BulkImporter.bump_cluster_sizes(session, bumps)
+        return representatives, len(bumps)
+
+    @staticmethod
+    def bind_clusters(session, items: List[Dict], record_ids: List[int]) -> None:
+        """代表条目提交后绑定记录 ID，并补加待定期间并入的成员数"""
+        from src.crawler.near_duplicate import get_near_duplicate_index
+
+        bumps = get_near_duplicate_index().bind(items, record_ids)
+        if bumps:
+            BulkImporter.bump_cluster_sizes(session, bumps)
+            session.commit()
+
+    @staticmethod
+    def bump_cluster_sizes(session, bumps: Dict[int, int]) -> None:
+        """批量累加 cluster_size: {record_id: 增量}"""
+        if not bumps:
+            return
+        from src.database.models import SentimentRecord
+        from src.services.stats_rollup import mark_records_dirty
+
+        table = SentimentRecord.__table__
+        session.execute(
+            update(table)
+            .where(table.c.id == bindparam("rid"))
+            .values(cluster_size=func.coalesce(table.c.cluster_size, 1) + bindparam("delta")),
+            [{"rid": rid, "delta": delta} for rid, delta in bumps.items()],
+        )
+        # 旧记录的热度变了，所在日期的汇总需要重算
+        mark_records_dirty(session, bumps)
+
+    @staticmethod
+    def insert_records(session, rows: List[Dict]) -> List[int]:
+        """
+        多行 INSERT 写入 SentimentRecord，返回与 rows 顺序一致的 ID 列表
+
+        支持 RETURNING 的后端（SQLite / PostgreSQL / MariaDB）直接按参数顺序取回；
+        MySQL 下插入后按唯一键 (source, content_hash) 在同一事务内回查 ID。
+        不能用 lastrowid 推算：auto_increment_increment > 1（多主/Galera）或交错锁模式下
+        自增值不连续，推算错了预警和标签会挂到别的记录上。
+        """
+        from src.database.models import SentimentRecord, DataSource
+
+        table = SentimentRecord.__table__
+        dialect = session.get_bind().dialect
+
+        if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+            result = session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                rows,
+            )
+            return [row.id for row in result]
+
+        ids: List[Optional[int]] = [None] * len(rows)
+        keyed = [i for i, row in enumerate(rows) if row.get("content_hash")]
+        for i, row in enumerate(rows):
+            if not row.get("content_hash"):
+                # 没有唯一键可回查：逐条插入，取各自的 lastrowid
+                ids[i] = session.execute(insert(table).values(row)).lastrowid
+
+        if keyed:
+            session.execute(insert(table).values([rows[i] for i in keyed]))
+            keys = [(DataSource(rows[i]["source"]), rows[i]["content_hash"]) for i in keyed]
+            found = {
+                (source, content_hash): record_id
+                for record_id, source, content_hash in session.execute(
+                    select(table.c.id, table.c.source, table.c.content_hash)
+                    .where(tuple_(table.c.source, table.c.content_hash).in_(keys))
+                )
+            }
+            for i, key in zip(keyed, keys):
+                ids[i] = found[key]
+        return ids
+
+    @staticmethod
+    def build_record_row(item: Dict, analysis: Dict, now: datetime) -> Dict:
+        from src.database.models import SentimentType, RiskLevel
+
+        detected_topic = analysis["main_topic"]
+        if not detected_topic or detected_topic in ("其他",):
+            detected_topic = item.get("fallback_topic") or detected_topic
+
+        return {
+            "content": item["content"],
+            "content_hash": item["content_hash"],
+            "cluster_size": item.get("cluster_size", 1),
+            "source": item["source"],
+            "author_id": item.get("author_id", ""),
+            "sentiment": SentimentType(analysis["sentiment"]),
+            "emotions": analysis["emotions"],
+            "sentiment_confidence": analysis["sentiment_confidence"],
+            "main_topic": detected_topic,
+            "keywords": item.get("keywords"),
+            "risk_level": RiskLevel(analysis["risk_level"]),
+            "risk_indicators": analysis["risk_indicators"],
+            "risk_confidence": analysis["risk_confidence"],
+            "suggested_actions": analysis["suggested_actions"],
+            "created_at": now,
+            "analyzed_at": now,
+        }
@@ -7,22 +7,42 @@
 
 本模块还提供将采集数据导入校园舆情 MySQL 数据库的能力
 """
-import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
 import logging
+import threading
 
-from src.crawler.news_collector import NewsCollector, SOURCE_CONFIG, CAMPUS_PRIORITY_SOURCES
+from sqlalchemy import select, update, insert, bindparam, func
+
+from src.crawler.news_collector import (
+    NewsCollector, SOURCE_CONFIG, CAMPUS_PRIORITY_SOURCES, get_news_collector,
+)
 from src.crawler.topic_extractor import TopicExtractor
+from src.crawler.bulk_importer import (
+    BulkImporter, DEFAULT_COMMIT_SIZE, ALERT_RISK_LEVELS, build_alert_row,
+)
 
 logger = logging.getLogger(__name__)
 
+# analyze_pending_records 排空模式的检查点名称与单实例锁名称（见 state_store）
+PENDING_CHECKPOINT = "analyze_pending"
+PENDING_LOCK = "analyze_pending"
+# 每批提交时刷新锁文件；超过该时长没有刷新的锁视为持有进程已崩溃
+PENDING_LOCK_STALE_SECONDS = 10 * 60
+
+# 本进程内的后台补充分析任务（跨进程互斥由 PENDING_LOCK 保证）
+_pending_job: Dict = {}
+_pending_job_lock = threading.Lock()
+
+# 深度爬取流式入库的死信名称（条目归一化方式与热点新闻不同，不能混在一起重放）
+DEEP_DEAD_LETTER_STATE = "streaming_dead_letter_deep"
+
 DEFAULT_CAMPUS_KEYWORDS = [
     "XX大学 食堂", "XX大学 宿舍", "XX大学 考试",
     "XX大学 选课", "XX大学 就业", "XX大学 图书馆",
     "XX大学 奖学金", "XX大学 实习", "XX大学 教务",
     "XX大学 社团", "XX大学 军训", "XX大学 考研",
-    "XX大学 食堂", "XX大学 宿舍", "XX大学 考试",
 ]
 
 
@@ -36,7 +56,7 @@ class CrawlerPipeline:
     """
 
     def __init__(self):
-        self.news_collector = NewsCollector()
+        self.news_collector = get_news_collector()
         self.topic_extractor = TopicExtractor()
 
     # ─────── 阶段1: 热点发现 ───────
@@ -89,16 +109,9 @@ class CrawlerPipeline:
         return result
 
     def run_topic_extraction_sync(self, **kwargs) -> Dict:
-        """同步版本"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as pool:
-                    return pool.submit(asyncio.run, self.run_topic_extraction(**kwargs)).result()
-            return asyncio.run(self.run_topic_extraction(**kwargs))
-        except RuntimeError:
-            return asyncio.run(self.run_topic_extraction(**kwargs))
+        """同步版本（在常驻后台循环中执行）"""
+        from src.crawler.background_loop import run_sync
+        return run_sync(self.run_topic_extraction(**kwargs))
 
     # ─────── 校园相关性过滤 ───────
 
@@ -137,115 +150,51 @@ class CrawlerPipeline:
 
     # ─────── 阶段2: 真实数据导入 ───────
 
-    def import_news_to_database(self, news_list: List[Dict], keywords: List[str] = None) -> Dict:
+    def import_news_to_database(
+        self,
+        news_list: List[Dict],
+        keywords: List[str] = None,
+        commit_size: int = DEFAULT_COMMIT_SIZE,
+    ) -> Dict:
         """
         将采集到的真实新闻数据导入 MySQL：
         1. 用校园关键词过滤，只保留与校园相关的真实条目
         2. 对真实内容执行情感分析和风险评估
         3. 原始内容原样入库，不做任何篡改
-        """
-        from src.database.connection import SessionLocal
-        from src.database.models import (
-            SentimentRecord, DataSource, SentimentType, RiskLevel, Alert, AlertStatus
-        )
-        from src.sentiment.fast_analyzer import analyze_text
 
-        session = SessionLocal()
-        imported = 0
+        分析与写入由 BulkImporter 按 commit_size 分批完成
+        """
         skipped = 0
-        alerts_created = 0
+        items = []
+        for item in news_list:
+            prepared = self._prepare_news_item(item, keywords)
+            if prepared is None:
+                continue
 
-        SOURCE_MAP = {
-            "weibo": DataSource.WEIBO,
-            "zhihu": DataSource.FORUM,
-            "bilibili-hot-search": DataSource.OTHER,
-            "toutiao": DataSource.OTHER,
-            "douyin": DataSource.OTHER,
-            "tieba": DataSource.FORUM,
-            "coolapk": DataSource.OTHER,
-            "thepaper": DataSource.OTHER,
-        }
+            if not self.is_campus_related(prepared["content"]):
+                skipped += 1
+                continue
 
-        SENTIMENT_MAP = {
-            "positive": SentimentType.POSITIVE,
-            "negative": SentimentType.NEGATIVE,
-            "neutral": SentimentType.NEUTRAL,
-        }
-        RISK_MAP = {
-            "low": RiskLevel.LOW,
-            "medium": RiskLevel.MEDIUM,
-            "high": RiskLevel.HIGH,
-            "critical": RiskLevel.CRITICAL,
-        }
+            items.append(prepared)
 
-        try:
-            for item in news_list:
-                title = item.get("title", "").strip()
-                if not title or len(title) < 4:
-                    continue
-
-                if not self.is_campus_related(title):
-                    skipped += 1
-                    continue
-
-                source_id = item.get("source", "other")
-                db_source = SOURCE_MAP.get(source_id, DataSource.OTHER)
-
-                analysis = analyze_text(title)
-                detected_topic = analysis["main_topic"]
-                if keywords and (not detected_topic or detected_topic in ("其他",)):
-                    detected_topic = keywords[0]
-
-                record = SentimentRecord(
-                    content=title,
-                    source=db_source,
-                    author_id=item.get("id", ""),
-                    sentiment=SENTIMENT_MAP.get(analysis["sentiment"], SentimentType.NEUTRAL),
-                    emotions=analysis["emotions"],
-                    sentiment_confidence=analysis["sentiment_confidence"],
-                    main_topic=detected_topic,
-                    keywords=keywords[:5] if keywords else None,
-                    risk_level=RISK_MAP.get(analysis["risk_level"], RiskLevel.LOW),
-                    risk_indicators=analysis["risk_indicators"],
-                    risk_confidence=analysis["risk_confidence"],
-                    suggested_actions=analysis["suggested_actions"],
-                    created_at=datetime.now(),
-                    analyzed_at=datetime.now(),
-                )
-                session.add(record)
-                session.flush()
-                imported += 1
-
-                if analysis["risk_level"] in ("high", "critical"):
-                    alert = Alert(
-                        record_id=record.id,
-                        alert_type="risk",
-                        risk_level=RISK_MAP[analysis["risk_level"]],
-                        status=AlertStatus.ACTIVE,
-                        title=f"[{analysis['risk_level'].upper()}] {title[:50]}",
-                        description=f"风险指标: {', '.join(analysis['risk_indicators'])}",
-                        ai_suggestion="; ".join(analysis["suggested_actions"]),
-                    )
-                    session.add(alert)
-                    alerts_created += 1
+        result = BulkImporter(commit_size=commit_size).import_items(items)
+        if not result["success"]:
+            logger.error(f"[Pipeline] 数据导入失败: {result['error']}")
+            return {"success": False, "error": result["error"]}
 
-            session.commit()
-            logger.info(
-                f"[Pipeline] 校园相关 {imported} 条已导入, "
-                f"过滤掉无关数据 {skipped} 条, 创建预警 {alerts_created} 条"
-            )
-            return {
-                "success": True,
-                "imported": imported,
-                "skipped_not_campus": skipped,
-                "alerts_created": alerts_created,
-            }
-        except Exception as e:
-            session.rollback()
-            logger.error(f"[Pipeline] 数据导入失败: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            session.close()
+        logger.info(
+            f"[Pipeline] 校园相关 {result['imported']} 条已导入, "
+            f"过滤掉无关数据 {skipped} 条, 跳过重复 {result['skipped_duplicates']} 条, "
+            f"并入近重复簇 {result['near_duplicates']} 条, 创建预警 {result['alerts_created']} 条"
+        )
+        return {
+            "success": True,
+            "imported": result["imported"],
+            "skipped_not_campus": skipped,
+            "skipped_duplicates": result["skipped_duplicates"],
+            "near_duplicates": result["near_duplicates"],
+            "alerts_created": result["alerts_created"],
+        }
 
     # ─────── 阶段2b: 自定义关键词深度搜索爬取 ───────
 
@@ -257,6 +206,9 @@ class CrawlerPipeline:
         enable_comments: bool = True,
         headless: bool = True,
         import_to_db: bool = True,
+        max_parallel: int = 3,
+        reuse_browser: bool = False,
+        keyword_budget=None,
     ) -> Dict:
         """
         跳过热点提取，直接用自定义校园关键词在多平台上搜索爬取。
@@ -269,6 +221,10 @@ class CrawlerPipeline:
             enable_comments: 是否爬取评论
             headless: 是否无头模式（首次登录建议 False）
             import_to_db: 是否将爬取内容做情感分析后入库
+            max_parallel: 同时爬取的最大平台数
+            reuse_browser: 使用常驻工作进程，复用已启动的浏览器与登录态
+            keyword_budget: KeywordBudget 实例。传入时按各关键词的历史产出分配配额、跳过低产出关键词；
+                            入库时记录本次产出（import_to_db=False 时由调用方导入后记录并 finish_run）
 
         Returns:
             {"success": bool, "crawl_result": {...}, "import_result": {...}}
@@ -277,9 +233,14 @@ class CrawlerPipeline:
 
         if keywords is None:
             keywords = DEFAULT_CAMPUS_KEYWORDS
+        keywords = list(dict.fromkeys(keywords))
         if platforms is None:
             platforms = ["wb", "zhihu"]
 
+        keyword_quotas = None
+        if keyword_budget is not None:
+            keyword_quotas = keyword_budget.plan(keywords, platforms, max_notes)
+
         logger.info(
             f"[Pipeline] === 自定义关键词深度爬取 ===\n"
             f"  关键词: {keywords[:5]}{'...' if len(keywords) > 5 else ''}\n"
@@ -287,26 +248,41 @@ class CrawlerPipeline:
         )
 
         crawler = DeepCrawler()
-        crawl_result = crawler.run_multi_platform(
-            keywords=keywords,
-            platforms=platforms,
-            max_notes=max_notes,
-            enable_comments=enable_comments,
-            headless=headless,
-        )
-
         import_result = None
-        if import_to_db and crawl_result.get("all_items"):
-            all_normalized = []
-            for plat, plat_result in crawl_result.get("platform_results", {}).items():
-                raw_items = plat_result.get("items", [])
+        on_items = None
+        feed = None
+        if import_to_db:
+            # 爬取进行中边读边入库：各平台线程把新记录投递到流式管道，
+            # 分析与写库在后台循环中并行进行，管道积压时投递阻塞（背压到爬取线程）
+            feed, ingest = self._start_deep_ingest(keywords, keyword_budget)
+
+            def on_items(plat: str, raw_items: List[Dict]) -> None:
                 normalized = DeepCrawler.normalize_items(raw_items, plat)
-                all_normalized.extend(normalized)
+                if not normalized:
+                    return
+                feed.put(normalized)
+                if keyword_budget is not None:
+                    for item in normalized:
+                        keyword_budget.record(item["source"], item.get("source_keyword") or "", fetched=1)
 
-            if all_normalized:
-                import_result = self._import_deep_crawl_to_database(
-                    all_normalized, keywords
-                )
+        try:
+            crawl_result = crawler.run_multi_platform(
+                keywords=keywords,
+                platforms=platforms,
+                max_notes=max_notes,
+                enable_comments=enable_comments,
+                headless=headless,
+                max_parallel=max_parallel,
+                on_items=on_items,
+                reuse_browser=reuse_browser,
+                keyword_quotas=keyword_quotas,
+            )
+        finally:
+            if feed is not None:
+                feed.close()
+                import_result = ingest.result()
+        if keyword_budget is not None and import_to_db:
+            keyword_budget.finish_run()
 
         return {
             "success": crawl_result.get("success", False),
@@ -316,21 +292,144 @@ class CrawlerPipeline:
             "import_result": import_result,
             "keywords_used": keywords,
             "platforms_used": platforms,
+            "keyword_plan": keyword_quotas,
         }
 
+    def _start_deep_ingest(self, keywords: List[str], keyword_budget=None):
+        """
+        在后台循环中启动深度爬取的流式入库管道
+
+        Returns:
+            (ThreadFeed, 管道运行结果的 Future)
+        """
+        from src.crawler.background_loop import background_event_loop, submit_async
+        from src.crawler.keyword_budget import RISKY_LEVELS
+        from src.crawler.streaming_pipeline import StreamingPipeline, ThreadFeed
+
+        def normalize(item: Dict) -> Optional[Dict]:
+            prepared = self._prepare_deep_item(item, keywords)
+            if prepared is not None:
+                # 产出按 (平台, 关键词) 归属，随条目带到写入之后（死信重放时同样保留）
+                prepared["yield_key"] = [item["source"], item.get("source_keyword") or ""]
+            return prepared
+
+        on_written = None
+        if keyword_budget is not None:
+            def on_written(pairs: List) -> None:
+                for item, analysis in pairs:
+                    platform, keyword = item.get("yield_key") or (None, None)
+                    if platform is None:
+                        continue
+                    keyword_budget.record(
+                        platform, keyword,
+                        new=1,
+                        campus=int(self.is_campus_related(item["content"])),
+                        risky=int(analysis["risk_level"] in RISKY_LEVELS),
+                    )
+
+        pipeline = StreamingPipeline(
+            normalize=normalize,
+            on_written=on_written,
+            dead_letter_state=DEEP_DEAD_LETTER_STATE,
+        )
+        feed = ThreadFeed(background_event_loop())
+        ingest = submit_async(pipeline.run(feed))
+        # 管道异常结束后不再接收条目，阻塞中的投递立即失败，由爬取侧下次重新读取
+        ingest.add_done_callback(lambda _: feed.stop())
+        return feed, ingest
+
+    @classmethod
+    def record_keyword_yield(cls, budget, items: List[Dict]) -> None:
+        """
+        按 (平台, 关键词) 记录已导入条目的产出
+
+        items 为经过 _import_deep_crawl_to_database 的归一化条目：
+        真正新入库的条目带有 risk_level，查重跳过的没有。
+        """
+        from src.crawler.keyword_budget import RISKY_LEVELS
+
+        for item in items:
+            risk_level = item.get("risk_level")
+            is_new = risk_level is not None
+            budget.record(
+                item["source"],
+                item.get("source_keyword") or "",
+                fetched=1,
+                new=int(is_new),
+                campus=int(is_new and cls.is_campus_related(item["content"])),
+                risky=int(is_new and risk_level in RISKY_LEVELS),
+            )
+
     def _import_deep_crawl_to_database(
-        self, items: List[Dict], keywords: List[str]
+        self,
+        items: List[Dict],
+        keywords: List[str],
+        commit_size: int = DEFAULT_COMMIT_SIZE,
     ) -> Dict:
         """
         将深度爬取的结构化数据导入 MySQL
-        每条记录做情感分析 + 风险评估后入库
+        每条记录做情感分析 + 风险评估后，由 BulkImporter 分批写入
         """
-        from src.database.connection import SessionLocal
-        from src.database.models import (
-            SentimentRecord, DataSource, SentimentType, RiskLevel,
-            Alert, AlertStatus,
+        pairs = [(item, self._prepare_deep_item(item, keywords)) for item in items]
+        pairs = [(item, p) for item, p in pairs if p is not None]
+
+        result = BulkImporter(commit_size=commit_size).import_items([p for _, p in pairs])
+        # 新入库条目的风险等级回写到归一化条目上（查重跳过的没有），供产出统计使用
+        for item, p in pairs:
+            if "risk_level" in p:
+                item["risk_level"] = p["risk_level"]
+        if not result["success"]:
+            logger.error(f"[Pipeline] 深度爬取导入失败: {result['error']}")
+            return {"success": False, "error": result["error"]}
+
+        logger.info(
+            f"[Pipeline] 深度爬取导入完成: {result['imported']} 条, "
+            f"跳过重复 {result['skipped_duplicates']} 条, "
+            f"并入近重复簇 {result['near_duplicates']} 条, 预警 {result['alerts_created']} 条"
         )
-        from src.sentiment.fast_analyzer import analyze_text
+        return {
+            "success": True,
+            "imported": result["imported"],
+            "skipped_duplicates": result["skipped_duplicates"],
+            "near_duplicates": result["near_duplicates"],
+            "alerts_created": result["alerts_created"],
+        }
+
+    # ─────── 条目归一化（批量导入与流式管道共用） ───────
+
+    @staticmethod
+    def _prepare_news_item(item: Dict, keywords: Optional[List[str]] = None) -> Optional[Dict]:
+        """热点新闻条目 → BulkImporter 入库条目，标题过短返回 None"""
+        from src.database.models import DataSource
+
+        SOURCE_MAP = {
+            "weibo": DataSource.WEIBO,
+            "zhihu": DataSource.FORUM,
+            "bilibili-hot-search": DataSource.OTHER,
+            "toutiao": DataSource.OTHER,
+            "douyin": DataSource.OTHER,
+            "tieba": DataSource.FORUM,
+            "coolapk": DataSource.OTHER,
+            "thepaper": DataSource.OTHER,
+        }
+
+        title = item.get("title", "").strip()
+        if not title or len(title) < 4:
+            return None
+
+        source_id = item.get("source", "other")
+        return {
+            "content": title,
+            "source": SOURCE_MAP.get(source_id, DataSource.OTHER),
+            "author_id": item.get("id", ""),
+            "fallback_topic": keywords[0] if keywords else None,
+            "keywords": keywords[:5] if keywords else None,
+        }
+
+    @staticmethod
+    def _prepare_deep_item(item: Dict, keywords: Optional[List[str]] = None) -> Optional[Dict]:
+        """深度爬取归一化条目 → BulkImporter 入库条目，内容过短返回 None"""
+        from src.database.models import DataSource
         from src.crawler.deep_crawler import PLATFORM_TO_DATASOURCE
 
         SOURCE_MAP = {
@@ -338,172 +437,302 @@ class CrawlerPipeline:
             "FORUM": DataSource.FORUM,
             "OTHER": DataSource.OTHER,
         }
-        SENTIMENT_MAP = {
-            "positive": SentimentType.POSITIVE,
-            "negative": SentimentType.NEGATIVE,
-            "neutral": SentimentType.NEUTRAL,
-        }
-        RISK_MAP = {
-            "low": RiskLevel.LOW,
-            "medium": RiskLevel.MEDIUM,
-            "high": RiskLevel.HIGH,
-            "critical": RiskLevel.CRITICAL,
+
+        content = item.get("content", "").strip()
+        if not content or len(content) < 4:
+            return None
+
+        plat_code = item.get("source", "other")
+        ds_key = PLATFORM_TO_DATASOURCE.get(plat_code, "OTHER")
+        return {
+            "content": content[:500],
+            "source": SOURCE_MAP.get(ds_key, DataSource.OTHER),
+            "author_id": item.get("id", ""),
+            "fallback_topic": (
+                item.get("source_keyword") or (keywords[0] if keywords else "")
+            ),
+            "keywords": keywords[:5] if keywords else None,
         }
 
+    # ─────── 补充分析已入库但未分析的记录 ───────
+
+    def analyze_pending_records(
+        self,
+        batch_size: int = 500,
+        drain: bool = False,
+        workers: int = 1,
+        resume: bool = True,
+    ) -> Dict:
+        """
+        扫描数据库中 sentiment 为 NULL 的记录，对原始内容补充情感/风险分析。
+        不修改原始内容，只填充分析结果字段。
+
+        默认只处理一批（batch_size 条）。drain=True 时按 id 键集分页，
+        只加载 id 和 content，逐批分析、批量 UPDATE 并提交，直到积压清空；
+        每批提交后写入检查点，崩溃重启后（resume=True）从上次的 id 继续。
+
+        同一时间只允许一个补充分析运行（跨进程锁），已有运行时返回 busy=True。
+        每批在回写前重新锁定仍未分析的行，UPDATE 也只改 sentiment 仍为 NULL 的行，
+        预警只为本次实际回写的记录创建，重复调用或与其他写入方重叠都不会重复分析、重复预警。
+
+        Args:
+            batch_size: 每批处理条数
+            drain: 是否持续处理直到没有待分析记录
+            workers: 分析进程数，>1 时使用进程池并行分析
+            resume: drain 模式下是否从检查点恢复
+        """
+        from src.database.connection import SessionLocal
+        from src.database.models import SentimentRecord, SentimentType, RiskLevel, Alert
+        from src.crawler.state_store import (
+            load_state, save_state, clear_state, acquire_lock, release_lock, refresh_lock,
+        )
+        from src.services.record_terms import replace_record_terms
+        from src.services.response_cache import bump_data_version
+        from src.services.stats_rollup import mark_records_dirty
+
+        if not acquire_lock(PENDING_LOCK, stale_seconds=PENDING_LOCK_STALE_SECONDS):
+            return {"success": False, "busy": True, "analyzed": 0, "error": "已有补充分析任务在运行"}
+
+        table = SentimentRecord.__table__
+        update_stmt = self._pending_update_statement(table)
+
+        checkpoint = load_state(PENDING_CHECKPOINT) if (drain and resume) else {}
+        last_id = checkpoint.get("last_id", 0)
+        resumed_from = last_id
+
         session = SessionLocal()
-        imported = 0
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        analyzed = 0
         alerts_created = 0
+        batches = 0
 
         try:
-            for item in items:
-                content = item.get("content", "").strip()
-                if not content or len(content) < 4:
-                    continue
-
-                plat_code = item.get("source", "other")
-                ds_key = PLATFORM_TO_DATASOURCE.get(plat_code, "OTHER")
-                db_source = SOURCE_MAP.get(ds_key, DataSource.OTHER)
-
-                analysis = analyze_text(content)
-                detected_topic = analysis["main_topic"]
-                if not detected_topic or detected_topic in ("其他",):
-                    kw = item.get("source_keyword") or (keywords[0] if keywords else "")
-                    detected_topic = kw
-
-                record = SentimentRecord(
-                    content=content[:500],
-                    source=db_source,
-                    author_id=item.get("id", ""),
-                    sentiment=SENTIMENT_MAP.get(
-                        analysis["sentiment"], SentimentType.NEUTRAL
-                    ),
-                    emotions=analysis["emotions"],
-                    sentiment_confidence=analysis["sentiment_confidence"],
-                    main_topic=detected_topic,
-                    keywords=keywords[:5] if keywords else None,
-                    risk_level=RISK_MAP.get(
-                        analysis["risk_level"], RiskLevel.LOW
-                    ),
-                    risk_indicators=analysis["risk_indicators"],
-                    risk_confidence=analysis["risk_confidence"],
-                    suggested_actions=analysis["suggested_actions"],
-                    created_at=datetime.now(),
-                    analyzed_at=datetime.now(),
+            while True:
+                rows = session.execute(
+                    select(table.c.id, table.c.content, table.c.created_at)
+                    .where(table.c.sentiment.is_(None), table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                scanned_to = rows[-1].id
+
+                analyses = self._analyze_contents(
+                    [row.content or "" for row in rows], pool, workers
                 )
-                session.add(record)
-                session.flush()
-                imported += 1
-
-                if analysis["risk_level"] in ("high", "critical"):
-                    alert = Alert(
-                        record_id=record.id,
-                        alert_type="risk",
-                        risk_level=RISK_MAP[analysis["risk_level"]],
-                        status=AlertStatus.ACTIVE,
-                        title=f"[{analysis['risk_level'].upper()}] {content[:50]}",
-                        description=(
-                            f"风险指标: {', '.join(analysis['risk_indicators'])}"
-                        ),
-                        ai_suggestion="; ".join(analysis["suggested_actions"]),
+                now = datetime.now()
+
+                # 分析期间可能已有其他写入方回写：锁定仍未分析的行，只回写与预警这些行
+                claimed = set(session.execute(
+                    select(table.c.id)
+                    .where(table.c.id.in_([row.id for row in rows]), table.c.sentiment.is_(None))
+                    .with_for_update()
+                ).scalars())
+                pairs = [(row, analysis) for row, analysis in zip(rows, analyses) if row.id in claimed]
+
+                if pairs:
+                    session.execute(update_stmt, [
+                        {
+                            "b_id": row.id,
+                            "b_sentiment": SentimentType(analysis["sentiment"]),
+                            "b_emotions": analysis["emotions"],
+                            "b_sentiment_confidence": analysis["sentiment_confidence"],
+                            "b_risk_level": RiskLevel(analysis["risk_level"]),
+                            "b_risk_indicators": analysis["risk_indicators"],
+                            "b_risk_confidence": analysis["risk_confidence"],
+                            "b_suggested_actions": analysis["suggested_actions"],
+                            "b_main_topic": analysis["main_topic"],
+                            "b_analyzed_at": now,
+                        }
+                        for row, analysis in pairs
+                    ])
+                    replace_record_terms(
+                        session,
+                        [row.id for row, _ in pairs],
+                        [
+                            {"created_at": row.created_at, "emotions": analysis["emotions"]}
+                            for row, analysis in pairs
+                        ],
                     )
-                    session.add(alert)
-                    alerts_created += 1
+                    mark_records_dirty(session, [row.id for row, _ in pairs])
+
+                alert_rows = [
+                    build_alert_row(row.id, row.content or "", analysis, now)
+                    for row, analysis in pairs
+                    if analysis["risk_level"] in ALERT_RISK_LEVELS
+                ]
+                if alert_rows:
+                    session.execute(insert(Alert.__table__), alert_rows)
+
+                session.commit()
+                if pairs:
+                    bump_data_version()
+                refresh_lock(PENDING_LOCK)
+
+                last_id = scanned_to
+                analyzed += len(pairs)
+                alerts_created += len(alert_rows)
+                batches += 1
+
+                if not drain:
+                    break
+                save_state(PENDING_CHECKPOINT, {
+                    "last_id": last_id,
+                    "analyzed": checkpoint.get("analyzed", 0) + analyzed,
+                    "updated_at": now.isoformat(),
+                })
+                logger.info(f"[Pipeline] 补充分析进度: 已处理 {analyzed} 条, 当前 id={last_id}")
+
+            if drain:
+                clear_state(PENDING_CHECKPOINT)
+
+            if analyzed == 0:
+                return {"success": True, "analyzed": 0, "message": "没有待分析的记录"}
 
-            session.commit()
-            logger.info(
-                f"[Pipeline] 深度爬取导入完成: {imported} 条, "
-                f"预警 {alerts_created} 条"
-            )
+            logger.info(f"[Pipeline] 补充分析 {analyzed} 条记录, 创建 {alerts_created} 条预警")
             return {
                 "success": True,
-                "imported": imported,
+                "analyzed": analyzed,
                 "alerts_created": alerts_created,
+                "batches": batches,
+                "last_id": last_id,
+                "resumed_from": resumed_from,
             }
         except Exception as e:
             session.rollback()
-            logger.error(f"[Pipeline] 深度爬取导入失败: {e}")
-            return {"success": False, "error": str(e)}
+            logger.error(f"[Pipeline] 补充分析失败: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "analyzed": analyzed,
+                "last_id": last_id,
+            }
         finally:
+            if pool is not None:
+                pool.shutdown()
             session.close()
+            release_lock(PENDING_LOCK)
+
+    @staticmethod
+    def _pending_update_statement(table):
+        """按 id 批量回写分析结果的 UPDATE（executemany），只改 sentiment 仍为 NULL 的行，main_topic 仅在为空时填充"""
+        columns = [
+            "sentiment", "emotions", "sentiment_confidence", "risk_level",
+            "risk_indicators", "risk_confidence", "suggested_actions", "analyzed_at",
+        ]
+        values = {
+            col: bindparam(f"b_{col}", type_=table.c[col].type) for col in columns
+        }
+        values["main_topic"] = func.coalesce(
+            func.nullif(table.c.main_topic, ""),
+            bindparam("b_main_topic", type_=table.c.main_topic.type),
+        )
+        return update(table).where(
+            table.c.id == bindparam("b_id"), table.c.sentiment.is_(None)
+        ).values(**values)
 
-    # ─────── 补充分析已入库但未分析的记录 ───────
+    @staticmethod
+    def _analyze_contents(contents: List[str], pool, workers: int) -> List[Dict]:
+        """快速分析一批文本；提供进程池时按连续分片并行"""
+        from src.sentiment.fast_analyzer import analyze_batch
+
+        if pool is None or len(contents) < workers * 2:
+            return analyze_batch(contents)
+        size = -(-len(contents) // workers)
+        parts = [contents[i:i + size] for i in range(0, len(contents), size)]
+        return [a for part in pool.map(analyze_batch, parts) for a in part]
+
+    # ─────── 补充分析后台任务 ───────
 
-    def analyze_pending_records(self, batch_size: int = 500) -> Dict:
+    @classmethod
+    def start_pending_analysis(cls, **kwargs) -> bool:
         """
-        扫描数据库中 sentiment 为 NULL 的记录，对原始内容补充情感/风险分析。
-        不修改原始内容，只填充分析结果字段。
+        在后台线程中执行 analyze_pending_records(**kwargs)，立即返回；
+        本进程已有一个在运行时返回 False。进度与结果见 pending_analysis_status
         """
-        from src.database.connection import SessionLocal
-        from src.database.models import (
-            SentimentRecord, SentimentType, RiskLevel, Alert, AlertStatus
-        )
-        from src.sentiment.fast_analyzer import analyze_text
-
-        session = SessionLocal()
-        SENTIMENT_MAP = {
-            "positive": SentimentType.POSITIVE,
-            "negative": SentimentType.NEGATIVE,
-            "neutral": SentimentType.NEUTRAL,
-        }
-        RISK_MAP = {
-            "low": RiskLevel.LOW,
-            "medium": RiskLevel.MEDIUM,
-            "high": RiskLevel.HIGH,
-            "critical": RiskLevel.CRITICAL,
-        }
+        with _pending_job_lock:
+            if _pending_job.get("running"):
+                return False
+            _pending_job.clear()
+            _pending_job.update(running=True, started_at=datetime.now().isoformat(), params=kwargs)
+        threading.Thread(
+            target=cls._run_pending_job, kwargs=kwargs, name="analyze-pending", daemon=True
+        ).start()
+        return True
 
+    @classmethod
+    def _run_pending_job(cls, **kwargs) -> None:
         try:
-            pending = (
-                session.query(SentimentRecord)
-                .filter(SentimentRecord.sentiment.is_(None))
-                .limit(batch_size)
-                .all()
-            )
+            result = cls().analyze_pending_records(**kwargs)
+        except Exception as e:
+            logger.error(f"[Pipeline] 后台补充分析失败: {e}")
+            result = {"success": False, "error": str(e)}
+        with _pending_job_lock:
+            _pending_job.update(running=False, finished_at=datetime.now().isoformat(), result=result)
 
-            if not pending:
-                return {"success": True, "analyzed": 0, "message": "没有待分析的记录"}
+    @staticmethod
+    def pending_analysis_status() -> Dict:
+        """后台补充分析的状态: {running, started_at, finished_at, params, result, checkpoint}"""
+        from src.crawler.state_store import load_state
 
-            analyzed = 0
-            alerts_created = 0
-            for record in pending:
-                analysis = analyze_text(record.content or "")
-
-                record.sentiment = SENTIMENT_MAP.get(analysis["sentiment"], SentimentType.NEUTRAL)
-                record.emotions = analysis["emotions"]
-                record.sentiment_confidence = analysis["sentiment_confidence"]
-                record.risk_level = RISK_MAP.get(analysis["risk_level"], RiskLevel.LOW)
-                record.risk_indicators = analysis["risk_indicators"]
-                record.risk_confidence = analysis["risk_confidence"]
-                record.suggested_actions = analysis["suggested_actions"]
-                record.analyzed_at = datetime.now()
-
-                if not record.main_topic:
-                    record.main_topic = analysis["main_topic"]
-
-                if analysis["risk_level"] in ("high", "critical"):
-                    alert = Alert(
-                        record_id=record.id,
-                        alert_type="risk",
-                        risk_level=RISK_MAP[analysis["risk_level"]],
-                        status=AlertStatus.ACTIVE,
-                        title=f"[{analysis['risk_level'].upper()}] {(record.content or '')[:50]}",
-                        description=f"风险指标: {', '.join(analysis['risk_indicators'])}",
-                        ai_suggestion="; ".join(analysis["suggested_actions"]),
-                    )
-                    session.add(alert)
-                    alerts_created += 1
+        with _pending_job_lock:
+            status = {"running": False, **_pending_job}
+        status["checkpoint"] = load_state(PENDING_CHECKPOINT) or None
+        return status
 
-                analyzed += 1
+    # ─────── 流式采集入库 ───────
 
-            session.commit()
-            logger.info(f"[Pipeline] 补充分析 {analyzed} 条记录, 创建 {alerts_created} 条预警")
-            return {"success": True, "analyzed": analyzed, "alerts_created": alerts_created}
-        except Exception as e:
-            session.rollback()
-            logger.error(f"[Pipeline] 补充分析失败: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            session.close()
+    async def run_streaming_ingest(
+        self,
+        news_sources: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        campus_priority: bool = False,
+        only_new: bool = False,
+        consumer: str = "stream_ingest",
+        concurrency: Optional[Dict[str, int]] = None,
+        queue_size: int = 500,
+        batch_size: int = 200,
+        analyze_workers: int = 2,
+    ) -> Dict:
+        """
+        边采集边入库：每个新闻源返回后立即进入 归一化 → 校园过滤 → 去重 → 分析 → 写库 → 预警
+        的流式管道，不等全部新闻源采集完成
+
+        only_new=True 时只处理 consumer 上一轮轮询之后新出现的条目（见 NewsCollector.collect_news）
+
+        Returns:
+            StreamingPipeline.run 的统计结果（含各阶段并发、吞吐与队列深度）
+        """
+        from src.crawler.streaming_pipeline import StreamingPipeline
+
+        pipeline = StreamingPipeline(
+            normalize=lambda item: self._prepare_news_item(item, keywords),
+            campus_filter=self.is_campus_related,
+            concurrency=concurrency,
+            queue_size=queue_size,
+            batch_size=batch_size,
+            analyze_workers=analyze_workers,
+        )
+        source = self.news_collector.iter_news(
+            sources=news_sources, campus_priority=campus_priority,
+            only_new=only_new, consumer=consumer,
+        )
+        return await pipeline.run(source)
+
+    async def _stream_import_news(self, news_list: List[Dict], keywords: Optional[List[str]]) -> Dict:
+        """已采集的新闻列表经流式管道入库，返回 StreamingPipeline.run 的统计结果"""
+        from src.crawler.streaming_pipeline import StreamingPipeline
+
+        async def source():
+            for item in news_list:
+                yield item
+
+        pipeline = StreamingPipeline(
+            normalize=lambda item: self._prepare_news_item(item, keywords),
+            campus_filter=self.is_campus_related,
+        )
+        return await pipeline.run(source())
 
     # ─────── 完整流程 ───────
 
@@ -517,7 +746,10 @@ class CrawlerPipeline:
         运行完整的数据采集管道
         1. 采集热点新闻（只采集一次）
         2. AI 话题提取
-        3. (可选) 导入数据库（复用同一批新闻数据）
+        3. (可选) 同一批新闻经流式管道 校园过滤 → 去重 → 分析 → 写库 → 预警 入库
+
+        入库条目以提取出的搜索词作为兜底话题与关键词，须等话题提取完成后才能开始归一化，
+        因此采集阶段不与入库重叠；分析（进程池）与写库仍在管道中并行流水
         """
         extract_result = await self.run_topic_extraction(news_sources, max_keywords)
 
@@ -525,17 +757,14 @@ class CrawlerPipeline:
             return extract_result
 
         import_result = None
+        news_list = extract_result.pop("_news_list", [])
         if import_to_db:
-            news_list = extract_result.pop("_news_list", [])
             if news_list:
-                import_result = self.import_news_to_database(
-                    news_list,
-                    extract_result.get("search_keywords"),
+                import_result = await self._stream_import_news(
+                    news_list, extract_result.get("search_keywords"),
                 )
             else:
                 import_result = {"success": False, "error": "无可导入的新闻数据"}
-        else:
-            extract_result.pop("_news_list", None)
 
         extract_result["import_result"] = import_result
         return extract_result
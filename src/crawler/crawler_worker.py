@@ -0,0 +1,284 @@
+# src/crawler/crawler_worker.py
+"""
+常驻爬虫工作进程管理 - 每个平台一个保持浏览器与登录态的 MediaCrawler 进程
+
+一次性运行（DeepCrawler.run_crawler）每次都要启动解释器、Playwright、Chromium 并恢复登录，
+首次搜索前就要几十秒。常驻工作进程只在第一次任务时付出这部分开销，
+之后的任务经本地 IPC 下发（见 mediacrawler_worker.py），结果仍按增量读取 JSON 输出的方式流式返回。
+适合调度器频繁执行的小规模关键词爬取。
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import Listener
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+from src.crawler.deep_crawler import (
+    DeepCrawler, MEDIACRAWLER_DIR, SUPPORTED_PLATFORMS, CDP_BASE_PORT,
+    _RecordCollector, _open_tailer,
+)
+
+logger = logging.getLogger(__name__)
+
+WORKER_PATH = Path(__file__).parent / "mediacrawler_worker.py"
+AUTHKEY_ENV = "MEDIACRAWLER_WORKER_AUTHKEY"
+
+# 常驻进程的 CDP 端口与一次性运行错开，两种方式同时爬取同一平台时互不冲突
+WORKER_CDP_OFFSET = 100
+
+
+class CrawlerWorker:
+    """
+    单个平台的常驻 MediaCrawler 进程，同一时间只执行一个任务
+
+    Args:
+        platform: 平台代码
+        headless: 是否无头模式（首次登录建议 False 以便扫码）
+        startup_timeout: 启动并完成登录的最长等待秒数
+    """
+
+    def __init__(self, platform: str, headless: bool = True, startup_timeout: int = 600):
+        if platform not in SUPPORTED_PLATFORMS:
+            raise ValueError(f"不支持的平台: {platform}")
+        self.platform = platform
+        self.headless = headless
+        self.startup_timeout = startup_timeout
+        self.jobs_done = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._conn = None
+        self._run_dir: Optional[Path] = None
+        self._job_seq = 0
+        self._lock = threading.RLock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None and self._conn is not None
+
+    # ─────── 生命周期 ───────
+
+    def start(self) -> float:
+        """启动工作进程并等待其完成登录，返回启动耗时（秒）"""
+        started = time.monotonic()
+        self._run_dir = DeepCrawler._prepare_run_config(
+            self.platform, ["placeholder"], headless=self.headless,
+            cdp_port=CDP_BASE_PORT + WORKER_CDP_OFFSET + list(SUPPORTED_PLATFORMS).index(self.platform),
+        )
+        authkey = os.urandom(16)
+        listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        host, port = listener.address
+
+        creation_flags = 0
+        if sys.platform == "win32":
+            creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
+
+        log = open(self._run_dir / "worker.log", "w", encoding="utf-8")
+        self._proc = subprocess.Popen(
+            [sys.executable, str(WORKER_PATH), str(self._run_dir), host, str(port)],
+            cwd=str(MEDIACRAWLER_DIR),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, AUTHKEY_ENV: authkey.hex()},
+            creationflags=creation_flags,
+        )
+        log.close()
+
+        try:
+            # Listener.accept 没有超时参数，放在线程里等待
+            accepted = []
+            acceptor = threading.Thread(
+                target=lambda: accepted.append(listener.accept()), daemon=True
+            )
+            acceptor.start()
+            acceptor.join(self.startup_timeout)
+            if not accepted:
+                raise RuntimeError("工作进程未能连接")
+            self._conn = accepted[0]
+
+            deadline = started + self.startup_timeout
+            while not self._conn.poll(1.0):
+                if self._proc.poll() is not None:
+                    raise RuntimeError(f"工作进程已退出 (code={self._proc.returncode})")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"等待登录超时 ({self.startup_timeout}s)")
+            msg = self._conn.recv()
+            if msg.get("type") != "ready":
+                raise RuntimeError(f"意外的启动消息: {msg}")
+        except Exception as e:
+            logger.error(f"[CrawlerWorker] {self.platform} 启动失败: {e}\n{self.log_tail()}")
+            self.stop()
+            raise
+        finally:
+            listener.close()
+
+        elapsed = time.monotonic() - started
+        logger.info(f"[CrawlerWorker] {self.platform} 工作进程已就绪 (pid={self._proc.pid}, {elapsed:.1f}s)")
+        return elapsed
+
+    def stop(self, timeout: float = 30) -> None:
+        """通知工作进程退出（关闭浏览器），超时则强制结束；有任务在执行时等待其完成"""
+        with self._lock:
+            self._shutdown(timeout)
+
+    def _shutdown(self, timeout: float) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send({"type": "shutdown"})
+            except (OSError, EOFError):
+                pass
+        if self._proc is not None and self._proc.poll() is None:
+            try:
+                self._proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        if self._conn is not None:
+            self._conn.close()
+        if self._run_dir is not None:
+            shutil.rmtree(self._run_dir, ignore_errors=True)
+        self._proc = None
+        self._conn = None
+        self._run_dir = None
+
+    def log_tail(self, chars: int = 1000) -> str:
+        if self._run_dir is None:
+            return ""
+        try:
+            return (self._run_dir / "worker.log").read_text(encoding="utf-8", errors="replace")[-chars:]
+        except OSError:
+            return ""
+
+    # ─────── 任务执行 ───────
+
+    def run_job(
+        self,
+        keywords: List[str],
+        max_notes: int = 20,
+        enable_comments: bool = True,
+        timeout: int = 3600,
+        on_items: Optional[Callable[[str, List[Dict]], None]] = None,
+        poll_interval: float = 3.0,
+    ) -> Dict:
+        """
+        下发一个搜索任务并等待完成，返回结构与 DeepCrawler.run_crawler 相同
+
+        任务进行中按 poll_interval 增量读取输出文件，新记录交给 on_items。
+        超时或进程异常退出时结束工作进程，下次任务重新启动。
+        """
+        with self._lock:
+            start_time = datetime.now()
+            startup_seconds = 0.0
+            reused = self.alive
+            tailer = _open_tailer(self.platform, DeepCrawler._json_dirs(self.platform), start_time)
+            collector = _RecordCollector(self.platform, on_items)
+
+            try:
+                if not reused:
+                    self.stop()
+                    startup_seconds = self.start()
+
+                self._job_seq += 1
+                job_id = self._job_seq
+                self._conn.send({
+                    "type": "job",
+                    "job_id": job_id,
+                    "keywords": keywords,
+                    "max_notes": max_notes,
+                    "enable_comments": enable_comments,
+                })
+
+                deadline = time.monotonic() + timeout
+                msg = None
+                while msg is None:
+                    if self._conn.poll(poll_interval):
+                        reply = self._conn.recv()
+                        if reply.get("type") == "done" and reply.get("job_id") == job_id:
+                            msg = reply
+                        continue
+                    collector.add(tailer.poll())
+                    if self._proc.poll() is not None:
+                        raise RuntimeError(f"工作进程已退出 (code={self._proc.returncode})")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"爬取超时 ({timeout}s)")
+
+                collector.add(tailer.poll(final=True))
+                collector.commit(tailer)
+                self.jobs_done += 1
+
+            except Exception as e:
+                logger.error(f"[CrawlerWorker] {self.platform} 任务失败: {e}")
+                collector.add(tailer.poll(final=True))
+                collector.commit(tailer)
+                error_tail = self.log_tail()
+                self.stop(timeout=5)
+                return {
+                    "success": False,
+                    "platform": self.platform,
+                    "error": str(e),
+                    "stdout_tail": error_tail,
+                    "items": collector.items,
+                    "items_count": collector.count,
+                    "worker_reused": reused,
+                }
+
+            duration = (datetime.now() - start_time).total_seconds()
+            if not msg["success"]:
+                logger.error(f"[CrawlerWorker] {self.platform} 爬取失败: {msg.get('error')}")
+            else:
+                logger.info(
+                    f"[CrawlerWorker] {self.platform} 任务完成: {collector.count} 条内容, "
+                    f"耗时 {duration:.1f}s（{'复用' if reused else '新启动'}工作进程）"
+                )
+            stats = {
+                "success": msg["success"],
+                "platform": self.platform,
+                "platform_name": SUPPORTED_PLATFORMS[self.platform],
+                "keywords_count": len(keywords),
+                "items_count": collector.count,
+                "skipped_seen": collector.skipped_seen,
+                "items": collector.items,
+                "duration_seconds": round(duration, 1),
+                "startup_seconds": round(startup_seconds, 1),
+                "first_items_after_seconds": collector.first_after(start_time),
+                "worker_reused": reused,
+                "started_at": start_time.isoformat(),
+            }
+            if not msg["success"]:
+                stats["error"] = msg.get("error")
+            return stats
+
+
+# ─────── 进程注册表 ───────
+
+_workers: Dict[str, CrawlerWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def get_crawler_worker(platform: str, headless: bool = True) -> CrawlerWorker:
+    """获取平台的常驻工作进程（无头模式设置变化时替换为新进程）"""
+    with _workers_lock:
+        worker = _workers.get(platform)
+        if worker is not None and worker.headless != headless:
+            worker.stop()
+            worker = None
+        if worker is None:
+            worker = CrawlerWorker(platform, headless=headless)
+            _workers[platform] = worker
+        return worker
+
+
+def stop_crawler_workers() -> None:
+    """结束所有常驻工作进程（应用关闭时调用）"""
+    with _workers_lock:
+        for worker in _workers.values():
+            try:
+                worker.stop()
+            except Exception as e:
+                logger.warning(f"[CrawlerWorker] 结束 {worker.platform} 工作进程失败: {e}")
+        _workers.clear()
+
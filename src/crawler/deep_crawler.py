@@ -8,18 +8,31 @@
 """
 import sys
 import os
-import json
+import shutil
 import subprocess
+import tempfile
+import time
 import glob as globmod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import logging
 
+from src.crawler.output_tailer import JsonOutputTailer
+from src.crawler.seen_index import SeenIdIndex
+from src.crawler.state_store import load_state, save_state
+
 logger = logging.getLogger(__name__)
 
 MEDIACRAWLER_DIR = Path(__file__).parent / "MediaCrawler"
 
+# 以独立配置目录启动 MediaCrawler 的入口（见 mediacrawler_launcher.py）
+LAUNCHER_PATH = Path(__file__).parent / "mediacrawler_launcher.py"
+
+# 并行爬取时每个平台使用不同的 CDP 调试端口，避免浏览器实例冲突
+CDP_BASE_PORT = 9222
+
 SUPPORTED_PLATFORMS = {
     "wb":    "微博",
     "zhihu": "知乎",
@@ -50,6 +63,92 @@ PLATFORM_TO_DATA_DIR = {
 }
 
 
+def _record_id(item: Dict) -> Optional[str]:
+    item_id = item.get("note_id") or item.get("aweme_id") or item.get("id")
+    return str(item_id) if item_id else None
+
+
+def _offsets_state(platform: str) -> str:
+    """平台输出文件已读偏移的状态名（state_store）"""
+    return f"deep_offsets_{platform}"
+
+
+def _open_tailer(platform: str, json_dirs: List[Path], start_time: datetime) -> JsonOutputTailer:
+    """从上次运行保存的偏移继续读取该平台的输出文件"""
+    return JsonOutputTailer(
+        json_dirs,
+        offsets=load_state(_offsets_state(platform)),
+        dates=[start_time.strftime("%Y-%m-%d")],
+    )
+
+
+class _RecordCollector:
+    """
+    按 ID 去重爬取记录；有回调时逐批交给回调，否则累积到 items
+
+    去重同时参考本次运行和持久化的已处理 ID 索引（SeenIdIndex），
+    同一天多次爬取时只有真正新出现的内容会被交出。
+    """
+
+    def __init__(self, platform: str, on_items: Optional[Callable[[str, List[Dict]], None]] = None):
+        self.platform = platform
+        self.on_items = on_items
+        self.items: List[Dict] = []
+        self.count = 0
+        self.skipped_seen = 0
+        self.failed = False
+        self.first_at: Optional[datetime] = None
+        self._seen = set()
+        self._index = SeenIdIndex(f"deep_seen_{platform}")
+
+    def add(self, records: List[Dict]) -> None:
+        fresh = []
+        fresh_ids = []
+        for item in records:
+            item_id = _record_id(item)
+            if item_id is not None:
+                if item_id in self._seen:
+                    continue
+                self._seen.add(item_id)
+                if item_id in self._index:
+                    self.skipped_seen += 1
+                    continue
+                fresh_ids.append(item_id)
+            fresh.append(item)
+        if not fresh:
+            return
+
+        self.count += len(fresh)
+        if self.first_at is None:
+            self.first_at = datetime.now()
+        if self.on_items is None:
+            self.items.extend(fresh)
+        else:
+            try:
+                self.on_items(self.platform, fresh)
+            except Exception as e:
+                # 不记入已处理索引，也不推进文件偏移，下次运行重新读取
+                self.failed = True
+                logger.error(f"[DeepCrawler] {self.platform} 处理增量数据失败: {e}")
+                return
+        for item_id in fresh_ids:
+            self._index.add(item_id)
+
+    def commit(self, tailer: JsonOutputTailer) -> None:
+        """保存跨运行进度：已处理 ID 索引总是保存；回调失败过则保留旧偏移，留给下次重读"""
+        try:
+            self._index.save()
+            if not self.failed:
+                save_state(_offsets_state(self.platform), tailer.offsets)
+        except OSError as e:
+            logger.warning(f"[DeepCrawler] {self.platform} 保存爬取进度失败: {e}")
+
+    def first_after(self, start: datetime) -> Optional[float]:
+        if self.first_at is None:
+            return None
+        return round((self.first_at - start).total_seconds(), 1)
+
+
 class DeepCrawler:
     """
     深度爬虫管理器
@@ -83,24 +182,33 @@ class DeepCrawler:
         "HEADLESS":            lambda p, **_: f'HEADLESS = {p["headless"]}',
         "CDP_HEADLESS":        lambda p, **_: f'CDP_HEADLESS = {p["headless"]}',
         "ENABLE_CDP_MODE":     lambda **_: "ENABLE_CDP_MODE = True",
+        "CDP_DEBUG_PORT":      lambda p, **_: f'CDP_DEBUG_PORT = {p["cdp_port"]}',
     }
 
     @staticmethod
-    def _write_base_config(
+    def _prepare_run_config(
         platform: str,
         keywords: List[str],
         max_notes: int = 20,
         enable_comments: bool = True,
         headless: bool = True,
-    ):
+        cdp_port: Optional[int] = None,
+    ) -> Path:
         """
-        动态生成 MediaCrawler 的 base_config.py
+        为本次运行生成独立的配置目录，返回 run_dir
 
-        安全地处理多行赋值（如 ``VAR = (\\n  value\\n)``），
-        避免只替换首行而遗留尾行导致 SyntaxError。
+        run_dir/config 是 MediaCrawler/config 的副本，其中 base_config.py 按本次参数改写；
+        子进程通过 mediacrawler_launcher 优先导入它，原始配置文件保持不变。
+        cdp_port 默认按平台分配（CDP_BASE_PORT + 平台序号）。
         """
-        cfg_path = MEDIACRAWLER_DIR / "config" / "base_config.py"
-        original = cfg_path.read_text(encoding="utf-8")
+        if cdp_port is None:
+            cdp_port = CDP_BASE_PORT + list(SUPPORTED_PLATFORMS).index(platform)
+        run_dir = Path(tempfile.mkdtemp(prefix=f"mediacrawler_{platform}_"))
+        shutil.copytree(
+            MEDIACRAWLER_DIR / "config",
+            run_dir / "config",
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
 
         params = {
             "platform": platform,
@@ -108,8 +216,28 @@ class DeepCrawler:
             "max_notes": max_notes,
             "enable_comments": enable_comments,
             "headless": headless,
+            "cdp_port": cdp_port,
         }
 
+        cfg_path = run_dir / "config" / "base_config.py"
+        cfg_path.write_text(
+            DeepCrawler._render_base_config(cfg_path.read_text(encoding="utf-8"), params),
+            encoding="utf-8",
+        )
+        logger.info(
+            f"[DeepCrawler] 运行配置已生成: {run_dir.name}, platform={platform}, "
+            f"keywords={len(keywords)}个, max_notes={max_notes}, headless={headless}"
+        )
+        return run_dir
+
+    @staticmethod
+    def _render_base_config(original: str, params: Dict) -> str:
+        """
+        按 params 改写 base_config.py 的内容
+
+        安全地处理多行赋值（如 ``VAR = (\\n  value\\n)``），
+        避免只替换首行而遗留尾行导致 SyntaxError。
+        """
         lines = original.split("\n")
         new_lines: List[str] = []
         skip_continuation = False
@@ -139,11 +267,7 @@ class DeepCrawler:
             if not matched:
                 new_lines.append(line)
 
-        cfg_path.write_text("\n".join(new_lines), encoding="utf-8")
-        logger.info(
-            f"[DeepCrawler] base_config 已配置: platform={platform}, "
-            f"keywords={len(keywords)}个, max_notes={max_notes}, headless={headless}"
-        )
+        return "\n".join(new_lines)
 
     # ───── 运行爬虫 ─────
 
@@ -155,10 +279,16 @@ class DeepCrawler:
         enable_comments: bool = True,
         headless: bool = True,
         timeout: int = 3600,
+        on_items: Optional[Callable[[str, List[Dict]], None]] = None,
+        poll_interval: float = 3.0,
+        reuse_browser: bool = False,
     ) -> Dict:
         """
         在指定平台上按关键词搜索爬取
 
+        爬取进行中每 poll_interval 秒增量读取一次输出文件，新记录立即交给 on_items，
+        不必等子进程结束。传入 on_items 时结果中不再保留 items 列表，内存占用与单次新增量相当。
+
         Args:
             platform: 平台代码 (wb/zhihu/xhs/dy/ks/bili/tieba)
             keywords: 搜索关键词列表
@@ -166,6 +296,9 @@ class DeepCrawler:
             enable_comments: 是否爬取评论
             headless: 是否无头模式（首次登录建议 False 以便扫码）
             timeout: 超时秒数
+            on_items: 新记录回调 (platform, 原始记录列表)
+            poll_interval: 读取输出文件的间隔秒数
+            reuse_browser: 交给该平台的常驻工作进程执行（保持浏览器与登录态，见 crawler_worker.py）
 
         Returns:
             {"success": bool, "platform": str, "items": [...], ...}
@@ -183,14 +316,23 @@ class DeepCrawler:
             f"关键词: {keywords[:5]}{'...' if len(keywords) > 5 else ''}"
         )
 
+        if reuse_browser:
+            from src.crawler.crawler_worker import get_crawler_worker
+            stats = get_crawler_worker(platform, headless).run_job(
+                keywords, max_notes, enable_comments,
+                timeout=timeout, on_items=on_items, poll_interval=poll_interval,
+            )
+            self.crawl_stats[platform] = {k: v for k, v in stats.items() if k != "items"}
+            return stats
+
         start_time = datetime.now()
 
-        self._write_base_config(
+        run_dir = self._prepare_run_config(
             platform, keywords, max_notes, enable_comments, headless
         )
 
         cmd = [
-            sys.executable, "main.py",
+            sys.executable, str(LAUNCHER_PATH), str(run_dir),
             "--platform", platform,
             "--lt", "qrcode",
             "--type", "search",
@@ -205,117 +347,118 @@ class DeepCrawler:
         if sys.platform == "win32":
             creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
 
+        tailer = _open_tailer(platform, self._json_dirs(platform), start_time)
+        collector = _RecordCollector(platform, on_items)
+        stdout_path = run_dir / "stdout.log"
+        stderr_path = run_dir / "stderr.log"
+
         try:
             logger.info(f"[DeepCrawler] 启动子进程: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd,
-                cwd=str(MEDIACRAWLER_DIR),
-                timeout=timeout,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                creationflags=creation_flags,
-            )
-
+            with open(stdout_path, "w", encoding="utf-8") as out, \
+                    open(stderr_path, "w", encoding="utf-8") as err:
+                proc = subprocess.Popen(
+                    cmd,
+                    cwd=str(MEDIACRAWLER_DIR),
+                    stdout=out,
+                    stderr=err,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    creationflags=creation_flags,
+                )
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        proc.wait(timeout=poll_interval)
+                        break
+                    except subprocess.TimeoutExpired:
+                        collector.add(tailer.poll())
+                        if time.monotonic() > deadline:
+                            proc.kill()
+                            proc.wait()
+                            raise subprocess.TimeoutExpired(cmd, timeout)
+
+            collector.add(tailer.poll(final=True))
+            collector.commit(tailer)
             duration = (datetime.now() - start_time).total_seconds()
-
-            if result.stdout:
-                logger.info(f"[DeepCrawler] {platform} stdout:\n{result.stdout[-2000:]}")
-            if result.stderr:
-                logger.warning(f"[DeepCrawler] {platform} stderr:\n{result.stderr[-2000:]}")
-
-            items = self._collect_json_results(platform)
+            stdout = stdout_path.read_text(encoding="utf-8", errors="replace")
+            stderr = stderr_path.read_text(encoding="utf-8", errors="replace")
+
+            if stdout:
+                logger.info(f"[DeepCrawler] {platform} stdout:\n{stdout[-2000:]}")
+            if stderr:
+                logger.warning(f"[DeepCrawler] {platform} stderr:\n{stderr[-2000:]}")
+
+            if not collector.count:
+                logger.warning(
+                    f"[DeepCrawler] {platform} 未读取到新的内容数据，"
+                    f"输出目录: {[str(d) for d in self._json_dirs(platform)]}"
+                )
 
             stats = {
-                "success": result.returncode == 0,
+                "success": proc.returncode == 0,
                 "platform": platform,
                 "platform_name": SUPPORTED_PLATFORMS[platform],
                 "keywords_count": len(keywords),
-                "items_count": len(items),
-                "items": items,
+                "items_count": collector.count,
+                "skipped_seen": collector.skipped_seen,
+                "items": collector.items,
                 "duration_seconds": round(duration, 1),
-                "return_code": result.returncode,
+                "first_items_after_seconds": collector.first_after(start_time),
+                "return_code": proc.returncode,
                 "started_at": start_time.isoformat(),
             }
 
-            if result.returncode != 0:
-                stats["stderr_tail"] = (result.stderr or "")[-1000:]
-                stats["stdout_tail"] = (result.stdout or "")[-1000:]
+            if proc.returncode != 0:
+                stats["stderr_tail"] = stderr[-1000:]
+                stats["stdout_tail"] = stdout[-1000:]
                 logger.error(
-                    f"[DeepCrawler] {platform} 爬取失败 (code={result.returncode})"
+                    f"[DeepCrawler] {platform} 爬取失败 (code={proc.returncode})"
                 )
             else:
                 logger.info(
                     f"[DeepCrawler] {platform} 爬取完成: "
-                    f"{len(items)} 条内容, 耗时 {duration:.1f}s"
+                    f"{collector.count} 条新内容（跳过已处理 {collector.skipped_seen} 条）, "
+                    f"耗时 {duration:.1f}s"
                 )
 
-            self.crawl_stats[platform] = stats
+            self.crawl_stats[platform] = {k: v for k, v in stats.items() if k != "items"}
             return stats
 
         except subprocess.TimeoutExpired:
             logger.error(f"[DeepCrawler] {platform} 爬取超时 ({timeout}s)")
+            collector.add(tailer.poll(final=True))
+            collector.commit(tailer)
             return {
                 "success": False,
                 "platform": platform,
                 "error": f"爬取超时 ({timeout}s)",
-                "items": [],
+                "items": collector.items,
+                "items_count": collector.count,
             }
         except Exception as e:
             logger.error(f"[DeepCrawler] {platform} 爬取异常: {e}")
+            collector.commit(tailer)
             return {
                 "success": False,
                 "platform": platform,
                 "error": str(e),
-                "items": [],
+                "items": collector.items,
+                "items_count": collector.count,
             }
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
 
-    def _collect_json_results(self, platform: str) -> List[Dict]:
-        """读取 MediaCrawler 的 JSON 输出文件"""
-        # MediaCrawler 的 data 目录名与平台代码不同：wb→weibo, dy→douyin, ks→kuaishou
-        data_dir_name = PLATFORM_TO_DATA_DIR.get(platform, platform)
-        json_dir = MEDIACRAWLER_DIR / "data" / data_dir_name / "json"
+    # ───── 输出文件读取 ─────
 
-        if not json_dir.exists():
-            logger.warning(
-                f"[DeepCrawler] JSON 目录不存在: {json_dir}，"
-                f"尝试备选目录 data/{platform}/json"
-            )
-            json_dir = MEDIACRAWLER_DIR / "data" / platform / "json"
-            if not json_dir.exists():
-                return []
-
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        items = []
-
-        for pattern in [f"search_contents_{today_str}.json", f"*contents*{today_str}*.json"]:
-            for fpath in json_dir.glob(pattern):
-                try:
-                    raw = json.loads(fpath.read_text(encoding="utf-8"))
-                    if isinstance(raw, list):
-                        items.extend(raw)
-                    elif isinstance(raw, dict):
-                        items.append(raw)
-                    logger.info(f"[DeepCrawler] 读取 {fpath.name}: {len(raw) if isinstance(raw, list) else 1} 条")
-                except Exception as e:
-                    logger.warning(f"[DeepCrawler] 读取 {fpath.name} 失败: {e}")
-
-        if not items:
-            logger.warning(
-                f"[DeepCrawler] 在 {json_dir} 中未找到今日({today_str})的数据文件，"
-                f"目录下现有文件: {[f.name for f in json_dir.glob('*.json')]}"
-            )
-
-        seen_ids = set()
-        unique = []
-        for item in items:
-            item_id = item.get("note_id") or item.get("aweme_id") or item.get("id") or id(item)
-            if item_id not in seen_ids:
-                seen_ids.add(item_id)
-                unique.append(item)
-
-        return unique
+    @staticmethod
+    def _json_dirs(platform: str) -> List[Path]:
+        """平台 JSON 输出目录候选（MediaCrawler 目录名与平台代码不同：wb→weibo, dy→douyin, ks→kuaishou）"""
+        data_dir_name = PLATFORM_TO_DATA_DIR.get(platform, platform)
+        dirs = [MEDIACRAWLER_DIR / "data" / data_dir_name / "json"]
+        if data_dir_name != platform:
+            dirs.append(MEDIACRAWLER_DIR / "data" / platform / "json")
+        return dirs
 
     # ───── 多平台爬取 ─────
 
@@ -326,39 +469,116 @@ class DeepCrawler:
         max_notes: int = 20,
         enable_comments: bool = True,
         headless: bool = True,
+        max_parallel: int = 3,
+        on_items: Optional[Callable[[str, List[Dict]], None]] = None,
+        reuse_browser: bool = False,
+        keyword_quotas: Optional[Dict[str, Dict[str, int]]] = None,
     ) -> Dict:
         """
         在多个平台上搜索爬取
 
+        各平台使用独立的配置目录，以子进程并行运行，同时运行的平台数不超过 max_parallel。
+        传入 on_items 时各平台的新记录在爬取过程中即回调（可能来自不同线程），
+        all_items 不再累积。
+
+        keyword_quotas 为 {平台: {关键词: 配额}}（见 KeywordBudget.plan）时，
+        各平台只爬取其中的关键词，并按配额分组依次运行，代替统一的 keywords / max_notes。
+
         Returns:
             {"total_items": int, "platform_results": {...}, ...}
         """
         if platforms is None:
             platforms = ["wb", "zhihu"]
 
-        all_items = []
-        platform_results = {}
-
-        for plat in platforms:
+        valid = []
+        for plat in dict.fromkeys(platforms):
             if plat not in SUPPORTED_PLATFORMS:
                 logger.warning(f"[DeepCrawler] 跳过不支持的平台: {plat}")
                 continue
-            result = self.run_crawler(
-                plat, keywords, max_notes, enable_comments, headless
-            )
-            platform_results[plat] = result
-            if result.get("success"):
-                all_items.extend(result.get("items", []))
+            valid.append(plat)
+
+        all_items = []
+        platform_results = {}
+
+        if valid:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(valid)))) as pool:
+                futures = {
+                    plat: pool.submit(
+                        self._run_platform, plat,
+                        keyword_quotas.get(plat, {}) if keyword_quotas is not None
+                        else {kw: max_notes for kw in keywords},
+                        enable_comments, headless, on_items, reuse_browser,
+                    )
+                    for plat in valid
+                }
+                for plat in valid:
+                    result = futures[plat].result()
+                    platform_results[plat] = result
+                    if result.get("success"):
+                        all_items.extend(result.get("items", []))
 
         return {
             "success": any(r.get("success") for r in platform_results.values()),
-            "total_items": len(all_items),
+            "total_items": sum(r.get("items_count", 0) for r in platform_results.values() if r.get("success")),
             "all_items": all_items,
             "platform_results": platform_results,
             "platforms_count": len(platforms),
             "keywords_count": len(keywords),
         }
 
+    def _run_platform(
+        self,
+        platform: str,
+        quotas: Dict[str, int],
+        enable_comments: bool,
+        headless: bool,
+        on_items: Optional[Callable[[str, List[Dict]], None]],
+        reuse_browser: bool,
+    ) -> Dict:
+        """按配额把关键词分组，在同一平台上依次爬取并合并结果"""
+        groups: Dict[int, List[str]] = {}
+        for keyword, notes in quotas.items():
+            groups.setdefault(notes, []).append(keyword)
+        if not groups:
+            return {"success": True, "platform": platform, "items": [], "items_count": 0, "skipped": True}
+
+        results = []
+        for notes, group in sorted(groups.items(), reverse=True):
+            callback = on_items
+            if on_items is not None and len(group) == 1:
+                # 单关键词分组：补上 source_keyword，便于按关键词统计产出
+                def callback(plat, items, _kw=group[0]):
+                    for item in items:
+                        item.setdefault("source_keyword", _kw)
+                    on_items(plat, items)
+            result = self.run_crawler(
+                platform, group, notes, enable_comments, headless,
+                on_items=callback, reuse_browser=reuse_browser,
+            )
+            if len(group) == 1:
+                for item in result.get("items", []):
+                    item.setdefault("source_keyword", group[0])
+            results.append(result)
+
+        if len(results) == 1:
+            return results[0]
+        merged = {
+            "success": any(r.get("success") for r in results),
+            "platform": platform,
+            "platform_name": SUPPORTED_PLATFORMS[platform],
+            "keywords_count": len(quotas),
+            "items": [item for r in results for item in r.get("items", [])],
+            "items_count": sum(r.get("items_count", 0) for r in results),
+            "duration_seconds": round(sum(r.get("duration_seconds", 0) for r in results), 1),
+            "groups": [
+                {k: v for k, v in r.items() if k != "items"} for r in results
+            ],
+        }
+        errors = [r["error"] for r in results if r.get("error")]
+        if errors:
+            merged["error"] = "; ".join(errors)
+        return merged
+
     # ───── 结果转换：MediaCrawler JSON → 统一格式 ─────
 
     @staticmethod
@@ -0,0 +1,176 @@
+# src/crawler/keyword_budget.py
+"""
+关键词爬取预算 - 按各关键词在各平台上的实际产出分配下一次的爬取配额和频率
+
+每次爬取后对每个 (平台, 关键词) 统计:
+    new:    新入库的条目数（去重后真正新增的内容）
+    campus: 其中与校园相关的条目数
+    risky:  其中风险等级为中及以上的条目数
+并用指数滑动平均（EWMA）更新 value = new + campus + 2 × risky，以及校园占比、风险占比。
+
+下一次爬取时:
+    配额: 平台总配额（基准配额 × 参与的关键词数）按 value 比例分给各关键词，限制在 [min_notes, max_notes]；
+          没有历史的关键词按基准配额探索
+    频率: 连续没有产出的"死"关键词依次跳过 0、1、3、7… 次运行（最多 max_skip_runs 次），
+          一旦重新产出新内容立即恢复每次都爬
+"""
+import threading
+from typing import Dict, List, Optional
+import logging
+
+from src.crawler.state_store import load_state, save_state
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_YIELD_STATE = "keyword_yield"
+
+# EWMA 平滑系数：越大越看重最近一次爬取
+EWMA_ALPHA = 0.4
+# value 低于该值视为本次没有有效产出
+DEAD_VALUE = 0.5
+# 风险等级为中及以上视为有风险
+RISKY_LEVELS = ("medium", "high", "critical")
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    if previous is None:
+        return value
+    return EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+class KeywordBudget:
+    """
+    关键词产出统计与配额分配（状态持久化在 state_store 的 keyword_yield 中）
+
+    state 结构: {平台: {"runs": 本平台已完成的爬取次数, "keywords": {关键词: 统计}}}
+
+    Args:
+        min_notes: 单个关键词的最小配额
+        max_notes: 单个关键词的最大配额
+        max_skip_runs: 死关键词最多连续跳过的运行次数
+    """
+
+    def __init__(self, min_notes: int = 5, max_notes: int = 60, max_skip_runs: int = 8):
+        self.min_notes = min_notes
+        self.max_notes = max(min_notes, max_notes)
+        self.max_skip_runs = max_skip_runs
+        self.state: Dict[str, Dict] = load_state(KEYWORD_YIELD_STATE)
+        self._planned: Dict[str, Dict[str, int]] = {}
+        self._counts: Dict[tuple, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    # ─────── 分配 ───────
+
+    def plan(self, keywords: List[str], platforms: List[str], base_notes: int) -> Dict[str, Dict[str, int]]:
+        """
+        生成本次爬取计划
+
+        Returns:
+            {平台: {关键词: 配额}}，本次跳过的关键词不在其中
+        """
+        keywords = list(dict.fromkeys(keywords))
+        plan = {}
+        for platform in platforms:
+            plat_state = self.state.get(platform, {})
+            runs = plat_state.get("runs", 0)
+            stats = plat_state.get("keywords", {})
+
+            due = [kw for kw in keywords if stats.get(kw, {}).get("next_run", 0) <= runs]
+            if not due and keywords:
+                # 全部处于跳过期时至少保留最快到期的一个，保证平台仍有探索
+                due = [min(keywords, key=lambda kw: stats[kw].get("next_run", 0))]
+
+            plan[platform] = self._allocate(due, stats, base_notes)
+            skipped = len(keywords) - len(due)
+            if skipped:
+                logger.info(f"[KeywordBudget] {platform} 跳过 {skipped} 个低产出关键词")
+
+        self._planned = plan
+        return plan
+
+    def _allocate(self, keywords: List[str], stats: Dict[str, Dict], base_notes: int) -> Dict[str, int]:
+        known = [kw for kw in keywords if stats.get(kw, {}).get("runs")]
+        quotas = {kw: base_notes for kw in keywords if kw not in known}
+        if not known:
+            return quotas
+
+        # 有历史的关键词分享 base_notes × 数量 的总配额，按 value 比例分配（+1 平滑，避免 0 配额）
+        total = base_notes * len(known)
+        weights = {kw: stats[kw].get("value", 0.0) + 1.0 for kw in known}
+        weight_sum = sum(weights.values())
+        for kw in known:
+            share = round(total * weights[kw] / weight_sum)
+            quotas[kw] = max(self.min_notes, min(self.max_notes, share))
+        return quotas
+
+    # ─────── 产出记录 ───────
+
+    def record(
+        self,
+        platform: str,
+        keyword: str,
+        fetched: int = 0,
+        new: int = 0,
+        campus: int = 0,
+        risky: int = 0,
+    ) -> None:
+        """累加本次爬取中某个 (平台, 关键词) 的产出（可在多个平台线程中调用）"""
+        with self._lock:
+            counts = self._counts.setdefault(
+                (platform, keyword), {"fetched": 0, "new": 0, "campus": 0, "risky": 0}
+            )
+            counts["fetched"] += fetched
+            counts["new"] += new
+            counts["campus"] += campus
+            counts["risky"] += risky
+
+    def finish_run(self) -> None:
+        """本次爬取结束：用累计的产出更新计划内各关键词的统计和下次爬取时机，并保存"""
+        with self._lock:
+            for platform, quotas in self._planned.items():
+                plat_state = self.state.setdefault(platform, {"runs": 0, "keywords": {}})
+                plat_state["runs"] += 1
+                for keyword, notes in quotas.items():
+                    counts = self._counts.get((platform, keyword), {})
+                    self._update_keyword(
+                        plat_state["keywords"].setdefault(keyword, {}),
+                        counts, notes, plat_state["runs"],
+                    )
+            self._planned = {}
+            self._counts = {}
+            save_state(KEYWORD_YIELD_STATE, self.state)
+
+    def _update_keyword(self, stat: Dict, counts: Dict[str, int], notes: int, run_no: int) -> None:
+        new = counts.get("new", 0)
+        value = new + counts.get("campus", 0) + 2 * counts.get("risky", 0)
+
+        stat["runs"] = stat.get("runs", 0) + 1
+        stat["last_notes"] = notes
+        stat["last_new"] = new
+        stat["value"] = _ewma(stat.get("value"), value)
+        if new:
+            stat["campus_share"] = _ewma(stat.get("campus_share"), counts.get("campus", 0) / new)
+            stat["risk_share"] = _ewma(stat.get("risk_share"), counts.get("risky", 0) / new)
+        stat["new_total"] = stat.get("new_total", 0) + new
+
+        if value >= DEAD_VALUE:
+            stat["idle_runs"] = 0
+            stat["next_run"] = run_no
+        else:
+            stat["idle_runs"] = stat.get("idle_runs", 0) + 1
+            # 连续无产出：跳过 0、1、3、7… 次运行
+            skip = min(self.max_skip_runs, 2 ** (stat["idle_runs"] - 1) - 1)
+            stat["next_run"] = run_no + skip
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """各平台关键词当前统计（数值保留 3 位小数）"""
+        return {
+            platform: {
+                "runs": plat_state.get("runs", 0),
+                "keywords": {
+                    kw: {k: round(v, 3) if isinstance(v, float) else v for k, v in stat.items()}
+                    for kw, stat in plat_state.get("keywords", {}).items()
+                },
+            }
+            for platform, plat_state in self.state.items()
+        }
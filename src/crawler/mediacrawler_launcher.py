@@ -0,0 +1,38 @@
+# src/crawler/mediacrawler_launcher.py
+"""
+MediaCrawler 启动器 - 用独立的配置目录运行 MediaCrawler/main.py
+
+用法:
+    python mediacrawler_launcher.py <run_dir> [main.py 参数...]
+
+run_dir/config 会先于 MediaCrawler/config 被导入，
+多个平台并行爬取时各自读取自己的配置，不再争抢同一个 base_config.py。
+
+注意：本文件在 MediaCrawler 子进程中运行，不能导入 src.* 模块。
+"""
+import runpy
+import sys
+from pathlib import Path
+
+# 与 deep_crawler.MEDIACRAWLER_DIR 保持一致
+MEDIACRAWLER_DIR = Path(__file__).resolve().parent / "MediaCrawler"
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+
+    run_dir = sys.argv[1]
+    main_py = MEDIACRAWLER_DIR / "main.py"
+
+    # 脚本目录（src/crawler）换成 MediaCrawler 根目录，再把 run_dir 放在最前面
+    sys.path[0] = str(MEDIACRAWLER_DIR)
+    sys.path.insert(0, run_dir)
+    sys.argv = [str(main_py), *sys.argv[2:]]
+
+    runpy.run_path(str(main_py), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# src/crawler/mediacrawler_worker.py
+"""
+MediaCrawler 常驻工作进程 - 保持浏览器与登录态，通过本地 IPC 连续执行爬取任务
+
+用法:
+    python mediacrawler_worker.py <run_dir> <host> <port>
+认证密钥通过环境变量 MEDIACRAWLER_WORKER_AUTHKEY 传入（不出现在进程命令行中）
+
+协议（multiprocessing.connection，消息均为 dict）:
+    worker → 父进程  {"type": "ready"}       浏览器已启动、登录完成，可以接收任务
+    父进程 → worker  {"type": "job", "job_id", "keywords", "max_notes", "enable_comments"}
+    worker → 父进程  {"type": "done", "job_id", "success", "error"}
+    父进程 → worker  {"type": "shutdown"}
+
+爬取结果仍由 MediaCrawler 写入 data/<平台>/json，父进程增量读取（见 output_tailer.py）。
+
+注意：本文件在 MediaCrawler 子进程中运行，不能导入 src.* 模块。
+"""
+import asyncio
+import os
+import sys
+import traceback
+from multiprocessing.connection import Client
+from pathlib import Path
+
+# 与 deep_crawler.MEDIACRAWLER_DIR 保持一致
+MEDIACRAWLER_DIR = Path(__file__).resolve().parent / "MediaCrawler"
+
+AUTHKEY_ENV = "MEDIACRAWLER_WORKER_AUTHKEY"
+
+
+async def serve(conn) -> None:
+    import config
+    from main import CrawlerFactory
+
+    crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+    search = crawler.search
+
+    async def job_loop():
+        conn.send({"type": "ready"})
+        while True:
+            msg = await asyncio.to_thread(conn.recv)
+            if msg.get("type") != "job":
+                break
+
+            # MediaCrawler 在运行时读取 config 模块属性，逐任务覆盖即可
+            config.KEYWORDS = ",".join(msg["keywords"])
+            config.CRAWLER_MAX_NOTES_COUNT = msg["max_notes"]
+            config.ENABLE_GET_COMMENTS = msg["enable_comments"]
+            try:
+                await search()
+                conn.send({"type": "done", "job_id": msg["job_id"], "success": True})
+            except Exception as e:
+                traceback.print_exc()
+                conn.send({
+                    "type": "done", "job_id": msg["job_id"],
+                    "success": False, "error": str(e),
+                })
+
+    # start() 完成浏览器启动和登录后调用 search()：换成任务循环，
+    # 浏览器上下文在整个循环期间保持打开，收到 shutdown 后 start() 正常收尾
+    crawler.search = job_loop
+    await crawler.start()
+
+
+def main():
+    if len(sys.argv) < 4:
+        print(__doc__)
+        sys.exit(2)
+
+    run_dir, host, port = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    authkey = bytes.fromhex(os.environ.pop(AUTHKEY_ENV))
+
+    # 与 mediacrawler_launcher 相同：run_dir/config 优先于 MediaCrawler/config
+    sys.path[0] = str(MEDIACRAWLER_DIR)
+    sys.path.insert(0, run_dir)
+    sys.argv = [str(MEDIACRAWLER_DIR / "main.py")]
+
+    conn = Client((host, port), authkey=authkey)
+    try:
+        asyncio.run(serve(conn))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# src/crawler/near_duplicate.py
+"""
+近重复聚类 - MinHash + 分段 LSH，把同一事件的多个版本归入同一个簇
+
+同一事件在微博、知乎、头条、抖音上的标题略有差异，深度爬取里还有大量近乎相同的转发，
+content_hash 只能识别完全相同的文本。这里对归一化文本的字符 2-gram 计算 MinHash 签名，
+签名切成 LSH_BANDS 段，任一段完全相同的簇成为候选，再用签名估计的 Jaccard 相似度确认：
+
+    签名 64 个哈希 = 16 段 × 4 行，相似度 0.7 的文本成为候选的概率约 99%，
+    相似度 0.3 的约 12%，候选再经过 SIMILARITY_THRESHOLD 过滤
+
+每条新内容只查 16 个桶，与已有簇数量基本无关。
+簇的代表条目正常分析入库，其余成员只累加代表记录的 cluster_size，不再重复分析和存储；
+话题热度按 cluster_size 求和。
+
+代表条目入库前簇处于待定状态，按代表条目的 content_hash 登记。写入方在写入失败时应调用 discard()；
+即使没有调用（进程崩溃、调用方漏处理），待定超过 PENDING_TTL 秒的簇也会被清除，
+不会一直吞掉之后的近重复内容。
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# 估计 Jaccard 相似度达到该值视为近重复
+SIMILARITY_THRESHOLD = 0.7
+# 归一化后短于该长度的文本不参与聚类（信息太少，容易误判）
+MIN_TEXT_LENGTH = 8
+# 启动时从库中载入最近几天的记录作为已有簇
+SEED_DAYS = 3
+SEED_LIMIT = 20000
+# 待定簇的最长存活时间（秒），超时视为代表条目写入已失败
+PENDING_TTL = 600
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "little") % _MERSENNE_PRIME or 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "little") % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_PERM)
+]
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def minhash_signature(text: str) -> Optional[Tuple[int, ...]]:
+    """文本的 MinHash 签名（字符 2-gram），过短返回 None"""
+    normalized = _NON_WORD.sub("", text.lower())
+    if len(normalized) < MIN_TEXT_LENGTH:
+        return None
+    base_hashes = [
+        int.from_bytes(hashlib.blake2b(normalized[i:i + 2].encode(), digest_size=4).digest(), "little")
+        for i in range(len(normalized) - 1)
+    ]
+    base_hashes = list(set(base_hashes))
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in base_hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """签名中相同位置取值相等的比例，即 Jaccard 相似度的估计"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _pending_key(item: Dict) -> str:
+    """待定簇的登记键：代表条目的 content_hash（缺失时按原文计算）"""
+    return item.get("content_hash") or hashlib.sha1(item["content"].encode("utf-8")).hexdigest()
+
+
+class _Cluster:
+    __slots__ = ("key", "signature", "record_id", "size", "pending_since")
+
+    def __init__(self, key: int, signature: Tuple[int, ...], record_id: Optional[int], size: int):
+        self.key = key
+        self.signature = signature
+        self.record_id = record_id
+        self.size = size
+        self.pending_since = time.monotonic() if record_id is None else None
+
+
+class NearDuplicateIndex:
+    """
+    近重复簇索引（线程安全）
+
+    簇的代表条目尚未入库时处于待定状态：之后的成员先累加在内存里，
+    入库后由 bind() 返回需要补加到 cluster_size 的差值。
+
+    Args:
+        max_clusters: 内存中最多保留的簇数，超出时淘汰最早的已入库簇（待定簇不淘汰）
+        pending_ttl: 待定簇的最长存活时间（秒），超时后清除
+    """
+
+    def __init__(self, max_clusters: int = 200000, pending_ttl: float = PENDING_TTL):
+        self.max_clusters = max_clusters
+        self.pending_ttl = pending_ttl
+        self._clusters: "OrderedDict[int, _Cluster]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[_Cluster]] = {}
+        self._pending: Dict[str, _Cluster] = {}
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    # ─────── 聚类 ───────
+
+    def assign(self, items: List[Dict]) -> Tuple[List[Dict], Dict[int, int]]:
+        """
+        为一批条目分配簇
+
+        Returns:
+            (representatives, bumps)
+            representatives: 开启新簇、需要分析入库的条目（已设置 cluster_size=1）
+            bumps: 并入已入库簇的成员数 {record_id: 新增成员数}
+        """
+        representatives: List[Dict] = []
+        bumps: Dict[int, int] = {}
+        with self._lock:
+            self._expire_pending()
+            for item in items:
+                signature = minhash_signature(item["content"])
+                item["cluster_size"] = 1
+                if signature is None:
+                    representatives.append(item)
+                    continue
+
+                cluster = self._find(signature)
+                if cluster is None:
+                    self._pending[_pending_key(item)] = self._add(signature, record_id=None, size=1)
+                    representatives.append(item)
+                    continue
+
+                cluster.size += 1
+                self._clusters.move_to_end(cluster.key)
+                if cluster.record_id is not None:
+                    bumps[cluster.record_id] = bumps.get(cluster.record_id, 0) + 1
+        return representatives, bumps
+
+    def bind(self, items: List[Dict], record_ids: List[int]) -> Dict[int, int]:
+        """
+        代表条目入库后绑定记录 ID
+
+        Returns:
+            待定期间并入的成员数 {record_id: 需补加的 cluster_size}
+        """
+        bumps: Dict[int, int] = {}
+        with self._lock:
+            for item, record_id in zip(items, record_ids):
+                cluster = self._pending.pop(_pending_key(item), None)
+                if cluster is None:
+                    continue
+                cluster.record_id = record_id
+                cluster.pending_since = None
+                delta = cluster.size - item.get("cluster_size", 1)
+                if delta > 0:
+                    bumps[record_id] = delta
+            self._evict()
+        return bumps
+
+    def discard(self, items: List[Dict]) -> None:
+        """代表条目写入失败：移除其待定簇"""
+        with self._lock:
+            for item in items:
+                cluster = self._pending.pop(_pending_key(item), None)
+                if cluster is not None:
+                    self._remove(cluster)
+
+    def seed(self, rows: List[Tuple[int, str, Optional[int]]]) -> None:
+        """载入已入库的记录 (id, content, cluster_size) 作为已有簇"""
+        with self._lock:
+            for record_id, content, size in rows:
+                signature = minhash_signature(content or "")
+                if signature is not None and self._find(signature) is None:
+                    self._add(signature, record_id=record_id, size=size or 1)
+            self._evict()
+
+    # ─────── 内部方法 ───────
+
+    @staticmethod
+    def _band_keys(signature: Tuple[int, ...]):
+        for band in range(LSH_BANDS):
+            yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def _find(self, signature: Tuple[int, ...]) -> Optional[_Cluster]:
+        best, best_similarity = None, SIMILARITY_THRESHOLD
+        checked = set()
+        for key in self._band_keys(signature):
+            for cluster in self._buckets.get(key, ()):
+                if cluster.key in checked:
+                    continue
+                checked.add(cluster.key)
+                similarity = estimate_similarity(signature, cluster.signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = cluster, similarity
+        return best
+
+    def _add(self, signature: Tuple[int, ...], record_id: Optional[int], size: int) -> _Cluster:
+        cluster = _Cluster(self._next_key, signature, record_id, size)
+        self._next_key += 1
+        self._clusters[cluster.key] = cluster
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(cluster)
+        return cluster
+
+    def _remove(self, cluster: _Cluster) -> None:
+        self._clusters.pop(cluster.key, None)
+        for key in self._band_keys(cluster.signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket[:] = [c for c in bucket if c is not cluster]
+            if not bucket:
+                del self._buckets[key]
+
+    def _evict(self) -> None:
+        excess = len(self._clusters) - self.max_clusters
+        if excess <= 0:
+            return
+        # 从最早的簇开始淘汰，跳过仍在等待入库的待定簇
+        victims = []
+        for cluster in self._clusters.values():
+            if cluster.record_id is not None:
+                victims.append(cluster)
+                if len(victims) >= excess:
+                    break
+        for cluster in victims:
+            self._remove(cluster)
+
+    def _expire_pending(self) -> None:
+        deadline = time.monotonic() - self.pending_ttl
+        expired = [key for key, cluster in self._pending.items() if cluster.pending_since <= deadline]
+        for key in expired:
+            cluster = self._pending.pop(key)
+            self._remove(cluster)
+            logger.warning(
+                f"[NearDuplicate] 待定簇超过 {self.pending_ttl}s 未入库，已清除（丢弃 {cluster.size - 1} 个成员计数）"
+            )
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """进程内共享的近重复索引，首次使用时载入最近 SEED_DAYS 天的记录"""
+    global _index
+
+    with _index_lock:
+        if _index is not None:
+            return _index
+
+        index = NearDuplicateIndex()
+        try:
+            from sqlalchemy import select
+            from src.database.connection import SessionLocal
+            from src.database.models import SentimentRecord
+
+            session = SessionLocal()
+            try:
+                rows = session.execute(
+                    select(SentimentRecord.id, SentimentRecord.content, SentimentRecord.cluster_size)
+                    .where(SentimentRecord.created_at >= datetime.now() - timedelta(days=SEED_DAYS))
+                    .order_by(SentimentRecord.id)
+                    .limit(SEED_LIMIT)
+                ).all()
+            finally:
+                session.close()
+            index.seed(rows)
+            logger.info(f"[NearDuplicate] 已载入 {len(rows)} 条近期记录，{len(index)} 个簇")
+        except Exception as e:
+            logger.warning(f"[NearDuplicate] 载入近期记录失败，从空索引开始: {e}")
+
+        _index = index
+        return _index
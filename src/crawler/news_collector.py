@@ -4,10 +4,15 @@
 从 12+ 公开新闻源实时采集热点新闻，无需登录和浏览器自动化
 """
 import asyncio
+import hashlib
 import httpx
 import json
+import random
+import re
+import time
+import weakref
 from datetime import datetime, date
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterator, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,6 +39,10 @@ SOURCE_CONFIG = {
 # 与校园舆情相关度较高的新闻源（优先采集）
 CAMPUS_PRIORITY_SOURCES = ["weibo", "zhihu", "bilibili-hot-search", "douyin", "tieba", "toutiao"]
 
+# only_new 差量状态按调用方（consumer）分别持久化：news_last_ids_<consumer>
+LAST_IDS_STATE_PREFIX = "news_last_ids_"
+DEFAULT_CONSUMER = "default"
+
 
 class NewsCollector:
     """
@@ -43,8 +52,27 @@ class NewsCollector:
     使用公开 API 采集多平台热点，不依赖浏览器自动化
     """
 
-    def __init__(self, timeout: float = 30.0):
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        per_host_concurrency: int = 6,
+        politeness_delay: float = 0.3,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
+        """
+        Args:
+            timeout: 默认单源超时（秒），可在 SOURCE_CONFIG 中按源覆盖 "timeout"
+            per_host_concurrency: 同一主机的最大并发请求数
+            politeness_delay: 同一主机相邻两次请求发起的最小间隔（秒）
+            max_retries: 超时 / 连接错误 / 429 / 5xx 的重试次数
+            retry_backoff: 重试退避基数（秒），按 2^n 增长并叠加随机抖动
+        """
         self.timeout = timeout
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.politeness_delay = politeness_delay
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
         self.headers = {
             "Accept": "application/json, text/plain, */*",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
@@ -56,33 +84,202 @@ class NewsCollector:
             "Referer": NEWS_API_BASE,
         }
 
+        # 连接池客户端与主机限流状态绑定在事件循环上，每个循环各一份：
+        # 后台循环（run_sync）与 FastAPI 的循环都能长期复用自己的连接池
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # 条件请求缓存: source_id → {etag, last_modified, body_hash, items}
+        self._http_cache: Dict[str, Dict] = {}
+
+    # ─────── 连接池 / 主机限流 ───────
+
+    def _loop_state(self) -> Dict:
+        """当前事件循环上的 {client, semaphores, next_start}，首次使用或客户端已关闭时创建"""
+        loop = asyncio.get_running_loop()
+        state = self._loop_states.get(loop)
+        if state is None or state["client"].is_closed:
+            state = {
+                "client": httpx.AsyncClient(
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    headers=self.headers,
+                    limits=httpx.Limits(
+                        max_connections=self.per_host_concurrency * 4,
+                        max_keepalive_connections=self.per_host_concurrency * 2,
+                    ),
+                ),
+                "semaphores": {},
+                "next_start": {},
+            }
+            self._loop_states[loop] = state
+        return state
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """返回当前事件循环上的共享客户端"""
+        return self._loop_state()["client"]
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的共享客户端"""
+        state = self._loop_states.pop(asyncio.get_running_loop(), None)
+        if state is not None and not state["client"].is_closed:
+            await state["client"].aclose()
+
+    async def __aenter__(self) -> "NewsCollector":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _polite_get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        timeout: float,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        """受主机并发上限与礼貌间隔约束的 GET"""
+        host = httpx.URL(url).host
+        state = self._loop_state()
+        sem = state["semaphores"].get(host)
+        if sem is None:
+            sem = state["semaphores"][host] = asyncio.Semaphore(self.per_host_concurrency)
+
+        async with sem:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, state["next_start"].get(host, 0.0))
+            state["next_start"][host] = start + self.politeness_delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            return await client.get(url, timeout=timeout, headers=headers)
+
+    def _retry_delay(self, attempt: int) -> float:
+        return self.retry_backoff * (2 ** attempt) + random.uniform(0, self.retry_backoff)
+
+    # ─────── 采集 ───────
+
     async def fetch_source(self, source_id: str) -> Dict:
-        """从单个新闻源获取数据"""
+        """
+        从单个新闻源获取数据（失败按退避 + 抖动重试，不影响其他源）
+
+        携带上次响应的 ETag / Last-Modified 发起条件请求；
+        304 或响应体哈希与上次相同时直接复用缓存条目，结果中 not_modified=True
+        """
         url = f"{NEWS_API_BASE}/api/s?id={source_id}&latest"
-        source_name = SOURCE_CONFIG.get(source_id, {}).get("name", source_id)
-
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                resp = await client.get(url, headers=self.headers)
-                resp.raise_for_status()
-                data = resp.json()
-                items = data.get("items", []) if isinstance(data, dict) else []
+        config = SOURCE_CONFIG.get(source_id, {})
+        source_name = config.get("name", source_id)
+        timeout = config.get("timeout", self.timeout)
+        client = self._get_client()
+
+        cached = self._http_cache.get(source_id)
+        conditional = {}
+        if cached:
+            if cached.get("etag"):
+                conditional["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                conditional["If-Modified-Since"] = cached["last_modified"]
+
+        started = time.perf_counter()
+        status, error = "error", None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._retry_delay(attempt - 1))
+            try:
+                resp = await self._polite_get(client, url, timeout, conditional or None)
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    status, error = "error", f"HTTP {resp.status_code}"
+                    continue
+
+                if resp.status_code == 304 and cached:
+                    items, not_modified = cached["items"], True
+                else:
+                    resp.raise_for_status()
+                    items, not_modified = self._parse_and_cache(source_id, resp, cached)
+
                 return {
                     "source": source_id,
                     "source_name": source_name,
                     "status": "success",
                     "items": items,
                     "count": len(items),
+                    "attempts": attempt + 1,
+                    "not_modified": not_modified,
+                    "elapsed": round(time.perf_counter() - started, 3),
                 }
-        except httpx.TimeoutException:
-            return {"source": source_id, "source_name": source_name, "status": "timeout", "items": [], "count": 0}
-        except Exception as e:
-            return {"source": source_id, "source_name": source_name, "status": "error", "error": str(e), "items": [], "count": 0}
+            except httpx.TimeoutException:
+                status, error = "timeout", None
+            except httpx.TransportError as e:
+                status, error = "error", str(e)
+            except Exception as e:
+                # 4xx / 响应解析失败重试也不会好转
+                status, error = "error", str(e)
+                break
+
+        result = {
+            "source": source_id, "source_name": source_name, "status": status, "items": [], "count": 0,
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+        if error:
+            result["error"] = error
+        return result
+
+    def _parse_and_cache(self, source_id: str, resp: httpx.Response, cached: Optional[Dict]) -> Tuple[List, bool]:
+        """解析 200 响应并更新条件请求缓存，返回 (items, 是否与上次相同)"""
+        body_hash = hashlib.sha1(resp.content).hexdigest()
+        if cached and cached["body_hash"] == body_hash:
+            items, not_modified = cached["items"], True
+        else:
+            data = resp.json()
+            items = data.get("items", []) if isinstance(data, dict) else []
+            not_modified = False
+
+        self._http_cache[source_id] = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "body_hash": body_hash,
+            "items": items,
+        }
+        return items, not_modified
+
+    # ─────── only_new 差量状态（按调用方） ───────
+
+    @staticmethod
+    def _last_ids_state(consumer: str) -> str:
+        return LAST_IDS_STATE_PREFIX + re.sub(r"[^\w-]", "_", consumer or DEFAULT_CONSUMER)
+
+    async def _load_last_ids(self, consumer: str) -> Dict[str, List[str]]:
+        """该调用方上一轮轮询各源的条目 ID: {source_id: [id, ...]}"""
+        from src.crawler.state_store import load_state
+        return await asyncio.to_thread(load_state, self._last_ids_state(consumer))
+
+    async def _save_last_ids(self, consumer: str, last_ids: Dict[str, List[str]]) -> None:
+        from src.crawler.state_store import save_state
+        await asyncio.to_thread(save_state, self._last_ids_state(consumer), last_ids)
+
+    @staticmethod
+    def _only_new(last_ids: Dict[str, List[str]], result: Dict, news: List[Dict]) -> List[Dict]:
+        """
+        只保留该调用方上一轮轮询中没有出现过的条目（按条目 ID），并在 last_ids 中记录本轮 ID
+
+        不能看 not_modified：条件请求缓存是进程内所有调用方共享的，另一个调用方先取到变化后，
+        本调用方拿到的是 not_modified=True 的同一批条目，仍要与自己上一轮的 ID 比较
+        """
+        source_id = result["source"]
+        previous = last_ids.get(source_id)
+        last_ids[source_id] = [n["id"] for n in news]
+        if previous is None:
+            return news
+        previous = set(previous)
+        return [n for n in news if n["id"] not in previous]
 
     async def collect_news(
         self,
         sources: Optional[List[str]] = None,
         campus_priority: bool = False,
+        only_new: bool = False,
+        consumer: str = DEFAULT_CONSUMER,
     ) -> Dict:
         """
         采集多平台热点新闻
@@ -90,6 +287,8 @@ class NewsCollector:
         Args:
             sources: 指定新闻源列表，None 使用全部源
             campus_priority: True 只采集高相关源，False 采集全部源（推荐）
+            only_new: True 只返回该 consumer 上一轮轮询之后新出现的条目
+            consumer: 差量状态的归属方，不同调用方互不影响（状态持久化在 state_store，重启后保留）
         
         Returns:
             {success, news_list, stats}
@@ -99,37 +298,34 @@ class NewsCollector:
 
         logger.info(f"[NewsCollector] 开始采集 {len(sources)} 个新闻源...")
 
-        results = []
-        for src in sources:
-            result = await self.fetch_source(src)
-            results.append(result)
-            await asyncio.sleep(0.3)  # 礼貌延迟
+        # 各源并发采集，同一主机的并发数与请求间隔由 _polite_get 控制
+        results = await asyncio.gather(*(self.fetch_source(src) for src in sources))
+        last_ids = await self._load_last_ids(consumer) if only_new else None
 
         # 汇总
         news_list = []
         success_count = 0
+        unchanged_count = 0
         total_items = 0
 
         for r in results:
             if r["status"] == "success":
                 success_count += 1
-                for i, item in enumerate(r["items"], 1):
-                    title = item.get("title", "").strip() if isinstance(item, dict) else str(item).strip()
-                    if not title:
-                        continue
-                    news_list.append({
-                        "id": f"{r['source']}_{item.get('id', i) if isinstance(item, dict) else i}",
-                        "title": title,
-                        "url": item.get("url", "") if isinstance(item, dict) else "",
-                        "source": r["source"],
-                        "source_name": r["source_name"],
-                        "rank": i,
-                    })
-                    total_items += 1
+                unchanged_count += bool(r.get("not_modified"))
+                source_news = self._to_news_list(r)
+                total_items += len(source_news)
+                if only_new:
+                    source_news = self._only_new(last_ids, r, source_news)
+                news_list.extend(source_news)
             else:
                 logger.warning(f"[NewsCollector] {r['source_name']}: {r.get('error', r['status'])}")
+        if only_new:
+            await self._save_last_ids(consumer, last_ids)
 
-        logger.info(f"[NewsCollector] 采集完成: {success_count}/{len(sources)} 源成功, 共 {total_items} 条新闻")
+        logger.info(
+            f"[NewsCollector] 采集完成: {success_count}/{len(sources)} 源成功 ({unchanged_count} 源无变化), "
+            f"共 {total_items} 条新闻" + (f", 新增 {len(news_list)} 条" if only_new else "")
+        )
 
         return {
             "success": success_count > 0,
@@ -137,22 +333,74 @@ class NewsCollector:
             "stats": {
                 "total_sources": len(sources),
                 "success_sources": success_count,
+                "unchanged_sources": unchanged_count,
                 "total_news": total_items,
+                "new_news": len(news_list) if only_new else None,
+                "per_source": {
+                    r["source"]: {
+                        "status": r["status"],
+                        "count": r["count"],
+                        "elapsed": r["elapsed"],
+                        "not_modified": r.get("not_modified", False),
+                    }
+                    for r in results
+                },
                 "collected_at": datetime.now().isoformat(),
             },
         }
 
+    async def iter_news(
+        self,
+        sources: Optional[List[str]] = None,
+        campus_priority: bool = False,
+        only_new: bool = False,
+        consumer: str = DEFAULT_CONSUMER,
+    ) -> AsyncIterator[Dict]:
+        """
+        流式采集：各源并发请求，哪个源先返回就先逐条产出，供 StreamingPipeline 消费
+
+        与 collect_news 使用相同的源选择规则，但不在内存中汇总全部结果。
+        only_new 的差量状态在全部条目被消费完后才保存，中途失败时下一轮仍视为新条目。
+        """
+        if sources is None:
+            sources = CAMPUS_PRIORITY_SOURCES if campus_priority else list(SOURCE_CONFIG.keys())
+
+        last_ids = await self._load_last_ids(consumer) if only_new else None
+        for next_done in asyncio.as_completed([self.fetch_source(src) for src in sources]):
+            result = await next_done
+            if result["status"] == "success":
+                source_news = self._to_news_list(result)
+                if only_new:
+                    source_news = self._only_new(last_ids, result, source_news)
+                for news in source_news:
+                    yield news
+            else:
+                logger.warning(f"[NewsCollector] {result['source_name']}: {result.get('error', result['status'])}")
+        if only_new:
+            await self._save_last_ids(consumer, last_ids)
+
+    @staticmethod
+    def _to_news_list(result: Dict) -> List[Dict]:
+        """把单个新闻源的原始返回转换为统一的新闻条目"""
+        news_list = []
+        for i, item in enumerate(result["items"], 1):
+            title = item.get("title", "").strip() if isinstance(item, dict) else str(item).strip()
+            if not title:
+                continue
+            news_list.append({
+                "id": f"{result['source']}_{item.get('id', i) if isinstance(item, dict) else i}",
+                "title": title,
+                "url": item.get("url", "") if isinstance(item, dict) else "",
+                "source": result["source"],
+                "source_name": result["source_name"],
+                "rank": i,
+            })
+        return news_list
+
     def collect_news_sync(self, sources: Optional[List[str]] = None, campus_priority: bool = True) -> Dict:
-        """同步版本（方便 FastAPI 非 async 端点调用）"""
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as pool:
-                    return pool.submit(asyncio.run, self.collect_news(sources, campus_priority)).result()
-            return asyncio.run(self.collect_news(sources, campus_priority))
-        except RuntimeError:
-            return asyncio.run(self.collect_news(sources, campus_priority))
+        """同步版本（方便 FastAPI 非 async 端点调用），在常驻后台循环中执行以复用连接池"""
+        from src.crawler.background_loop import run_sync
+        return run_sync(self.collect_news(sources, campus_priority))
 
     @staticmethod
     def get_available_sources() -> List[Dict]:
@@ -161,3 +409,16 @@ class NewsCollector:
             {"id": k, "name": v["name"], "category": v["category"]}
             for k, v in SOURCE_CONFIG.items()
         ]
+
+
+# ─────── 全局共享实例 ───────
+
+_shared_collector: Optional[NewsCollector] = None
+
+
+def get_news_collector() -> NewsCollector:
+    """进程内共享的 NewsCollector（连接池与条件请求缓存跨调用复用；only_new 状态按 consumer 区分）"""
+    global _shared_collector
+    if _shared_collector is None:
+        _shared_collector = NewsCollector()
+    return _shared_collector
@@ -0,0 +1,136 @@
+# src/crawler/output_tailer.py
+"""
+MediaCrawler 输出增量读取器 - 爬取进行中持续读取新写入的 JSON 记录
+
+MediaCrawler 的 JSON 存储每次写入都会重写整个数组文件，但已有条目的顺序和格式不变，
+新条目只会出现在末尾。因此按文件记录"最后一条完整记录之后"的字节偏移，
+下次从该偏移继续解析即可得到新记录，不必整文件 json.loads。
+同样的扫描逻辑也适用于逐行追加的 JSONL 文件。
+
+每次只读取偏移之后的新字节，峰值内存与单次新增量成正比。
+"""
+import codecs
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DECODER = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+
+
+def scan_records(text: str, at_file_start: bool = False) -> Tuple[List[Dict], int]:
+    """
+    从 text 中依次解析完整的 JSON 记录
+
+    Returns:
+        (records, consumed) — consumed 为最后一条完整记录结束处的字符位置；
+        末尾不完整的记录（文件正在写入）留到下次读取
+    """
+    records: List[Dict] = []
+    pos = 0
+    consumed = 0
+    length = len(text)
+
+    if at_file_start:
+        stripped = len(text) - len(text.lstrip())
+        if text[stripped:stripped + 1] == "[":
+            pos = consumed = stripped + 1
+
+    while True:
+        while pos < length and text[pos] in _SEPARATORS:
+            pos += 1
+        if pos >= length or text[pos] == "]":
+            break
+        try:
+            obj, end = _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+        if isinstance(obj, dict):
+            records.append(obj)
+        elif isinstance(obj, list):
+            records.extend(o for o in obj if isinstance(o, dict))
+        pos = consumed = end
+
+    return records, consumed
+
+
+class JsonOutputTailer:
+    """
+    按字节偏移增量读取某个平台的 MediaCrawler 内容输出文件
+
+    Args:
+        json_dirs: 候选输出目录（按顺序查找第一个存在的目录）
+        offsets: 已处理的文件偏移 {文件名: 字节偏移}，会被原地更新（可持久化后下次传入，跨运行续读）
+        dates: 要读取的日期（文件名中的 YYYY-MM-DD），默认当天
+    """
+
+    def __init__(
+        self,
+        json_dirs: Iterable[Path],
+        offsets: Optional[Dict[str, int]] = None,
+        dates: Optional[Iterable[str]] = None,
+    ):
+        self.json_dirs = list(json_dirs)
+        self.offsets: Dict[str, int] = offsets if offsets is not None else {}
+        self.dates = set(dates or [])
+
+    def _files(self) -> List[Path]:
+        json_dir = next((d for d in self.json_dirs if d.exists()), None)
+        if json_dir is None:
+            return []
+        dates = self.dates | {datetime.now().strftime("%Y-%m-%d")}
+        files = set()
+        for date_str in dates:
+            files.update(json_dir.glob(f"*contents*{date_str}*.json"))
+            files.update(json_dir.glob(f"*contents*{date_str}*.jsonl"))
+        return sorted(files)
+
+    def poll(self, final: bool = False) -> List[Dict]:
+        """
+        读取自上次以来新写入的完整记录
+
+        Args:
+            final: 爬取进程已结束。文件变短时，进行中视为正在重写、等待下次读取；
+                   结束后视为文件被替换，从头重新读取
+        """
+        records: List[Dict] = []
+        files = self._files()
+        # 只保留当前仍在读取范围内的文件偏移（往日文件的偏移不再需要）
+        for name in set(self.offsets) - {p.name for p in files}:
+            del self.offsets[name]
+
+        for path in files:
+            offset = self.offsets.get(path.name, 0)
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+
+            if size < offset:
+                if not final:
+                    continue
+                offset = 0
+            if size == offset:
+                continue
+
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    raw = f.read(size - offset)
+            except OSError as e:
+                logger.warning(f"[Tailer] 读取 {path.name} 失败: {e}")
+                continue
+
+            # 末尾可能是写了一半的多字节字符，增量解码器会把它留到下次
+            text = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(raw, final=False)
+            new_records, consumed = scan_records(text, at_file_start=offset == 0)
+            if consumed:
+                self.offsets[path.name] = offset + len(text[:consumed].encode("utf-8"))
+            if new_records:
+                logger.info(f"[Tailer] {path.name}: 新增 {len(new_records)} 条")
+                records.extend(new_records)
+        return records
@@ -0,0 +1,145 @@
+# src/crawler/polling_policy.py
+"""
+自适应轮询策略 - 按来源的变化率、校园相关产出、延迟和错误率调整轮询间隔
+
+每次轮询后用指数滑动平均（EWMA）更新四项指标：
+    change_rate:  新条目占本次返回条目的比例
+    campus_yield: 通过校园相关性过滤的条目比例
+    latency:      请求耗时（秒，含重试）
+    error_rate:   失败（超时 / 错误）的比例
+
+间隔 = 基准间隔 × 变化率因子 × 产出因子 × 错误因子 × 延迟因子，并限制在 [min, max] 之间：
+变化快、校园内容多的来源更频繁地轮询；长期不变、几乎没有校园内容、
+经常失败或很慢的来源逐步降频，请求预算花在真正出现新校园内容的地方。
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+from src.crawler.state_store import load_state, save_state
+
+logger = logging.getLogger(__name__)
+
+POLLING_STATE = "source_polling"
+
+# EWMA 平滑系数：越大越看重最近一次轮询
+EWMA_ALPHA = 0.3
+# 校园产出的参考比例：达到该比例时产出因子为 1
+YIELD_REFERENCE = 0.05
+# 超过该耗时（秒）开始按比例降频
+SLOW_LATENCY = 10.0
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    if previous is None:
+        return value
+    return EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+class SourcePollingPolicy:
+    """
+    自适应轮询策略（状态持久化在 state_store 的 source_polling 中）
+
+    Args:
+        min_interval: 最短轮询间隔（分钟）
+        max_interval: 最长轮询间隔（分钟）
+    """
+
+    def __init__(self, min_interval: float = 5, max_interval: float = 240):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.stats: Dict[str, Dict] = load_state(POLLING_STATE)
+
+    # ─────── 调度 ───────
+
+    def due_sources(self, sources: List[str], now: Optional[datetime] = None) -> List[str]:
+        """到期需要轮询的来源（从未轮询过的来源总是到期）"""
+        now = now or datetime.now()
+        return [s for s in sources if self._next_due(s) <= now]
+
+    def next_due_at(self, sources: List[str]) -> Optional[datetime]:
+        """最早到期的时间"""
+        if not sources:
+            return None
+        return min(self._next_due(s) for s in sources)
+
+    def _next_due(self, source: str) -> datetime:
+        stat = self.stats.get(source)
+        if not stat or not stat.get("next_due_at"):
+            return datetime.min
+        return datetime.fromisoformat(stat["next_due_at"])
+
+    # ─────── 指标更新 ───────
+
+    def record(
+        self,
+        source: str,
+        base_interval: float,
+        success: bool,
+        latency: float,
+        total: int = 0,
+        new: int = 0,
+        campus: int = 0,
+    ) -> Dict:
+        """
+        记录一次轮询结果并重新计算该来源的轮询间隔
+
+        Args:
+            base_interval: 基准间隔（分钟），通常为系统设置的采集频率
+            success: 请求是否成功
+            latency: 请求耗时（秒）
+            total / new / campus: 返回条目数 / 新条目数 / 校园相关条目数
+        """
+        stat = self.stats.setdefault(source, {"polls": 0})
+        stat["polls"] += 1
+        stat["error_rate"] = _ewma(stat.get("error_rate"), 0.0 if success else 1.0)
+        stat["latency"] = _ewma(stat.get("latency"), latency)
+        if success:
+            change = new / total if total else 0.0
+            yield_ = campus / total if total else 0.0
+            stat["change_rate"] = _ewma(stat.get("change_rate"), change)
+            stat["campus_yield"] = _ewma(stat.get("campus_yield"), yield_)
+            stat["campus_new_total"] = stat.get("campus_new_total", 0) + min(new, campus)
+
+        interval = self.compute_interval(stat, base_interval)
+        now = datetime.now()
+        stat["interval_minutes"] = round(interval, 2)
+        stat["last_polled_at"] = now.isoformat(timespec="seconds")
+        stat["next_due_at"] = (now + timedelta(minutes=interval)).isoformat(timespec="seconds")
+        return stat
+
+    def compute_interval(self, stat: Dict, base_interval: float) -> float:
+        change_rate = stat.get("change_rate")
+        campus_yield = stat.get("campus_yield")
+
+        # 变化率 0 → 2 倍间隔，0.5 → 不变，1 → 一半
+        f_change = 2 ** (1 - 2 * change_rate) if change_rate is not None else 1.0
+        # 校园产出 0 → 2 倍间隔，达到参考比例 → 不变，两倍参考比例及以上 → 一半
+        f_yield = (
+            2 ** _clamp(1 - campus_yield / YIELD_REFERENCE, -1, 1)
+            if campus_yield is not None else 1.0
+        )
+        # 持续失败最多退避到 4 倍
+        f_error = 1 + 3 * stat.get("error_rate", 0.0)
+        # 慢源最多降频到 2 倍
+        f_latency = 1 + _clamp((stat.get("latency", 0.0) - SLOW_LATENCY) / SLOW_LATENCY, 0, 1)
+
+        interval = base_interval * f_change * f_yield * f_error * f_latency
+        return _clamp(interval, self.min_interval, self.max_interval)
+
+    def save(self) -> None:
+        save_state(POLLING_STATE, self.stats)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """各来源当前指标（数值保留 3 位小数）"""
+        return {
+            source: {
+                k: round(v, 3) if isinstance(v, float) else v
+                for k, v in stat.items()
+            }
+            for source, stat in self.stats.items()
+        }
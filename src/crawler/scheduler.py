@@ -0,0 +1,504 @@
+# src/crawler/scheduler.py
+"""
+增量采集调度器 - 按系统设置的采集频率持续运行被动采集与关键词爬取
+
+- 每个来源持久化一份水位线（已见条目键 + 最新发布时间），
+  每轮只导入上一轮之后新出现的条目
+- 进程内锁 + 锁文件双重防护，同一时间只会有一轮采集在运行
+  （多个 API worker 同时启动调度器也不会重叠）；运行期间定期刷新锁文件，
+  其他进程只会接管 LOCK_STALE_SECONDS 内没有心跳的锁
+- 手动触发（request_run）只登记请求，由调度线程执行，调用方立即返回
+- 被动采集按来源自适应轮询（见 SourcePollingPolicy），到期的来源单独轮询；
+  关键词爬取仍按采集频率整轮运行
+- 每轮的结果写入运行历史，可通过 API 查询
+"""
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+
+from src.crawler.background_loop import run_sync
+from src.crawler.bulk_importer import compute_content_hash
+from src.crawler.polling_policy import SourcePollingPolicy
+from src.crawler.state_store import (
+    load_state, save_state, acquire_lock, release_lock, refresh_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_STATE = "crawl_watermarks"
+HISTORY_STATE = "crawl_history"
+RUN_LOCK = "crawl_scheduler"
+
+MAX_HISTORY = 50
+# 每个来源保留的已见条目键数量（热榜类来源没有发布时间，只能按条目去重）
+MAX_SEEN_KEYS = 2000
+DEFAULT_INTERVAL_MINUTES = 30
+MIN_INTERVAL_MINUTES = 1
+# 运行期间刷新锁文件的间隔；超过 LOCK_STALE_SECONDS 没有刷新的锁视为持有进程已崩溃
+LOCK_HEARTBEAT_SECONDS = 60
+LOCK_STALE_SECONDS = 10 * 60
+
+
+class CrawlScheduler:
+    """
+    增量采集调度器
+
+    Args:
+        interval_getter: 返回采集间隔（分钟）的函数，每轮重新读取，修改设置后下一轮生效
+        enabled_getter: 返回是否启用自动采集的函数，None 表示始终启用
+        news_sources: 被动采集的新闻源，None 使用全部源
+        keyword_crawl: 是否在每轮中执行关键词深度爬取（需要 MediaCrawler，默认关闭）
+        keyword_platforms: 关键词爬取的平台列表
+        adaptive_polling: 是否按来源自适应轮询新闻源，False 时每轮轮询全部来源
+        min_poll_minutes / max_poll_minutes: 自适应轮询间隔的上下限（分钟）
+    """
+
+    def __init__(
+        self,
+        interval_getter: Callable[[], object],
+        enabled_getter: Optional[Callable[[], bool]] = None,
+        news_sources: Optional[List[str]] = None,
+        keyword_crawl: bool = False,
+        keyword_platforms: Optional[List[str]] = None,
+        adaptive_polling: bool = True,
+        min_poll_minutes: float = 5,
+        max_poll_minutes: float = 240,
+    ):
+        self.interval_getter = interval_getter
+        self.enabled_getter = enabled_getter
+        self.news_sources = news_sources
+        self.keyword_crawl = keyword_crawl
+        self.keyword_platforms = keyword_platforms
+        self.adaptive_polling = adaptive_polling
+        self.polling = SourcePollingPolicy(min_poll_minutes, max_poll_minutes)
+
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._manual_requested = threading.Event()
+        self._request_lock = threading.Lock()
+        self._current_run: Optional[Dict] = None
+        self._next_run_at: Optional[datetime] = None
+
+    # ─────── 生命周期 ───────
+
+    def start(self) -> bool:
+        """启动后台调度线程，已在运行返回 False"""
+        if self.is_running:
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="crawl-scheduler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"[Scheduler] 调度器已启动, 间隔 {self.interval_minutes} 分钟")
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止调度线程（正在运行的一轮会继续跑完）"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+        self._next_run_at = None
+        logger.info("[Scheduler] 调度器已停止")
+
+    def wake(self) -> None:
+        """采集间隔等设置变更后调用，立即重新计算下一轮时间"""
+        self._wake_event.set()
+
+    def request_run(self) -> bool:
+        """
+        请求立即执行一轮手动采集，不等待采集完成
+
+        调度线程在运行时交给它执行；未启动时用一次性后台线程执行。
+        已有一轮在运行或已有待执行的请求时返回 False。
+        """
+        with self._request_lock:
+            if self._run_lock.locked() or self._manual_requested.is_set():
+                return False
+            self._manual_requested.set()
+        if self.is_running:
+            self._wake_event.set()
+        else:
+            threading.Thread(
+                target=self._run_requested, name="crawl-scheduler-manual", daemon=True
+            ).start()
+        return True
+
+    def _run_requested(self) -> None:
+        try:
+            self.run_once(trigger="manual")
+        finally:
+            self._manual_requested.clear()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def interval_minutes(self) -> float:
+        try:
+            minutes = float(self.interval_getter())
+        except (TypeError, ValueError):
+            minutes = DEFAULT_INTERVAL_MINUTES
+        return max(MIN_INTERVAL_MINUTES, minutes)
+
+    @property
+    def news_source_ids(self) -> List[str]:
+        from src.crawler.news_collector import SOURCE_CONFIG
+        return self.news_sources or list(SOURCE_CONFIG.keys())
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            if self._manual_requested.is_set():
+                self._run_requested()
+                continue
+
+            next_run, scope = self._compute_next_run(), "full"
+            if self.adaptive_polling:
+                next_poll = self.polling.next_due_at(self.news_source_ids)
+                if next_poll is not None and next_poll < next_run:
+                    next_run, scope = next_poll, "news"
+            self._next_run_at = next_run
+            wait_seconds = (next_run - datetime.now()).total_seconds()
+
+            if wait_seconds > 0:
+                self._wake_event.wait(wait_seconds)
+                continue  # 被唤醒或等待结束后重新计算，间隔变更即时生效
+
+            if self.enabled_getter is None or self.enabled_getter():
+                self.run_once(trigger="schedule", scope=scope)
+            else:
+                # 自动采集已关闭：按间隔空转，不重复检查
+                self._wake_event.wait(self.interval_minutes * 60)
+
+    def _compute_next_run(self) -> datetime:
+        """上一次整轮采集的开始时间 + 间隔；没有历史时立即运行（重启后不会因此重复采集）"""
+        history = self.get_history(limit=MAX_HISTORY)
+        last = next(
+            (h for h in history if h["status"] != "skipped" and h.get("scope", "full") == "full"),
+            None,
+        )
+        if last is None:
+            return datetime.now()
+        started = datetime.fromisoformat(last["started_at"])
+        return started + timedelta(minutes=self.interval_minutes)
+
+    # ─────── 单轮采集 ───────
+
+    def run_once(self, trigger: str = "manual", scope: str = "full") -> Dict:
+        """
+        执行一轮增量采集；上一轮仍在运行时直接跳过
+
+        Args:
+            trigger: manual 轮询全部新闻源；schedule 在自适应模式下只轮询到期的新闻源
+            scope: full 被动采集 + 关键词爬取；news 只做被动采集
+
+        Returns:
+            本轮运行记录（同时写入运行历史）
+        """
+        run = {
+            "run_id": uuid.uuid4().hex[:12],
+            "trigger": trigger,
+            "scope": scope,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+        if not self._run_lock.acquire(blocking=False):
+            return self._record_skip(run, "上一轮采集仍在运行")
+        try:
+            if not acquire_lock(RUN_LOCK, stale_seconds=LOCK_STALE_SECONDS):
+                return self._record_skip(run, "其他进程正在运行采集")
+            done = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._heartbeat, args=(done,), name="crawl-lock-heartbeat", daemon=True
+            )
+            heartbeat.start()
+            try:
+                self._current_run = run
+                return self._execute(run)
+            finally:
+                self._current_run = None
+                done.set()
+                heartbeat.join()
+                release_lock(RUN_LOCK)
+        finally:
+            self._run_lock.release()
+
+    @staticmethod
+    def _heartbeat(done: threading.Event) -> None:
+        """本轮运行期间定期刷新锁文件，长时间的关键词爬取不会被其他进程当作失效锁接管"""
+        while not done.wait(LOCK_HEARTBEAT_SECONDS):
+            refresh_lock(RUN_LOCK)
+
+    def _execute(self, run: Dict) -> Dict:
+        from src.crawler.crawler_pipeline import CrawlerPipeline
+
+        started = time.perf_counter()
+        watermarks = load_state(WATERMARK_STATE)
+        pipeline = CrawlerPipeline()
+        errors = []
+
+        logger.info(f"[Scheduler] 第 {run['run_id']} 轮采集开始 ({run['trigger']})")
+        sources = self.news_source_ids
+        if self.adaptive_polling and run["trigger"] == "schedule":
+            sources = self.polling.due_sources(sources)
+        try:
+            run["news"] = self._run_news(pipeline, watermarks, sources)
+        except Exception as e:
+            logger.error(f"[Scheduler] 被动采集失败: {e}")
+            run["news"] = {"success": False, "error": str(e)}
+            errors.append(f"news: {e}")
+
+        if self.keyword_crawl and run["scope"] == "full":
+            try:
+                run["keyword_crawl"] = self._run_keyword_crawl(pipeline, watermarks)
+            except Exception as e:
+                logger.error(f"[Scheduler] 关键词爬取失败: {e}")
+                run["keyword_crawl"] = {"success": False, "error": str(e)}
+                errors.append(f"keyword_crawl: {e}")
+
+        save_state(WATERMARK_STATE, watermarks)
+
+        run["status"] = "failed" if errors else "success"
+        if errors:
+            run["error"] = "; ".join(errors)
+        run["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        run["duration_seconds"] = round(time.perf_counter() - started, 2)
+        self._append_history(run)
+        logger.info(
+            f"[Scheduler] 第 {run['run_id']} 轮采集结束: {run['status']}, "
+            f"耗时 {run['duration_seconds']}s"
+        )
+        return run
+
+    def _run_news(self, pipeline, watermarks: Dict, sources: List[str]) -> Dict:
+        """被动采集热点新闻，只导入各来源上一轮之后新出现的条目，并更新各来源轮询指标"""
+        if not sources:
+            return {"success": True, "polled_sources": [], "fetched": 0, "new": 0, "import_result": None}
+
+        collected = run_sync(pipeline.news_collector.collect_news(sources=sources))
+        news_list = collected.get("news_list", [])
+        stats = collected.get("stats", {})
+        unchanged = stats.get("unchanged_sources", 0)
+
+        by_source: Dict[str, List[Dict]] = {}
+        for news in news_list:
+            by_source.setdefault(news["source"], []).append(news)
+
+        staged = copy.deepcopy(watermarks)
+        new_items = []
+        for source, items in by_source.items():
+            source_new = self._filter_new(
+                staged, f"news:{source}", items,
+                key=lambda news: compute_content_hash(news["title"]) or news["title"],
+            )
+            new_items.extend(source_new)
+            by_source[source] = (items, source_new)
+
+        base_interval = self.interval_minutes
+        for source, polled in stats.get("per_source", {}).items():
+            items, source_new = by_source.get(source, ([], []))
+            self.polling.record(
+                source,
+                base_interval=base_interval,
+                success=polled["status"] == "success",
+                latency=polled["elapsed"],
+                total=len(items),
+                new=len(source_new),
+                campus=sum(1 for n in items if pipeline.is_campus_related(n["title"])),
+            )
+        self.polling.save()
+
+        import_result = (
+            pipeline.import_news_to_database(new_items) if new_items else None
+        )
+        # 导入失败时不推进水位线，下一轮重新导入
+        if import_result is None or import_result["success"]:
+            watermarks.update(staged)
+        return {
+            "success": collected.get("success", False),
+            "polled_sources": sources,
+            "fetched": len(news_list),
+            "unchanged_sources": unchanged,
+            "new": len(new_items),
+            "import_result": import_result,
+        }
+
+    def _run_keyword_crawl(self, pipeline, watermarks: Dict) -> Dict:
+        """关键词深度爬取（无头模式），只导入各平台未见过的新内容，按关键词产出分配配额"""
+        from src.crawler.deep_crawler import DeepCrawler, MEDIACRAWLER_DIR
+        from src.crawler.keyword_budget import KeywordBudget
+
+        if not MEDIACRAWLER_DIR.exists():
+            return {"success": False, "skipped": True, "error": "MediaCrawler 未安装"}
+
+        budget = KeywordBudget()
+        result = pipeline.run_keyword_crawling(
+            platforms=self.keyword_platforms,
+            headless=True,
+            import_to_db=False,
+            reuse_browser=True,
+            keyword_budget=budget,
+        )
+        platform_results = result.get("crawl_result", {}).get("platform_results", {})
+
+        staged = copy.deepcopy(watermarks)
+        fetched = 0
+        new_items = []
+        for plat, plat_result in platform_results.items():
+            normalized = DeepCrawler.normalize_items(plat_result.get("items", []), plat)
+            fetched += len(normalized)
+            new_items.extend(self._filter_new(
+                staged, f"deep:{plat}", normalized,
+                key=lambda item: item["id"],
+                time_of=lambda item: _parse_timestamp(item.get("create_time")),
+            ))
+
+        import_result = (
+            pipeline._import_deep_crawl_to_database(new_items, result.get("keywords_used"))
+            if new_items else None
+        )
+        if import_result is None or import_result["success"]:
+            watermarks.update(staged)
+            pipeline.record_keyword_yield(budget, new_items)
+            budget.finish_run()
+        return {
+            "success": result.get("success", False),
+            "fetched": fetched,
+            "new": len(new_items),
+            "import_result": import_result,
+        }
+
+    @staticmethod
+    def _filter_new(
+        watermarks: Dict,
+        source_key: str,
+        items: List[Dict],
+        key: Callable[[Dict], str],
+        time_of: Optional[Callable[[Dict], Optional[float]]] = None,
+    ) -> List[Dict]:
+        """
+        按水位线过滤出新条目，并原地推进水位线
+
+        水位线包含：
+            seen:        最近见过的条目键（有序，最新在后）
+            max_time:    见过的最新发布时间戳（来源提供时间时使用）
+            last_run_at / last_new_at
+        """
+        mark = watermarks.setdefault(source_key, {"seen": [], "max_time": None})
+        seen = set(mark["seen"])
+        max_time = mark.get("max_time")
+
+        new_items = []
+        new_keys = []
+        for item in items:
+            item_key = key(item)
+            if item_key in seen:
+                continue
+            ts = time_of(item) if time_of else None
+            if ts is not None and max_time is not None and ts <= max_time:
+                continue
+            seen.add(item_key)
+            new_keys.append(item_key)
+            new_items.append(item)
+
+        for item in new_items:
+            ts = time_of(item) if time_of else None
+            if ts is not None and (mark.get("max_time") is None or ts > mark["max_time"]):
+                mark["max_time"] = ts
+
+        mark["seen"] = (mark["seen"] + new_keys)[-MAX_SEEN_KEYS:]
+        now = datetime.now().isoformat(timespec="seconds")
+        mark["last_run_at"] = now
+        if new_items:
+            mark["last_new_at"] = now
+        return new_items
+
+    # ─────── 运行历史 / 状态 ───────
+
+    def _record_skip(self, run: Dict, reason: str) -> Dict:
+        logger.info(f"[Scheduler] 跳过本轮采集: {reason}")
+        run.update({
+            "status": "skipped",
+            "error": reason,
+            "finished_at": run["started_at"],
+            "duration_seconds": 0,
+        })
+        self._append_history(run)
+        return run
+
+    @staticmethod
+    def _append_history(run: Dict) -> None:
+        history = load_state(HISTORY_STATE, {"runs": []})
+        history["runs"] = ([run] + history.get("runs", []))[:MAX_HISTORY]
+        save_state(HISTORY_STATE, history)
+
+    @staticmethod
+    def get_history(limit: int = 20) -> List[Dict]:
+        """最近的运行记录（新的在前）"""
+        return load_state(HISTORY_STATE, {"runs": []}).get("runs", [])[:limit]
+
+    def get_status(self) -> Dict:
+        watermarks = load_state(WATERMARK_STATE)
+        return {
+            "running": self.is_running,
+            "busy": self._run_lock.locked(),
+            "run_requested": self._manual_requested.is_set(),
+            "current_run": self._current_run,
+            "enabled": self.enabled_getter() if self.enabled_getter else True,
+            "interval_minutes": self.interval_minutes,
+            "next_run_at": (
+                self._next_run_at.isoformat(timespec="seconds")
+                if self._next_run_at and self.is_running else None
+            ),
+            "keyword_crawl": self.keyword_crawl,
+            "adaptive_polling": self.adaptive_polling,
+            "source_polling": self.polling.snapshot(),
+            "watermarks": {
+                source: {
+                    "seen": len(mark.get("seen", [])),
+                    "max_time": mark.get("max_time"),
+                    "last_run_at": mark.get("last_run_at"),
+                    "last_new_at": mark.get("last_new_at"),
+                }
+                for source, mark in watermarks.items()
+            },
+            "last_run": next(iter(self.get_history(limit=1)), None),
+        }
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    """解析平台返回的发布时间（秒/毫秒时间戳或 ISO 字符串），无法解析返回 None"""
+    if value in (None, ""):
+        return None
+    try:
+        ts = float(value)
+        return ts / 1000 if ts > 1e12 else ts
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("/", "-")).timestamp()
+    except ValueError:
+        return None
+
+
+# ─────── 全局单例 ───────
+
+_scheduler: Optional[CrawlScheduler] = None
+
+
+def get_crawl_scheduler(**kwargs) -> CrawlScheduler:
+    """获取全局调度器（首次调用时用 kwargs 创建）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = CrawlScheduler(**kwargs)
+    return _scheduler
@@ -0,0 +1,98 @@
+# src/crawler/state_store.py
+"""
+采集状态持久化 - 检查点 / 水位线等小型 JSON 状态
+
+每个状态一个文件，写入时先写临时文件再原子替换，
+进程崩溃也不会留下半截 JSON。
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = Path(__file__).resolve().parents[2] / "data" / "crawler_state"
+
+
+def _state_path(name: str) -> Path:
+    return STATE_DIR / f"{name}.json"
+
+
+def load_state(name: str, default: Optional[Dict] = None) -> Dict:
+    """读取状态，不存在或损坏时返回 default"""
+    path = _state_path(name)
+    if not path.exists():
+        return dict(default or {})
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning(f"[StateStore] 读取 {path.name} 失败，使用默认值: {e}")
+        return dict(default or {})
+
+
+def save_state(name: str, data: Dict) -> None:
+    """原子写入状态"""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _state_path(name)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(
+        json.dumps(data, ensure_ascii=False, indent=2, default=str),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def clear_state(name: str) -> None:
+    """删除状态文件"""
+    path = _state_path(name)
+    if path.exists():
+        path.unlink()
+
+
+# ─────── 跨进程锁 ───────
+
+def _lock_path(name: str) -> Path:
+    return STATE_DIR / f"{name}.lock"
+
+
+def acquire_lock(name: str, stale_seconds: float = 6 * 3600) -> bool:
+    """
+    获取跨进程锁（O_EXCL 创建锁文件），已被占用返回 False
+
+    持有进程崩溃后锁文件会残留，超过 stale_seconds 视为失效并接管。
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _lock_path(name)
+    try:
+        if path.exists() and time.time() - path.stat().st_mtime > stale_seconds:
+            logger.warning(f"[StateStore] 锁 {path.name} 已超时，强制释放")
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"pid": os.getpid(), "acquired_at": time.time()}))
+    return True
+
+
+def refresh_lock(name: str) -> None:
+    """刷新锁文件的修改时间（持有者的心跳），避免长时间运行被判定为失效"""
+    try:
+        os.utime(_lock_path(name))
+    except FileNotFoundError:
+        pass
+
+
+def release_lock(name: str) -> None:
+    """释放跨进程锁"""
+    try:
+        _lock_path(name).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,602 @@
+# src/crawler/streaming_pipeline.py
+"""
+流式采集入库管道 - 用有界 asyncio 队列串联的多阶段管道
+
+collector → normalize → campus_filter → dedup → analyze → write
+
+- 阶段之间是有界队列，下游变慢时上游的 await put 会阻塞（背压），
+  内存占用只与队列容量有关，与采集总量无关
+- 每个阶段可单独配置并发数，阶段内按 micro-batch 处理：
+  凑满 batch_size 或等待超过 flush_interval 就向下游推进，
+  采集开始几秒后第一批数据即可入库
+- analyze 在进程池中运行；dedup / write 的数据库操作放到线程里，
+  不阻塞事件循环
+- write 在同一事务中写入记录、标签子表和高风险预警，不会出现有记录没预警的情况
+
+失败处理: 某阶段处理一批失败时先重试 STAGE_RETRIES 次，仍失败则把这批条目写入死信
+（state_store 中的 streaming_dead_letter，各管道可指定自己的死信名），撤销其去重标记与待定近重复簇，
+本次运行 success=False。下次运行开始时先重放死信条目，每个条目最多重放 MAX_REPLAY_ATTEMPTS 次。
+
+数据源可以是任意异步迭代器；同步线程（如深度爬取的各平台线程）通过 ThreadFeed 投递条目。
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from src.crawler.bulk_importer import (
+    BulkImporter, ALERT_RISK_LEVELS, build_alert_row, compute_content_hash,
+)
+from src.crawler.state_store import load_state, save_state
+from src.services.response_cache import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["normalize", "campus_filter", "dedup", "analyze", "write"]
+
+DEFAULT_CONCURRENCY = {
+    "normalize": 1,
+    "campus_filter": 1,
+    "dedup": 1,
+    "analyze": 2,
+    "write": 1,
+}
+
+# 本次运行内的去重键最多保留条数（只是数据库查重前的快速路径，淘汰后由 drop_known 兜底）
+SEEN_LIMIT = 100000
+# 阶段处理失败后的重试次数与间隔（秒）
+STAGE_RETRIES = 1
+RETRY_DELAY = 1.0
+
+DEAD_LETTER_STATE = "streaming_dead_letter"
+# 死信最多保留的条目数，超出时丢弃最早的
+DEAD_LETTER_LIMIT = 5000
+MAX_REPLAY_ATTEMPTS = 3
+# 重放条目上的标记字段
+_REPLAY = "_replay"
+_ATTEMPTS = "_replay_attempts"
+# 入库前重新计算的字段，不写入死信
+_DERIVED_FIELDS = ("content_hash", "cluster_size")
+
+_dead_letter_lock = threading.Lock()
+
+# 队列结束标记
+_DONE = object()
+
+
+class StageMetrics:
+    """单个阶段的运行指标"""
+
+    def __init__(self, name: str, queue: asyncio.Queue, concurrency: int):
+        self.name = name
+        self.queue = queue
+        self.concurrency = concurrency
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def observe_queue(self) -> None:
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def to_dict(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_capacity": self.queue.maxsize,
+        }
+
+
+class StreamingPipeline:
+    """
+    流式采集入库管道
+
+    Args:
+        normalize: 原始条目 → BulkImporter 入库条目（返回 None 表示丢弃）
+        campus_filter: 校园相关性判断函数，None 表示不过滤
+        concurrency: 各阶段并发数，未指定的阶段使用 DEFAULT_CONCURRENCY
+        queue_size: 每个阶段输入队列的容量
+        batch_size: 阶段内 micro-batch 的最大条数
+        flush_interval: micro-batch 最长等待秒数
+        analyze_workers: 分析进程池大小
+        on_written: 每批写入提交后的回调，参数为已写入的 (条目, 分析结果) 列表
+        dead_letter_state: 死信在 state_store 中的名称，归一化方式不同的管道应各用各的
+    """
+
+    def __init__(
+        self,
+        normalize: Callable[[Dict], Optional[Dict]],
+        campus_filter: Optional[Callable[[str], bool]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        queue_size: int = 500,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        analyze_workers: int = 2,
+        on_written: Optional[Callable[[List[Tuple[Dict, Dict]]], None]] = None,
+        dead_letter_state: str = DEAD_LETTER_STATE,
+    ):
+        self.normalize = normalize
+        self.campus_filter = campus_filter
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.analyze_workers = max(1, analyze_workers)
+        self.on_written = on_written
+        self.dead_letter_state = dead_letter_state
+
+        self.metrics: Dict[str, StageMetrics] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._seen: "OrderedDict[tuple, None]" = OrderedDict()
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.collected = 0
+        self.replayed = 0
+        self.skipped_not_campus = 0
+        self.skipped_duplicates = 0
+        self.near_duplicates = 0
+        self.imported = 0
+        self.alerts_created = 0
+        self.dead_lettered = 0
+        self._started_at = None
+        self._first_write_at = None
+
+    # ─────── 运行 ───────
+
+    async def run(self, source: AsyncIterator[Dict]) -> Dict:
+        """先重放上次的死信条目，再消费 source 直到耗尽，返回统计结果与各阶段指标"""
+        self._reset_counters()
+        self._seen = OrderedDict()
+        self._started_at = time.perf_counter()
+        replay = await asyncio.to_thread(self._take_dead_letters)
+
+        queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in STAGES}
+        self.metrics = {
+            name: StageMetrics(name, queues[name], self.concurrency[name])
+            for name in STAGES
+        }
+        handlers = {
+            "normalize": self._normalize,
+            "campus_filter": self._filter,
+            "dedup": self._dedup,
+            "analyze": self._analyze,
+            "write": self._write,
+        }
+
+        self._pool = ProcessPoolExecutor(max_workers=self.analyze_workers)
+        tasks = [asyncio.create_task(self._collect(source, queues["normalize"], replay))]
+        for i, name in enumerate(STAGES):
+            out_q = queues[STAGES[i + 1]] if i + 1 < len(STAGES) else None
+            tasks.append(asyncio.create_task(
+                self._run_stage(name, handlers[name], queues[name], out_q)
+            ))
+
+        try:
+            await asyncio.gather(*tasks)
+            failed = [name for name, m in self.metrics.items() if m.errors]
+            success = not failed
+            error = f"阶段处理失败: {', '.join(failed)}（已写入死信，下次运行重放）" if failed else None
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.error(f"[StreamingPipeline] 管道异常终止: {e}")
+            success, error = False, str(e)
+        finally:
+            self._pool.shutdown()
+            self._pool = None
+
+        result = {"success": success, **self.get_metrics()}
+        if error:
+            result["error"] = error
+        logger.info(
+            f"[StreamingPipeline] 完成: 采集 {self.collected} 条, 入库 {self.imported} 条, "
+            f"非校园 {self.skipped_not_campus} 条, 重复 {self.skipped_duplicates} 条, "
+            f"近重复 {self.near_duplicates} 条, "
+            f"预警 {self.alerts_created} 条, 重放 {self.replayed} 条, 死信 {self.dead_lettered} 条, "
+            f"耗时 {result['duration_seconds']}s"
+        )
+        return result
+
+    def get_metrics(self) -> Dict:
+        """当前运行统计（运行中也可调用）"""
+        now = time.perf_counter()
+        started = self._started_at or now
+        return {
+            "collected": self.collected,
+            "replayed": self.replayed,
+            "skipped_not_campus": self.skipped_not_campus,
+            "skipped_duplicates": self.skipped_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "imported": self.imported,
+            "alerts_created": self.alerts_created,
+            "dead_lettered": self.dead_lettered,
+            "first_write_seconds": (
+                round(self._first_write_at - started, 2)
+                if self._first_write_at else None
+            ),
+            "duration_seconds": round(now - started, 2),
+            "stages": {name: m.to_dict() for name, m in self.metrics.items()},
+        }
+
+    async def _collect(
+        self, source: AsyncIterator[Dict], out_q: asyncio.Queue, replay: List[Dict]
+    ) -> None:
+        try:
+            for item in replay:
+                self.replayed += 1
+                await out_q.put(item)
+            async for item in source:
+                self.collected += 1
+                await out_q.put(item)
+                self.metrics["normalize"].observe_queue()
+        finally:
+            await out_q.put(_DONE)
+
+    async def _run_stage(
+        self,
+        name: str,
+        handler: Callable,
+        in_q: asyncio.Queue,
+        out_q: Optional[asyncio.Queue],
+    ) -> None:
+        metrics = self.metrics[name]
+
+        async def worker():
+            while True:
+                metrics.observe_queue()
+                batch, done = await self._next_batch(in_q)
+                if batch:
+                    metrics.items_in += len(batch)
+                    metrics.batches += 1
+                    started = time.perf_counter()
+                    try:
+                        outputs = await self._handle_with_retry(name, handler, batch)
+                    except Exception as e:
+                        metrics.errors += 1
+                        logger.error(f"[StreamingPipeline] {name} 阶段处理失败，{len(batch)} 条转入死信: {e}")
+                        await asyncio.to_thread(self._dead_letter, name, batch, e)
+                        outputs = []
+                    metrics.busy_seconds += time.perf_counter() - started
+                    metrics.items_out += len(outputs)
+                    if out_q is not None:
+                        for out in outputs:
+                            await out_q.put(out)
+                if done:
+                    # 把结束标记放回去，通知同阶段的其他 worker
+                    await in_q.put(_DONE)
+                    return
+
+        await asyncio.gather(*(worker() for _ in range(metrics.concurrency)))
+        if out_q is not None:
+            await out_q.put(_DONE)
+
+    @staticmethod
+    async def _handle_with_retry(name: str, handler: Callable, batch: List) -> List:
+        """各阶段处理均可安全重试：dedup 成功后才记录去重键，write 失败会整体回滚"""
+        for attempt in range(STAGE_RETRIES + 1):
+            try:
+                return await handler(batch)
+            except Exception as e:
+                if attempt >= STAGE_RETRIES:
+                    raise
+                logger.warning(f"[StreamingPipeline] {name} 阶段处理失败，{RETRY_DELAY}s 后重试: {e}")
+                await asyncio.sleep(RETRY_DELAY)
+
+    async def _next_batch(self, queue: asyncio.Queue) -> Tuple[List, bool]:
+        """取一个 micro-batch，返回 (batch, 上游是否已结束)"""
+        item = await queue.get()
+        if item is _DONE:
+            return [], True
+
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    # ─────── 各阶段处理 ───────
+
+    async def _normalize(self, batch: List[Dict]) -> List[Dict]:
+        normalized = []
+        for item in batch:
+            if item.get(_REPLAY):
+                # 重放的条目已经归一化过
+                normalized.append(item)
+                continue
+            prepared = self.normalize(item)
+            if prepared is None:
+                continue
+            if _ATTEMPTS in item:
+                prepared[_ATTEMPTS] = item[_ATTEMPTS]
+            normalized.append(prepared)
+        return normalized
+
+    async def _filter(self, batch: List[Dict]) -> List[Dict]:
+        if self.campus_filter is None:
+            return batch
+        kept = [
+            item for item in batch
+            if item.get(_REPLAY) or self.campus_filter(item["content"])
+        ]
+        self.skipped_not_campus += len(batch) - len(kept)
+        return kept
+
+    async def _dedup(self, batch: List[Dict]) -> List[Dict]:
+        unseen = []
+        keys = set()
+        for item in batch:
+            item["content_hash"] = compute_content_hash(item["content"])
+            if not item["content_hash"]:
+                unseen.append(item)
+                continue
+            key = (item["source"], item["content_hash"])
+            if key in self._seen or key in keys:
+                continue
+            keys.add(key)
+            unseen.append(item)
+
+        fresh, folded = await asyncio.to_thread(self._drop_known, unseen) if unseen else ([], 0)
+        # 查重成功后才记录去重键，失败重试或转入死信时不会被误判为重复
+        for key in keys:
+            self._remember(key)
+        self.skipped_duplicates += len(batch) - len(fresh) - folded
+        self.near_duplicates += folded
+        return fresh
+
+    async def _analyze(self, batch: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        from src.sentiment.fast_analyzer import analyze_batch
+
+        loop = asyncio.get_running_loop()
+        analyses = await loop.run_in_executor(
+            self._pool, analyze_batch, [item["content"] for item in batch]
+        )
+        return list(zip(batch, analyses))
+
+    async def _write(self, batch: List[Tuple[Dict, Dict]]) -> List[Dict]:
+        written, alerts, duplicates = await asyncio.to_thread(self._write_records, batch)
+        self.imported += len(written)
+        self.alerts_created += alerts
+        self.skipped_duplicates += duplicates
+        if written and self._first_write_at is None:
+            self._first_write_at = time.perf_counter()
+        if written and self.on_written is not None:
+            try:
+                self.on_written(written)
+            except Exception as e:
+                # 记录已提交，回调失败不影响入库，也不重试写入
+                logger.warning(f"[StreamingPipeline] on_written 回调失败: {e}")
+        return []
+
+    # ─────── 去重键与死信 ───────
+
+    def _remember(self, key: tuple) -> None:
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > SEEN_LIMIT:
+            self._seen.popitem(last=False)
+
+    def _dead_letter(self, stage: str, batch: List, error: Exception) -> None:
+        """失败批次转入死信：撤销去重键与待定近重复簇，条目持久化等待下次重放"""
+        from src.crawler.near_duplicate import get_near_duplicate_index
+
+        items = [entry[0] if isinstance(entry, tuple) else entry for entry in batch]
+        normalized = stage != "normalize"
+        if normalized:
+            for item in items:
+                if item.get("content_hash"):
+                    self._seen.pop((item["source"], item["content_hash"]), None)
+            get_near_duplicate_index().discard(items)
+
+        entries = []
+        for item in items:
+            attempts = item.get(_ATTEMPTS, 0) + 1
+            if attempts > MAX_REPLAY_ATTEMPTS:
+                logger.error(
+                    f"[StreamingPipeline] 条目已重放 {MAX_REPLAY_ATTEMPTS} 次仍失败，放弃: "
+                    f"{str(item.get('content', item.get('title', '')))[:50]}"
+                )
+                continue
+            payload = {
+                key: (value.value if isinstance(value, Enum) else value)
+                for key, value in item.items()
+                if key not in _DERIVED_FIELDS and key not in (_REPLAY, _ATTEMPTS)
+            }
+            entries.append({
+                "stage": stage,
+                "normalized": normalized,
+                "attempts": attempts,
+                "error": str(error)[:200],
+                "failed_at": datetime.now().isoformat(),
+                "item": payload,
+            })
+
+        self.dead_lettered += len(entries)
+        if not entries:
+            return
+        with _dead_letter_lock:
+            state = load_state(self.dead_letter_state, {"entries": []})
+            merged = state.get("entries", []) + entries
+            if len(merged) > DEAD_LETTER_LIMIT:
+                logger.warning(
+                    f"[StreamingPipeline] 死信超过 {DEAD_LETTER_LIMIT} 条，丢弃最早的 "
+                    f"{len(merged) - DEAD_LETTER_LIMIT} 条"
+                )
+                merged = merged[-DEAD_LETTER_LIMIT:]
+            save_state(self.dead_letter_state, {"entries": merged})
+
+    def _take_dead_letters(self) -> List[Dict]:
+        """取出并清空死信，返回待重放的条目（归一化过的条目带重放标记）"""
+        from src.database.models import DataSource
+
+        with _dead_letter_lock:
+            entries = load_state(self.dead_letter_state, {"entries": []}).get("entries", [])
+            if entries:
+                save_state(self.dead_letter_state, {"entries": []})
+
+        items = []
+        for entry in entries:
+            item = dict(entry["item"])
+            item[_ATTEMPTS] = entry.get("attempts", 1)
+            if entry.get("normalized"):
+                item[_REPLAY] = True
+                item["source"] = DataSource(item["source"])
+            items.append(item)
+        if items:
+            logger.info(f"[StreamingPipeline] 重放 {len(items)} 条死信条目")
+        return items
+
+    # ─────── 数据库操作（在线程中执行） ───────
+
+    @staticmethod
+    def _drop_known(items: List[Dict]) -> Tuple[List[Dict], int]:
+        """去掉已入库的内容并做近重复聚类，返回 (簇代表条目, 并入已有簇的条目数)"""
+        from src.database.connection import SessionLocal
+
+        session = SessionLocal()
+        try:
+            fresh = BulkImporter.drop_known(session, items)
+            representatives, bumped = BulkImporter.fold_near_duplicates(session, fresh)
+            session.commit()
+            if bumped:
+                bump_data_version()
+            return representatives, len(fresh) - len(representatives)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _write_records(pairs: List[Tuple[Dict, Dict]]) -> Tuple[List[Tuple[Dict, Dict]], int, int]:
+        """记录、标签与预警在同一事务中写入，返回 (已写入的条目, 创建预警数, 写入前发现的重复数)"""
+        from src.crawler.near_duplicate import get_near_duplicate_index
+        from src.database.connection import SessionLocal
+
+        index = get_near_duplicate_index()
+        items = [item for item, _ in pairs]
+        duplicates = 0
+        session = SessionLocal()
+        try:
+            try:
+                record_ids = StreamingPipeline._insert_pairs(session, pairs)
+            except IntegrityError:
+                # 其他导入进程抢先写入了相同内容：回滚后去掉已存在的条目重试一次
+                session.rollback()
+                fresh = {id(item) for item in BulkImporter.drop_known(session, items)}
+                index.discard([item for item in items if id(item) not in fresh])
+                duplicates = len(pairs) - len(fresh)
+                pairs = [p for p in pairs if id(p[0]) in fresh]
+                record_ids = StreamingPipeline._insert_pairs(session, pairs)
+            session.commit()
+            BulkImporter.bind_clusters(session, [item for item, _ in pairs], record_ids)
+            bump_data_version()
+            alerts = sum(1 for _, analysis in pairs if analysis["risk_level"] in ALERT_RISK_LEVELS)
+            return pairs, alerts, duplicates
+        except Exception:
+            # 待定近重复簇保留到重试结束，仍失败时由死信处理撤销
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _insert_pairs(session, pairs: List[Tuple[Dict, Dict]]) -> List[int]:
+        """插入记录、标签子表与预警（不提交）"""
+        from src.database.models import Alert
+        from src.services.record_terms import insert_record_terms
+
+        if not pairs:
+            return []
+        now = datetime.now()
+        rows = [BulkImporter.build_record_row(item, analysis, now) for item, analysis in pairs]
+        record_ids = BulkImporter.insert_records(session, rows)
+        insert_record_terms(session, record_ids, rows)
+
+        alert_rows = [
+            build_alert_row(record_id, item["content"], analysis, now)
+            for record_id, (item, analysis) in zip(record_ids, pairs)
+            if analysis["risk_level"] in ALERT_RISK_LEVELS
+        ]
+        if alert_rows:
+            session.execute(insert(Alert.__table__), alert_rows)
+        return record_ids
+
+
+class ThreadFeed:
+    """
+    供同步线程投递条目的管道数据源
+
+    put() 在调用线程中阻塞到这批条目进入有界队列为止，下游变慢时背压一直传到投递线程；
+    close() 后迭代结束。管道提前结束时调用 stop()：积压条目被丢弃，之后的 put() 抛出异常，
+    调用方据此知道这批条目没有被处理。
+
+    Args:
+        loop: 运行管道的事件循环
+        maxsize: 队列中最多积压的批次数
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 20):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._stopped = False
+
+    def put(self, items: List[Dict]) -> None:
+        if self._stopped:
+            raise RuntimeError("流式管道已停止，条目未处理")
+        if items:
+            asyncio.run_coroutine_threadsafe(self._queue.put(list(items)), self._loop).result()
+        if self._stopped:
+            raise RuntimeError("流式管道已停止，条目未处理")
+
+    def close(self) -> None:
+        if not self._stopped:
+            asyncio.run_coroutine_threadsafe(self._queue.put(_DONE), self._loop).result()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self) -> None:
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def _iterate(self) -> AsyncIterator[Dict]:
+        while True:
+            batch = await self._queue.get()
+            if batch is _DONE:
+                return
+            for item in batch:
+                yield item
+
+    def __aiter__(self) -> AsyncIterator[Dict]:
+        return self._iterate()
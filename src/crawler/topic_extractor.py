@@ -2,9 +2,17 @@
 """
 AI话题提取器 - 吸收自 BettaFish MindSpider/BroadTopicExtraction/topic_extractor.py
 基于 DeepSeek LLM 从热点新闻中提取校园相关话题和关键词
+
+默认关键词由离线引擎（jieba + 语料 IDF + TextRank，见 keyword_engine.py）提取，毫秒级完成，
+LLM 只负责撰写分析总结；LLM 变慢或不可用时关键词照常产出，管道不受影响。
+
+keyword_mode="llm" 时关键词也由 LLM 提取。新闻较多时采用 map-reduce：按 token 预算把新闻切成若干块，
+并发地逐块提取关键词（map），再合并打分并用一次小的 LLM 调用排序、撰写总结（reduce）。
+所有新闻都会被覆盖，耗时主要取决于单块大小，不随新闻总量线性增长。
 """
 import json
 import re
+import time
 from typing import List, Dict, Tuple
 import logging
 
@@ -12,19 +20,42 @@ from src.config import get_deepseek_llm
 
 logger = logging.getLogger(__name__)
 
+# 单块新闻文本的 token 预算（按 1 个字符约 1 个 token 保守估计，约 120 条标题）
+CHUNK_TOKEN_BUDGET = 4000
+# map 阶段最大并发 LLM 调用数
+MAP_CONCURRENCY = 8
+# 每块提取的关键词数
+MAP_KEYWORDS_PER_CHUNK = 30
+
+# LLM 未给出总结时的占位文本
+_DEFAULT_SUMMARY = "分析结果已生成。"
+
 
 class TopicExtractor:
     """
     AI 话题提取器
 
     设计模式吸收自 BettaFish TopicExtractor：
-    - LLM 驱动的关键词提取
+    - 离线关键词引擎 / LLM 驱动的关键词提取
     - JSON 结构化输出 + 多层 fallback 解析
     - 校园舆情场景定制 prompt
+
+    Args:
+        keyword_mode: "local" 离线引擎提取关键词（默认），"llm" 由 LLM 提取
+        chunk_tokens: 单次 LLM 调用的新闻文本 token 预算
+        max_concurrency: map 阶段最大并发 LLM 调用数
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        keyword_mode: str = "local",
+        chunk_tokens: int = CHUNK_TOKEN_BUDGET,
+        max_concurrency: int = MAP_CONCURRENCY,
+    ):
         self.llm = get_deepseek_llm()
+        self.keyword_mode = keyword_mode
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
 
     # ────────── 核心能力 ──────────
 
@@ -34,6 +65,9 @@ class TopicExtractor:
         """
         从新闻列表中提取校园相关关键词和分析总结
 
+        默认由离线引擎提取关键词、LLM 只写总结（未安装 jieba 时回退到 LLM 提取）；
+        LLM 提取模式下新闻文本超过单块 token 预算时自动走 map-reduce（见 _map_reduce）。
+
         Args:
             news_list: [{title, source_name, ...}, ...]
             max_keywords: 最大关键词数
@@ -44,6 +78,16 @@ class TopicExtractor:
         if not news_list:
             return [], "暂无热点新闻数据"
 
+        if self.keyword_mode == "local":
+            try:
+                return self._extract_local(news_list, max_keywords)
+            except ImportError:
+                logger.warning("[TopicExtractor] 未安装 jieba，关键词改由 LLM 提取")
+
+        chunks = self._chunk_news(news_list)
+        if len(chunks) > 1:
+            return self._map_reduce(news_list, chunks, max_keywords)
+
         news_text = self._build_news_text(news_list)
         prompt = self._build_prompt(news_text, max_keywords)
 
@@ -73,15 +117,212 @@ class TopicExtractor:
                 result.append(kw)
         return result[:limit]
 
+    # ────────── 离线关键词 + LLM 总结 ──────────
+
+    def _extract_local(self, news_list: List[Dict], max_keywords: int) -> Tuple[List[str], str]:
+        from src.crawler.keyword_engine import get_keyword_engine
+
+        engine = get_keyword_engine()
+        start = time.perf_counter()
+        keywords = engine.extract((n.get("title", "") for n in news_list), max_keywords)
+        logger.info(
+            f"[TopicExtractor] 离线提取 {len(keywords)} 个关键词，"
+            f"{len(news_list)} 条新闻耗时 {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return keywords, self._summarize(news_list, keywords)
+
+    def _summarize(self, news_list: List[Dict], keywords: List[str]) -> str:
+        """
+        LLM 撰写分析总结
+
+        输入为热点关键词和命中关键词最多的新闻（限制在单块 token 预算内），
+        耗时与新闻总量无关；调用失败时返回基于关键词的简要总结。
+        """
+        top = keywords[:20]
+        ranked = sorted(
+            enumerate(news_list, 1),
+            key=lambda pair: sum(kw in pair[1].get("title", "") for kw in top),
+            reverse=True,
+        )
+        lines, used = [], 0
+        for i, n in ranked:
+            line = self._format_news_line(i, n)
+            if used + len(line) + 1 > self.chunk_tokens:
+                break
+            lines.append(line)
+            used += len(line) + 1
+
+        try:
+            response = self.llm.invoke(self._build_summary_prompt(top, "\n".join(lines)))
+            content = response.content if hasattr(response, "content") else str(response)
+            _, summary = self._parse_result(content)
+            if summary and summary != _DEFAULT_SUMMARY:
+                return summary
+        except Exception as e:
+            logger.error(f"[TopicExtractor] 总结生成失败: {e}")
+        return f"今日热点关键词：{'、'.join(top[:10])}。AI 分析总结暂时不可用。"
+
+    def _build_summary_prompt(self, keywords: List[str], news_text: str) -> str:
+        return f"""你是一位校园舆情分析专家。以下是今日热点新闻中提取出的关键词和代表性新闻。
+
+=== 热点关键词 ===
+{"、".join(keywords)}
+
+=== 代表性新闻 ===
+{news_text}
+
+请撰写新闻分析总结（150-300字）：
+- 概括今日社会热点与校园舆情的关联
+- 指出需要关注的潜在风险话题
+- 语言客观简洁
+
+请严格按照以下JSON格式输出，不要包含其他文字：
+```json
+{{
+  "summary": "分析总结内容..."
+}}
+```"""
+
+    # ────────── map-reduce ──────────
+
+    def _chunk_news(self, news_list: List[Dict]) -> List[List[str]]:
+        """把新闻格式化为行并按 token 预算切块（行号全局连续）"""
+        chunks: List[List[str]] = [[]]
+        used = 0
+        for i, n in enumerate(news_list, 1):
+            line = self._format_news_line(i, n)
+            cost = len(line) + 1
+            if chunks[-1] and used + cost > self.chunk_tokens:
+                chunks.append([])
+                used = 0
+            chunks[-1].append(line)
+            used += cost
+        return chunks
+
+    def _map_reduce(
+        self, news_list: List[Dict], chunks: List[List[str]], max_keywords: int
+    ) -> Tuple[List[str], str]:
+        logger.info(f"[TopicExtractor] {len(news_list)} 条新闻分为 {len(chunks)} 块，map-reduce 提取")
+
+        # map：并发逐块提取，单块失败不影响其他块
+        prompts = [self._build_map_prompt("\n".join(lines)) for lines in chunks]
+        responses = self.llm.batch(
+            prompts, config={"max_concurrency": self.max_concurrency}, return_exceptions=True
+        )
+
+        chunk_results: List[Tuple[List[str], str]] = []
+        failed = 0
+        for lines, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                failed += 1
+                logger.warning(f"[TopicExtractor] map 块失败: {response}")
+                chunk_results.append((self._fallback_keywords_from_lines(lines), ""))
+                continue
+            content = response.content if hasattr(response, "content") else str(response)
+            chunk_results.append(self._parse_result(content))
+        if failed == len(chunks):
+            return self._fallback_keywords(news_list), "AI话题提取暂时不可用，已使用标题关键词替代。"
+
+        candidates = self._merge_chunk_keywords([kw for kw, _ in chunk_results])
+        highlights = [
+            summary for _, summary in chunk_results if summary and summary != _DEFAULT_SUMMARY
+        ]
+
+        # reduce：对合并后的候选词排序并撰写总结，输入只有候选词和各块要点，规模与新闻总量无关
+        try:
+            response = self.llm.invoke(
+                self._build_reduce_prompt(candidates[:max_keywords * 2], highlights, max_keywords)
+            )
+            content = response.content if hasattr(response, "content") else str(response)
+            keywords, summary = self._parse_result(content)
+        except Exception as e:
+            logger.error(f"[TopicExtractor] reduce 调用失败，使用合并排序结果: {e}")
+            keywords, summary = [], ""
+
+        if not keywords:
+            keywords = [kw for kw, _ in candidates]
+        if not summary or summary == _DEFAULT_SUMMARY:
+            summary = "；".join(highlights)[:300] or _DEFAULT_SUMMARY
+
+        logger.info(
+            f"[TopicExtractor] map-reduce 提取 {len(keywords)} 个关键词"
+            f"（{len(chunks)} 块, 失败 {failed} 块）"
+        )
+        return keywords[:max_keywords], summary
+
+    @staticmethod
+    def _merge_chunk_keywords(chunk_keywords: List[List[str]]) -> List[Tuple[str, float]]:
+        """
+        合并各块关键词并打分：块内排名越靠前得分越高，在多个块中出现的词累加得分
+
+        Returns:
+            [(关键词, 得分), ...]，按得分降序
+        """
+        scores: Dict[str, float] = {}
+        for keywords in chunk_keywords:
+            for rank, kw in enumerate(keywords):
+                scores[kw] = scores.get(kw, 0.0) + 1.0 / (1 + rank * 0.1)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _build_map_prompt(self, news_text: str) -> str:
+        return f"""你是一位校园舆情分析专家。以下是今日热点新闻的一部分：
+
+{news_text}
+
+请提取其中与大学生、校园生活、就业、学业、心理健康相关的舆情监测关键词（最多{MAP_KEYWORDS_PER_CHUNK}个），
+关键词应适合在微博、知乎、贴吧等平台搜索，按热度从高到低排列；
+并用一句话（不超过60字）概括这部分新闻中与校园相关的要点。
+
+请严格按照以下JSON格式输出，不要包含其他文字：
+```json
+{{
+  "keywords": ["关键词1", "关键词2", ...],
+  "summary": "一句话要点"
+}}
+```"""
+
+    def _build_reduce_prompt(
+        self, candidates: List[Tuple[str, float]], highlights: List[str], max_keywords: int
+    ) -> str:
+        candidate_text = "\n".join(f"{kw}（{score:.1f}）" for kw, score in candidates)
+        highlight_text = "\n".join(f"- {h}" for h in highlights)
+        return f"""你是一位校园舆情分析专家。今日热点新闻已分块分析，下面是各块提取的候选关键词（括号内为合并后的热度得分）和各块要点。
+
+=== 候选关键词 ===
+{candidate_text}
+
+=== 各块要点 ===
+{highlight_text}
+
+=== 任务 ===
+
+任务1：从候选关键词中选出最多{max_keywords}个校园舆情监测关键词
+- 合并同义或重复的关键词
+- 按热度和校园相关性从高到低排列
+
+任务2：根据各块要点撰写新闻分析总结（150-300字）
+- 概括今日社会热点与校园舆情的关联
+- 指出需要关注的潜在风险话题
+- 语言客观简洁
+
+请严格按照以下JSON格式输出，不要包含其他文字：
+```json
+{{
+  "keywords": ["关键词1", "关键词2", ...],
+  "summary": "分析总结内容..."
+}}
+```"""
+
     # ────────── 内部方法 ──────────
 
+    @staticmethod
+    def _format_news_line(index: int, news: Dict) -> str:
+        title = re.sub(r"[#@]", "", news.get("title", "")).strip()
+        src = news.get("source_name", news.get("source", ""))
+        return f"{index}. 【{src}】{title}"
+
     def _build_news_text(self, news_list: List[Dict]) -> str:
-        lines = []
-        for i, n in enumerate(news_list[:200], 1):  # 限制 200 条避免 token 过长
-            title = re.sub(r"[#@]", "", n.get("title", "")).strip()
-            src = n.get("source_name", n.get("source", ""))
-            lines.append(f"{i}. 【{src}】{title}")
-        return "\n".join(lines)
+        return "\n".join(self._format_news_line(i, n) for i, n in enumerate(news_list, 1))
 
     def _build_prompt(self, news_text: str, max_keywords: int) -> str:
         return f"""你是一位校园舆情分析专家。请分析以下热点新闻，完成两个任务：
@@ -127,7 +368,7 @@ class TopicExtractor:
                 if k not in seen:
                     seen.add(k)
                     unique_kw.append(k)
-            return unique_kw, summary or "分析结果已生成。"
+            return unique_kw, summary or _DEFAULT_SUMMARY
         except json.JSONDecodeError:
             logger.warning("[TopicExtractor] JSON解析失败，尝试手动提取")
             return self._manual_parse(text)
@@ -145,8 +386,19 @@ class TopicExtractor:
                 break
         return keywords[:60], summary or "热点新闻分析结果。"
 
+    def _fallback_keywords_from_lines(self, lines: List[str]) -> List[str]:
+        """单块 map 失败时，从该块的新闻行中提取简单关键词"""
+        titles = [{"title": re.sub(r"^\d+\. 【.*?】", "", line)} for line in lines]
+        return self._fallback_keywords(titles)
+
     def _fallback_keywords(self, news_list: List[Dict]) -> List[str]:
-        """备用：从标题中提取简单关键词"""
+        """备用：从标题中提取关键词（优先离线引擎，未安装 jieba 时按空白切分）"""
+        try:
+            from src.crawler.keyword_engine import get_keyword_engine
+            return get_keyword_engine().extract((n.get("title", "") for n in news_list), 30)
+        except ImportError:
+            pass
+
         stopwords = {"的", "了", "在", "和", "与", "或", "但", "是", "有", "被", "将", "已", "正在", "不", "也", "都"}
         keywords = []
         for n in news_list[:50]:
@@ -5,12 +5,15 @@
 自动将学校相关信息替换为目标学校（参见 knowledge_docs/school_config.py）
 """
 import os
+import re
 import sys
+import time
 from pathlib import Path
 from langchain_community.document_loaders import TextLoader, DirectoryLoader
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.document_loaders import Docx2txtLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from src.config import CHROMA_PERSIST_DIR
@@ -37,16 +40,36 @@ SUPPORTED_EXTENSIONS = {
 }
 
 
+def _compile_replacements(replacements: dict):
+    """
+    将替换规则编译为单个正则交替式
+
+    按原文长度降序排列，保证最长匹配优先（如 "原城市市" 优先于 "原城市"），
+    这样每个文档只需扫描一遍，而不是每条规则复制一次全文。
+    """
+    rules = {
+        old: new for old, new in replacements.items()
+        if old and new is not None
+    }
+    if not rules:
+        return None, {}
+    alternation = "|".join(
+        re.escape(old) for old in sorted(rules, key=len, reverse=True)
+    )
+    return re.compile(alternation), rules
+
+
+_REPLACEMENT_PATTERN, _REPLACEMENT_RULES = _compile_replacements(REPLACEMENTS)
+
+
 def preprocess_text(text: str) -> str:
-    """预处理文本：替换学校相关信息"""
-    if not ENABLE_SCHOOL_REPLACEMENT or not text:
+    """预处理文本：单遍替换学校相关信息"""
+    if not ENABLE_SCHOOL_REPLACEMENT or not text or _REPLACEMENT_PATTERN is None:
         return text
     
-    result = text
-    for old, new in REPLACEMENTS.items():
-        if old and new is not None:
-            result = result.replace(old, new)
-    return result
+    return _REPLACEMENT_PATTERN.sub(
+        lambda m: _REPLACEMENT_RULES[m.group(0)], text
+    )
 
 
 class KnowledgeBase:
@@ -64,6 +87,8 @@ class KnowledgeBase:
             model_name="all-MiniLM-L6-v2",
             model_kwargs={'device': 'cpu'}
         )
+        # 查询侧编码参数的嵌入模型副本（共享同一个模型，见 _embed_queries）
+        self._query_embeddings = None
         
         # 加载或创建向量库
         if os.path.exists(persist_dir) and os.listdir(persist_dir):
@@ -98,13 +123,20 @@ class KnowledgeBase:
             
             docs = loader.load()
             # 添加文件来源到 metadata，并进行文本预处理
+            preprocess_start = time.perf_counter()
+            total_chars = 0
             for doc in docs:
                 doc.metadata['source_file'] = file_path.name
                 doc.metadata['file_type'] = file_type
                 # 替换学校相关信息
                 doc.page_content = preprocess_text(doc.page_content)
+                total_chars += len(doc.page_content)
+            preprocess_ms = (time.perf_counter() - preprocess_start) * 1000
             
-            print(f"  [成功] {file_path.name} ({len(docs)} 页/段)")
+            print(
+                f"  [成功] {file_path.name} ({len(docs)} 页/段, "
+                f"{total_chars} 字, 预处理 {preprocess_ms:.1f}ms)"
+            )
             return docs
             
         except Exception as e:
@@ -176,6 +208,52 @@ class KnowledgeBase:
         results = self.vectorstore.similarity_search_with_score(query, k=k)
         return results
 
+    def search_many(self, queries: list, k: int = 3) -> list:
+        """批量搜索相关文档，按查询顺序返回每个查询的文档列表"""
+        return [
+            [doc for doc, _ in results]
+            for results in self.search_many_with_scores(queries, k=k)
+        ]
+
+    def search_many_with_scores(self, queries: list, k: int = 3) -> list:
+        """
+        批量搜索并返回相似度分数
+
+        所有查询在一次模型前向中完成向量化（使用与 embed_query 相同的查询侧编码参数，
+        查询/文档向量不对称的模型排序不变），再交给 Chroma 一次性检索。
+        分数与 search_with_scores 相同（向量距离，越小越相关），
+        返回值与 queries 一一对应: [[(doc, score), ...], ...]
+        """
+        if self.vectorstore is None or not queries:
+            return [[] for _ in queries]
+
+        raw = self.vectorstore._collection.query(
+            query_embeddings=self._embed_queries(list(queries)),
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                (Document(page_content=doc, metadata=meta or {}), dist)
+                for doc, meta, dist in zip(docs, metas, dists)
+            ]
+            for docs, metas, dists in zip(raw["documents"], raw["metadatas"], raw["distances"])
+        ]
+
+    def _embed_queries(self, queries: list) -> list:
+        """
+        一次前向向量化多条查询
+
+        embed_query 与 embed_documents 的区别只在编码参数：配置了 query_encode_kwargs
+        （如 prompt_name="query"）时 embed_query 用它，这里用同样的参数批量编码
+        """
+        query_kwargs = getattr(self.embeddings, "query_encode_kwargs", None)
+        if not query_kwargs:
+            return self.embeddings.embed_documents(queries)
+        if self._query_embeddings is None:
+            self._query_embeddings = self.embeddings.model_copy(update={"encode_kwargs": query_kwargs})
+        return self._query_embeddings.embed_documents(queries)
+
 
 # 全局知识库实例（延迟初始化）
 _kb = None
@@ -6,7 +6,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Text, Float, Boolean,
-    DateTime, Enum, JSON, ForeignKey, Index
+    DateTime, Enum, JSON, ForeignKey, Index, text
 )
 from sqlalchemy.orm import relationship
 from src.database.connection import Base
@@ -92,6 +92,8 @@ class SentimentRecord(Base):
 
     # 原始数据
     content = Column(Text, nullable=False, comment="原始文本内容")
+    content_hash = Column(String(40), comment="归一化内容哈希（采集去重）")
+    cluster_size = Column(Integer, default=1, comment="近重复簇成员数（含本条）")
     source = Column(Enum(DataSource), default=DataSource.OTHER, comment="数据来源")
     author_id = Column(String(100), comment="原作者ID（脱敏）")
     author_grade = Column(String(20), comment="年级: 大一/大二/大三/大四/研一/研二/研三")
@@ -130,13 +132,12 @@ class SentimentRecord(Base):
 
     # 索引
     __table_args__ = (
-        Index("idx_sentiment", "sentiment"),
-        Index("idx_risk_level", "risk_level"),
         Index("idx_review_status", "review_status"),
-        Index("idx_source", "source"),
-        Index("idx_created_at", "created_at"),
-        Index("idx_main_topic", "main_topic"),
-        Index("idx_author_department", "author_department"),
+        Index("uq_source_content_hash", "source", "content_hash", unique=True),
+        # 仍直接查原始记录的面板/技能查询的覆盖索引（其余维度读汇总，取舍见迁移 0003）；
+        # idx_created_sentiment_risk 同时是汇总重算等查询的 created_at 范围索引
+        Index("idx_created_sentiment_risk", "created_at", "sentiment", "risk_level"),
+        Index("idx_created_topic_heat", "created_at", "main_topic", "source", "sentiment", "cluster_size"),
     )
 
     def __repr__(self):
@@ -146,6 +147,28 @@ class SentimentRecord(Base):
         )
 
 
+# ========== 记录标签子表 ==========
+# emotions 的 JSON 列按 (记录, 情绪) 拆成行，冗余记录的 created_at，
+# 情绪云可以直接按时间窗口 GROUP BY（读覆盖索引）
+
+class RecordEmotion(Base):
+    """记录情绪标签"""
+    __tablename__ = "record_emotions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    record_id = Column(
+        Integer, ForeignKey("sentiment_records.id", ondelete="CASCADE"),
+        nullable=False, comment="关联记录ID"
+    )
+    emotion = Column(String(50), nullable=False, comment="情绪词")
+    created_at = Column(DateTime, nullable=False, comment="记录入库时间")
+
+    __table_args__ = (
+        Index("uq_record_emotion", "record_id", "emotion", unique=True),
+        Index("idx_record_emotions_created", "created_at", "emotion"),
+    )
+
+
 class ReviewTask(Base):
     """审核任务表 - 辅导员人工审核"""
     __tablename__ = "review_tasks"
@@ -184,7 +207,8 @@ class ReviewTask(Base):
 
     # 索引
     __table_args__ = (
-        Index("idx_review_status", "status"),
+        # 审核队列按 priority 降序、created_at 升序取页，索引列方向与之一致以免额外排序
+        Index("idx_review_status_priority_created", "status", text("priority DESC"), "created_at"),
         Index("idx_review_priority", "priority"),
         Index("idx_reviewer_id", "reviewer_id"),
     )
@@ -230,7 +254,7 @@ class Alert(Base):
 
     # 索引
     __table_args__ = (
-        Index("idx_alert_status", "status"),
+        Index("idx_alert_status_triggered", "status", "triggered_at"),
         Index("idx_alert_risk_level", "risk_level"),
         Index("idx_alert_triggered_at", "triggered_at"),
     )
@@ -240,12 +264,14 @@ class Alert(Base):
 
 
 class AnalysisStats(Base):
-    """分析统计表 - 用于可视化面板（按天/周/月汇总）"""
+    """分析统计表 - 用于可视化面板（按天/周/月、按维度汇总，由 StatsRollup 维护）"""
     __tablename__ = "analysis_stats"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    stat_date = Column(DateTime, nullable=False, comment="统计日期")
+    stat_date = Column(DateTime, nullable=False, comment="统计日期（周期起始日）")
     period_type = Column(String(10), default="daily", comment="统计周期: daily/weekly/monthly")
+    dimension = Column(String(20), default="all", comment="统计维度: all/department/source/topic/grade")
+    dimension_value = Column(String(100), default="", comment="维度取值（all 维度为空）")
 
     # 情感分布统计
     total_records = Column(Integer, default=0, comment="总记录数")
@@ -258,6 +284,7 @@ class AnalysisStats(Base):
     medium_risk_count = Column(Integer, default=0, comment="中风险数")
     high_risk_count = Column(Integer, default=0, comment="高风险数")
     critical_risk_count = Column(Integer, default=0, comment="危急数")
+    heat = Column(Integer, default=0, comment="热度（近重复簇成员数之和）")
 
     # 审核统计
     pending_review_count = Column(Integer, default=0, comment="待审核数")
@@ -276,4 +303,27 @@ class AnalysisStats(Base):
     __table_args__ = (
         Index("idx_stat_date", "stat_date"),
         Index("idx_period_type", "period_type"),
+        Index(
+            "uq_stats_period_dimension",
+            "period_type", "stat_date", "dimension", "dimension_value",
+            unique=True,
+        ),
     )
+
+
+class StatsDirtyRecord(Base):
+    """统计汇总待重算标记 - 已有记录被修改时与修改同一事务写入，StatsRollup.refresh 处理后删除"""
+    __tablename__ = "stats_dirty_records"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    record_id = Column(Integer, nullable=False, comment="被修改的舆情记录ID")
+    marked_at = Column(DateTime, default=datetime.now, comment="标记时间")
+
+
+class StatsRollupState(Base):
+    """统计汇总水位线 - 单行（id=1），与汇总行在同一事务中写入"""
+    __tablename__ = "stats_rollup_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    max_record_id = Column(Integer, nullable=False, default=0, comment="已汇总到的最大记录ID")
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, comment="更新时间")
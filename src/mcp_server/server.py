@@ -8,10 +8,11 @@ MCP Server - Model Context Protocol 服务器
 2. analyze_topic - 主题聚类
 3. screen_risk - 风险筛查
 4. search_knowledge - 知识库查询
-5. multi_agent_analyze - 多Agent协作分析
-6. get_dashboard_stats - 获取可视化面板数据
-7. get_review_tasks - 获取待审核任务
-8. submit_review - 提交审核结果
+5. search_knowledge_batch - 知识库批量查询
+6. multi_agent_analyze - 多Agent协作分析
+7. get_dashboard_stats - 获取可视化面板数据
+8. get_review_tasks - 获取待审核任务
+9. submit_review - 提交审核结果
 
 启动方式：
     python -m src.mcp_server.server
@@ -39,7 +40,7 @@ except ImportError:
 from src.tools.sentiment_tool import sentiment_analyzer
 from src.tools.topic_cluster import topic_clusterer
 from src.tools.risk_screener import risk_screener
-from src.tools.knowledge_tool import knowledge_searcher
+from src.tools.knowledge_tool import knowledge_searcher, knowledge_batch_searcher
 
 
 # ========== MCP Tool 定义 ==========
@@ -106,6 +107,26 @@ MCP_TOOLS = [
             "required": ["query"]
         }
     },
+    {
+        "name": "search_knowledge_batch",
+        "description": "在校园心理健康知识库中批量语义检索。所有查询一次性向量化并打分，按查询顺序返回每个查询的结果列表。",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "检索查询词列表"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "每个查询返回的结果数量，默认3",
+                    "default": 3
+                }
+            },
+            "required": ["queries"]
+        }
+    },
     {
         "name": "multi_agent_analyze",
         "description": "调用多智能体协作系统进行全面分析。协调情感Agent、主题Agent、风险Agent、审核决策Agent和报告Agent协同工作，返回综合分析报告。",
@@ -144,6 +165,13 @@ def execute_tool(tool_name: str, arguments: dict) -> str:
             result = knowledge_searcher.invoke(arguments["query"])
             return result
         
+        elif tool_name == "search_knowledge_batch":
+            result = knowledge_batch_searcher.invoke({
+                "queries": arguments["queries"],
+                "top_k": arguments.get("top_k", 3),
+            })
+            return result
+        
         elif tool_name == "multi_agent_analyze":
             from src.agents.coordinator_agent import get_coordinator
             coordinator = get_coordinator()
@@ -4,12 +4,61 @@
 """
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, select
 
 from src.database.models import (
     SentimentRecord, ReviewTask, Alert, AnalysisStats,
     SentimentType, RiskLevel, ReviewStatus, AlertStatus
 )
+from src.services.stats_rollup import StatsRollup
+
+
+def overview_counts(db: Session, start_date: datetime) -> dict:
+    """
+    总览核心计数（DashboardService.get_overview 与 DataAnalysisSkill 共用）
+
+    记录相关的计数在一次扫描中用 SUM(CASE ...) 条件聚合完成，
+    扫描范围覆盖统计窗口与昨日；待审核与活跃预警合并为一条查询。
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    yesterday = today - timedelta(days=1)
+    in_window = SentimentRecord.created_at >= start_date
+
+    def count_if(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+    records = db.query(
+        count_if(in_window).label("total"),
+        count_if(in_window, SentimentRecord.sentiment == SentimentType.POSITIVE).label("positive"),
+        count_if(in_window, SentimentRecord.sentiment == SentimentType.NEGATIVE).label("negative"),
+        count_if(
+            in_window, SentimentRecord.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
+        ).label("high_risk"),
+        count_if(SentimentRecord.created_at >= today).label("today"),
+        count_if(SentimentRecord.created_at >= yesterday, SentimentRecord.created_at < today).label("yesterday"),
+    ).filter(
+        SentimentRecord.created_at >= min(start_date, yesterday)
+    ).one()
+
+    workflow = db.query(
+        select(func.count(ReviewTask.id)).where(
+            ReviewTask.status == ReviewStatus.PENDING
+        ).scalar_subquery().label("pending_review"),
+        select(func.count(Alert.id)).where(
+            Alert.status == AlertStatus.ACTIVE
+        ).scalar_subquery().label("active_alerts"),
+    ).one()
+
+    return {
+        **{key: int(value) for key, value in records._mapping.items()},
+        "pending_review": workflow.pending_review or 0,
+        "active_alerts": workflow.active_alerts or 0,
+    }
+
+
+def topic_heat():
+    """话题热度：近重复簇的成员数之和（同一事件的多个版本只入库一条代表记录）"""
+    return func.sum(func.coalesce(SentimentRecord.cluster_size, 1))
 
 
 class DashboardService:
@@ -18,48 +67,20 @@ class DashboardService:
     def __init__(self, db: Session):
         self.db = db
     
+    def _rollup(self) -> StatsRollup:
+        """刷新脏日期后的汇总查询入口"""
+        rollup = StatsRollup(self.db)
+        rollup.refresh()
+        return rollup
+    
     def get_overview(self, days: int = 30) -> dict:
         """获取总览数据"""
         start_date = datetime.now() - timedelta(days=days)
-        
-        total = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date
-        ).scalar() or 0
-        
-        positive = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.sentiment == SentimentType.POSITIVE
-        ).scalar() or 0
-        
-        negative = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.sentiment == SentimentType.NEGATIVE
-        ).scalar() or 0
-        
-        high_risk = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
-        ).scalar() or 0
-        
-        pending_review = self.db.query(func.count(ReviewTask.id)).filter(
-            ReviewTask.status == ReviewStatus.PENDING
-        ).scalar() or 0
-        
-        active_alerts = self.db.query(func.count(Alert.id)).filter(
-            Alert.status == AlertStatus.ACTIVE
-        ).scalar() or 0
-        
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= today
-        ).scalar() or 0
-        
-        # 昨日对比
-        yesterday = today - timedelta(days=1)
-        yesterday_count = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= yesterday,
-            SentimentRecord.created_at < today
-        ).scalar() or 0
+        counts = overview_counts(self.db, start_date)
+        total = counts["total"]
+        positive = counts["positive"]
+        negative = counts["negative"]
+        high_risk = counts["high_risk"]
         
         return {
             "total_records": total,
@@ -67,174 +88,104 @@ class DashboardService:
             "negative_count": negative,
             "neutral_count": total - positive - negative,
             "high_risk_count": high_risk,
-            "pending_review": pending_review,
-            "active_alerts": active_alerts,
-            "today_new": today_count,
-            "yesterday_new": yesterday_count,
+            "pending_review": counts["pending_review"],
+            "active_alerts": counts["active_alerts"],
+            "today_new": counts["today"],
+            "yesterday_new": counts["yesterday"],
             "negative_rate": round(negative / total * 100, 1) if total > 0 else 0,
             "high_risk_rate": round(high_risk / total * 100, 1) if total > 0 else 0,
         }
     
     def get_sentiment_trend(self, days: int = 30) -> list:
-        """获取情感趋势（按天）"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            func.date(SentimentRecord.created_at).label("date"),
-            SentimentRecord.sentiment,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date
-        ).group_by(
-            func.date(SentimentRecord.created_at),
-            SentimentRecord.sentiment
-        ).order_by("date").all()
-        
-        trend_data = {}
-        for r in records:
-            date_str = str(r.date)
-            if date_str not in trend_data:
-                trend_data[date_str] = {
-                    "date": date_str, "positive": 0, "negative": 0, "neutral": 0, "total": 0
-                }
-            if r.sentiment:
-                trend_data[date_str][r.sentiment.value] = r.count
-                trend_data[date_str]["total"] += r.count
-        
-        return list(trend_data.values())
+        """获取情感趋势（按天，读日汇总）"""
+        return [
+            {
+                "date": r["stat_date"].isoformat(),
+                "positive": r["positive_count"],
+                "negative": r["negative_count"],
+                "neutral": r["neutral_count"],
+                "total": r["positive_count"] + r["negative_count"] + r["neutral_count"],
+            }
+            for r in self._rollup().daily_rows(days)
+        ]
     
     def get_risk_trend(self, days: int = 30) -> list:
-        """获取风险等级趋势（按天）"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            func.date(SentimentRecord.created_at).label("date"),
-            SentimentRecord.risk_level,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date
-        ).group_by(
-            func.date(SentimentRecord.created_at),
-            SentimentRecord.risk_level
-        ).order_by("date").all()
-        
-        trend_data = {}
-        for r in records:
-            date_str = str(r.date)
-            if date_str not in trend_data:
-                trend_data[date_str] = {
-                    "date": date_str, "low": 0, "medium": 0, "high": 0, "critical": 0
-                }
-            if r.risk_level:
-                trend_data[date_str][r.risk_level.value] = r.count
-        
-        return list(trend_data.values())
+        """获取风险等级趋势（按天，读日汇总）"""
+        return [
+            {
+                "date": r["stat_date"].isoformat(),
+                "low": r["low_risk_count"],
+                "medium": r["medium_risk_count"],
+                "high": r["high_risk_count"],
+                "critical": r["critical_risk_count"],
+            }
+            for r in self._rollup().daily_rows(days)
+        ]
     
     def get_topic_distribution(self, days: int = 30) -> list:
-        """获取话题分布"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            SentimentRecord.main_topic,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.main_topic.isnot(None)
-        ).group_by(
-            SentimentRecord.main_topic
-        ).order_by(
-            func.count(SentimentRecord.id).desc()
-        ).limit(10).all()
-        
-        return [{"topic": r.main_topic, "count": r.count} for r in records]
+        """获取话题分布（热度按近重复簇成员数计，读汇总）"""
+        records = sorted(self._rollup().window_totals("topic", days), key=lambda r: -r["heat"])[:10]
+        return [{"topic": r["dimension_value"], "count": r["heat"]} for r in records]
     
     def get_emotion_cloud(self, days: int = 30) -> list:
-        """获取情绪词云"""
+        """获取情绪词云（情绪子表按窗口 GROUP BY）"""
+        from src.services.record_terms import term_counts
+
         start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(SentimentRecord.emotions).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.emotions.isnot(None)
-        ).all()
-        
-        emotion_counts = {}
-        for r in records:
-            for emotion in (r.emotions or []):
-                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        sorted_emotions = sorted(emotion_counts.items(), key=lambda x: -x[1])
-        return [{"word": e, "count": c} for e, c in sorted_emotions[:30]]
+        return [
+            {"word": e, "count": c}
+            for e, c in term_counts(self.db, "emotions", start_date, limit=30)
+        ]
     
     def get_department_stats(self, days: int = 30) -> list:
-        """获取院系统计"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            SentimentRecord.author_department,
-            SentimentRecord.sentiment,
-            SentimentRecord.risk_level,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.author_department.isnot(None)
-        ).group_by(
-            SentimentRecord.author_department,
-            SentimentRecord.sentiment,
-            SentimentRecord.risk_level
-        ).all()
-        
-        dept_data = {}
-        for r in records:
-            dept = r.author_department
-            if dept not in dept_data:
-                dept_data[dept] = {
-                    "department": dept,
-                    "total": 0,
-                    "positive": 0, "negative": 0, "neutral": 0,
-                    "high_risk": 0,
-                }
-            dept_data[dept]["total"] += r.count
-            if r.sentiment:
-                dept_data[dept][r.sentiment.value] += r.count
-            if r.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
-                dept_data[dept]["high_risk"] += r.count
-        
-        return sorted(dept_data.values(), key=lambda x: -x["total"])
+        """获取院系统计（读汇总）"""
+        dept_data = [
+            {
+                "department": r["dimension_value"],
+                "total": r["total_records"],
+                "positive": r["positive_count"],
+                "negative": r["negative_count"],
+                "neutral": r["neutral_count"],
+                "high_risk": r["high_risk_count"] + r["critical_risk_count"],
+            }
+            for r in self._rollup().window_totals("department", days)
+        ]
+        return sorted(dept_data, key=lambda x: -x["total"])
     
     def get_recent_alerts(self, limit: int = 10) -> list:
-        """获取最近的预警"""
-        alerts = self.db.query(Alert).order_by(
+        """获取最近的预警（预警与关联记录一次取回，内容在 SQL 中截断）"""
+        rows = self.db.query(
+            Alert.id,
+            Alert.title,
+            Alert.risk_level,
+            Alert.status,
+            Alert.triggered_at,
+            func.substr(SentimentRecord.content, 1, 100).label("content_preview"),
+            SentimentRecord.author_department,
+        ).outerjoin(
+            SentimentRecord, Alert.record_id == SentimentRecord.id
+        ).order_by(
             Alert.triggered_at.desc()
         ).limit(limit).all()
         
-        result = []
-        for a in alerts:
-            record = self.db.query(SentimentRecord).get(a.record_id) if a.record_id else None
-            result.append({
+        return [
+            {
                 "id": a.id,
                 "title": a.title,
                 "risk_level": a.risk_level.value if a.risk_level else "",
                 "status": a.status.value if a.status else "",
-                "content": record.content[:100] if record else "",
-                "department": record.author_department if record else "",
+                "content": a.content_preview or "",
+                "department": a.author_department or "",
                 "triggered_at": a.triggered_at.isoformat() if a.triggered_at else None,
-            })
-        return result
+            }
+            for a in rows
+        ]
 
     def get_source_distribution(self, days: int = 30) -> list:
-        """获取数据来源（平台）分布"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            SentimentRecord.source,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date
-        ).group_by(
-            SentimentRecord.source
-        ).order_by(
-            func.count(SentimentRecord.id).desc()
-        ).all()
+        """获取数据来源（平台）分布（读汇总）"""
+        records = sorted(
+            self._rollup().window_totals("source", days), key=lambda r: -r["total_records"]
+        )
         
         SOURCE_LABELS = {
             "weibo": "微博", "wechat": "微信", "forum": "论坛",
@@ -245,31 +196,20 @@ class DashboardService:
             "survey": "#f5a623", "counseling": "#e17055", "feedback": "#70a1ff", "other": "#a0a0b0",
         }
         
-        total = sum(r.count for r in records) or 1
+        total = sum(r["total_records"] for r in records) or 1
         return [
             {
-                "name": SOURCE_LABELS.get(r.source.value if r.source else "other", "其他"),
-                "value": round(r.count / total * 100),
-                "count": r.count,
-                "color": SOURCE_COLORS.get(r.source.value if r.source else "other", "#a0a0b0"),
+                "name": SOURCE_LABELS.get(r["dimension_value"], "其他"),
+                "value": round(r["total_records"] / total * 100),
+                "count": r["total_records"],
+                "color": SOURCE_COLORS.get(r["dimension_value"], "#a0a0b0"),
             }
             for r in records
         ]
 
     def get_platform_sentiment(self, days: int = 30) -> list:
-        """获取各平台的情感分布细表"""
-        start_date = datetime.now() - timedelta(days=days)
-        
-        records = self.db.query(
-            SentimentRecord.source,
-            SentimentRecord.sentiment,
-            func.count(SentimentRecord.id).label("count")
-        ).filter(
-            SentimentRecord.created_at >= start_date
-        ).group_by(
-            SentimentRecord.source,
-            SentimentRecord.sentiment
-        ).all()
+        """获取各平台的情感分布细表（读汇总）"""
+        records = self._rollup().window_totals("source", days)
         
         SOURCE_LABELS = {
             "weibo": "微博", "wechat": "微信", "forum": "论坛",
@@ -278,13 +218,14 @@ class DashboardService:
         
         platform_data = {}
         for r in records:
-            src = r.source.value if r.source else "other"
-            label = SOURCE_LABELS.get(src, "其他")
+            label = SOURCE_LABELS.get(r["dimension_value"], "其他")
             if label not in platform_data:
                 platform_data[label] = {"name": label, "total": 0, "positive": 0, "negative": 0, "neutral": 0}
-            sentiment_val = r.sentiment.value if r.sentiment else "neutral"
-            platform_data[label][sentiment_val] += r.count
-            platform_data[label]["total"] += r.count
+            platform_data[label]["positive"] += r["positive_count"]
+            platform_data[label]["negative"] += r["negative_count"]
+            # 未识别情感的记录按中性计
+            platform_data[label]["neutral"] += r["total_records"] - r["positive_count"] - r["negative_count"]
+            platform_data[label]["total"] += r["total_records"]
         
         result = sorted(platform_data.values(), key=lambda x: -x["total"])
         # 格式化 total 显示
@@ -294,8 +235,17 @@ class DashboardService:
         return result
 
     def get_recent_mentions(self, limit: int = 20) -> list:
-        """获取最近的舆情提及记录"""
-        records = self.db.query(SentimentRecord).order_by(
+        """获取最近的舆情提及记录（只取展示用的列，内容在 SQL 中截断）"""
+        records = self.db.query(
+            SentimentRecord.id,
+            SentimentRecord.author_id,
+            # 多取一个字符，用于判断是否需要省略号
+            func.substr(SentimentRecord.content, 1, 61).label("content"),
+            SentimentRecord.source,
+            SentimentRecord.sentiment,
+            SentimentRecord.main_topic,
+            SentimentRecord.created_at,
+        ).order_by(
             SentimentRecord.created_at.desc()
         ).limit(limit).all()
         
@@ -321,7 +271,7 @@ class DashboardService:
         ]
 
     def get_topic_detail(self, days: int = 30) -> list:
-        """获取话题详情（含平台、情感、趋势）"""
+        """获取话题详情（含平台、情感、趋势，热度按近重复簇成员数计）"""
         start_date = datetime.now() - timedelta(days=days)
         yesterday = datetime.now() - timedelta(days=1)
         
@@ -330,7 +280,7 @@ class DashboardService:
             SentimentRecord.main_topic,
             SentimentRecord.source,
             SentimentRecord.sentiment,
-            func.count(SentimentRecord.id).label("count")
+            topic_heat().label("count")
         ).filter(
             SentimentRecord.created_at >= start_date,
             SentimentRecord.main_topic.isnot(None)
@@ -355,23 +305,23 @@ class DashboardService:
                     "sources": {}, "sentiments": {"positive": 0, "negative": 0, "neutral": 0}
                 }
             src_label = SOURCE_LABELS.get(r.source.value if r.source else "other", "其他")
-            topic_data[topic]["sources"][src_label] = topic_data[topic]["sources"].get(src_label, 0) + r.count
+            topic_data[topic]["sources"][src_label] = topic_data[topic]["sources"].get(src_label, 0) + int(r.count)
             sent_val = r.sentiment.value if r.sentiment else "neutral"
-            topic_data[topic]["sentiments"][sent_val] += r.count
-            topic_data[topic]["count"] += r.count
+            topic_data[topic]["sentiments"][sent_val] += int(r.count)
+            topic_data[topic]["count"] += int(r.count)
         
         # 上一周期对比（趋势）
         prev_start = start_date - timedelta(days=days)
         prev_records = self.db.query(
             SentimentRecord.main_topic,
-            func.count(SentimentRecord.id).label("count")
+            topic_heat().label("count")
         ).filter(
             SentimentRecord.created_at >= prev_start,
             SentimentRecord.created_at < start_date,
             SentimentRecord.main_topic.isnot(None)
         ).group_by(SentimentRecord.main_topic).all()
         
-        prev_counts = {r.main_topic: r.count for r in prev_records}
+        prev_counts = {r.main_topic: int(r.count) for r in prev_records}
         
         result = []
         for topic, data in topic_data.items():
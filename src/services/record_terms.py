@@ -0,0 +1,189 @@
+# src/services/record_terms.py
+"""
+记录标签子表 - emotions 的规范化存储
+
+JSON 列仍然保留（详情展示、报告生成直接读取），入库时同步把每个情绪标签写成
+(record_id, 标签, created_at) 一行，情绪云变成一条按时间窗口的 GROUP BY，
+只读 (created_at, 标签) 覆盖索引，不再把窗口内每条记录的 JSON 拉回 Python 计数。
+keywords / risk_indicators 没有按窗口聚合的查询，只保留 JSON 列，不建子表；
+以后需要时在 TERM_FIELDS 中登记即可复用这里的写入、回填与计数。
+
+写入方:
+    - BulkImporter / StreamingPipeline 插入记录的同一事务内 insert_record_terms
+    - 补充分析回写情绪与风险信号后 replace_record_terms
+    - 历史数据（及 generate_data.py 生成的数据）由 backfill_record_terms 补齐，支持断点续跑
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence
+import logging
+
+from sqlalchemy import delete, desc, func, insert, select
+
+from src.database.models import SentimentRecord, RecordEmotion
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_STATE = "record_terms_backfill"
+
+# JSON 列名 → (子表模型, 标签列名)
+TERM_FIELDS = {
+    "emotions": (RecordEmotion, "emotion"),
+}
+
+
+def _normalize_terms(values, max_length: int) -> List[str]:
+    """去空白、截断到列宽、去重（保持原顺序）"""
+    if not isinstance(values, (list, tuple)):
+        return []
+    terms = []
+    for value in values:
+        term = str(value or "").strip()[:max_length]
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_term_rows(
+    field: str, record_ids: Sequence[int], rows: Sequence[Dict]
+) -> List[Dict]:
+    """
+    构造一个子表的插入参数
+
+    Args:
+        field: TERM_FIELDS 中登记的 JSON 列名
+        record_ids: 与 rows 顺序一致的记录 ID
+        rows: 记录字段字典，需包含 field 与 created_at
+    """
+    model, column = TERM_FIELDS[field]
+    max_length = model.__table__.c[column].type.length
+    term_rows = []
+    for record_id, row in zip(record_ids, rows):
+        created_at = row.get("created_at") or datetime.now()
+        for term in _normalize_terms(row.get(field), max_length):
+            term_rows.append({"record_id": record_id, column: term, "created_at": created_at})
+    return term_rows
+
+
+def insert_record_terms(
+    session,
+    record_ids: Sequence[int],
+    rows: Sequence[Dict],
+    fields: Iterable[str] = TERM_FIELDS,
+) -> Dict[str, int]:
+    """新记录的标签写入子表（每个子表一条多行 INSERT，不提交），返回各子表写入行数"""
+    written = {}
+    for field in fields:
+        term_rows = build_term_rows(field, record_ids, rows)
+        if term_rows:
+            session.execute(insert(TERM_FIELDS[field][0].__table__), term_rows)
+        written[field] = len(term_rows)
+    return written
+
+
+def replace_record_terms(
+    session,
+    record_ids: Sequence[int],
+    rows: Sequence[Dict],
+    fields: Iterable[str] = TERM_FIELDS,
+) -> Dict[str, int]:
+    """已有记录的标签被重写后调用：先删后插（不提交）"""
+    fields = list(fields)
+    if not record_ids:
+        return {field: 0 for field in fields}
+    for field in fields:
+        table = TERM_FIELDS[field][0].__table__
+        session.execute(delete(table).where(table.c.record_id.in_(list(record_ids))))
+    return insert_record_terms(session, record_ids, rows, fields)
+
+
+def term_counts(db, field: str, start_date: datetime, limit: int = 30) -> List[tuple]:
+    """时间窗口内各标签的记录数，按数量降序返回 [(标签, 数量)]"""
+    model, column = TERM_FIELDS[field]
+    term = getattr(model, column)
+    count = func.count(model.id).label("count")
+    rows = db.execute(
+        select(term, count)
+        .where(model.created_at >= start_date)
+        .group_by(term)
+        .order_by(desc("count"), term)
+        .limit(limit)
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+# ─────── 历史数据回填 ───────
+
+def backfill_record_terms(batch_size: int = 1000, resume: bool = True) -> Dict:
+    """
+    按记录 ID 分批把 JSON 列展开写入子表
+
+    每批先删后插，重复执行结果一致；每批提交后保存检查点，中断后从检查点继续，
+    全部完成后清除检查点。
+
+    Args:
+        batch_size: 每批处理的记录数
+        resume: 是否从检查点恢复
+    """
+    from src.crawler.state_store import load_state, save_state, clear_state
+    from src.database.connection import SessionLocal
+    from src.services.response_cache import bump_data_version
+
+    table = SentimentRecord.__table__
+    checkpoint = load_state(BACKFILL_STATE) if resume else {}
+    last_id = checkpoint.get("last_id", 0)
+    resumed_from = last_id
+    processed = 0
+    written = {field: 0 for field in TERM_FIELDS}
+
+    session = SessionLocal()
+    try:
+        while True:
+            rows = session.execute(
+                select(
+                    table.c.id, table.c.created_at,
+                    *(table.c[field] for field in TERM_FIELDS),
+                )
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            batch = [dict(row._mapping) for row in rows]
+            counts = replace_record_terms(session, [row["id"] for row in batch], batch)
+            session.commit()
+
+            last_id = batch[-1]["id"]
+            processed += len(batch)
+            for field, n in counts.items():
+                written[field] += n
+            save_state(BACKFILL_STATE, {
+                "last_id": last_id,
+                "processed": checkpoint.get("processed", 0) + processed,
+                "updated_at": datetime.now().isoformat(),
+            })
+            logger.info(f"[RecordTerms] 回填进度: 已处理 {processed} 条, 当前 id={last_id}")
+
+        clear_state(BACKFILL_STATE)
+        if processed:
+            bump_data_version()
+        logger.info(f"[RecordTerms] 回填完成: {processed} 条记录, 写入 {written}")
+        return {
+            "success": True,
+            "processed": processed,
+            "written": written,
+            "resumed_from": resumed_from,
+        }
+    except Exception as e:
+        session.rollback()
+        logger.error(f"[RecordTerms] 回填失败: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "processed": processed,
+            "written": written,
+            "last_id": last_id,
+        }
+    finally:
+        session.close()
@@ -0,0 +1,182 @@
+# src/services/response_cache.py
+"""
+面板响应缓存 - 按接口与参数缓存计算结果，数据版本号驱动失效
+
+前端在几秒内为同一个 days 轮询全部面板，每次都重新聚合没有必要：
+    - 数据版本号：采集入库、重新分析、审核与预警处理提交后调用 bump_data_version()，
+      缓存条目记录计算开始时的版本号，版本变化后下一次请求重新计算
+    - 短 TTL：兜底其他进程（脚本、另一个 API 实例）写入的数据
+    - 同一个键同时只有一次计算，并发请求等待同一个结果
+    - 计算放在线程池里执行（使用独立的数据库会话），超过 stale_timeout 仍未完成、
+      或计算失败时，先返回旧结果，计算完成后更新缓存
+    - 每个结果带 ETag，前端携带 If-None-Match 时可直接返回 304
+
+数据每变化一次，每个面板最多计算一次。
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def bump_data_version() -> int:
+    """数据写入提交后调用，使所有缓存的面板结果失效"""
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+        return _data_version
+
+
+def get_data_version() -> int:
+    return _data_version
+
+
+class CachedResponse:
+    """一次缓存结果；status 为 HIT / MISS / STALE"""
+    __slots__ = ("payload", "etag", "version", "computed_at", "status")
+
+    def __init__(self, payload: Any, etag: str, version: int, computed_at: float, status: str = "MISS"):
+        self.payload = payload
+        self.etag = etag
+        self.version = version
+        self.computed_at = computed_at
+        self.status = status
+
+
+def _etag(payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """If-None-Match（可含多个、可带 W/ 前缀）中是否有与 etag 相同的标签"""
+    if not if_none_match:
+        return False
+    return etag in (tag.strip().replace("W/", "", 1) for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """
+    带单飞计算与过期兜底的响应缓存
+
+    Args:
+        ttl: 结果在数据版本不变时的有效秒数
+        stale_ttl: 旧结果最长可兜底的秒数
+        stale_timeout: 有旧结果时等待新计算的最长秒数，超时先返回旧结果
+        max_entries: 最多缓存的键数
+        max_workers: 计算线程数
+    """
+
+    def __init__(
+        self,
+        ttl: float = 15.0,
+        stale_ttl: float = 600.0,
+        stale_timeout: float = 2.0,
+        max_entries: int = 512,
+        max_workers: int = 4,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_timeout = stale_timeout
+        self.max_entries = max_entries
+        self._entries: Dict[str, CachedResponse] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-cache")
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    def get(self, key: str, compute: Callable[[Any], Any]) -> CachedResponse:
+        """
+        取缓存结果，必要时计算
+
+        Args:
+            key: 缓存键（接口 + 参数）
+            compute: 计算函数，参数为独立的数据库会话
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == get_data_version() and now - entry.computed_at < self.ttl:
+                self.hits += 1
+                return CachedResponse(entry.payload, entry.etag, entry.version, entry.computed_at, "HIT")
+
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._compute, key, compute, get_data_version())
+                self._inflight[key] = future
+
+        stale = entry if entry is not None and now - entry.computed_at < self.stale_ttl else None
+        try:
+            fresh = future.result(timeout=self.stale_timeout if stale is not None else None)
+        except FutureTimeout:
+            logger.info(f"[ResponseCache] {key} 计算较慢，先返回旧结果")
+            return self._serve_stale(stale)
+        except Exception as e:
+            if stale is None:
+                raise
+            logger.warning(f"[ResponseCache] {key} 计算失败，返回旧结果: {e}")
+            return self._serve_stale(stale)
+
+        with self._lock:
+            self.misses += 1
+        return CachedResponse(fresh.payload, fresh.etag, fresh.version, fresh.computed_at, "MISS")
+
+    def _serve_stale(self, entry: CachedResponse) -> CachedResponse:
+        with self._lock:
+            self.stale_served += 1
+        return CachedResponse(entry.payload, entry.etag, entry.version, entry.computed_at, "STALE")
+
+    def _compute(self, key: str, compute: Callable[[Any], Any], version: int) -> CachedResponse:
+        from src.database.connection import SessionLocal
+
+        session = SessionLocal()
+        try:
+            payload = compute(session)
+            entry = CachedResponse(payload, _etag(payload), version, time.monotonic())
+            with self._lock:
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            return entry
+        finally:
+            session.close()
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "data_version": get_data_version(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_served": self.stale_served,
+            }
+
+
+_dashboard_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_dashboard_cache() -> ResponseCache:
+    """面板接口共享的响应缓存"""
+    global _dashboard_cache
+    with _cache_lock:
+        if _dashboard_cache is None:
+            _dashboard_cache = ResponseCache()
+        return _dashboard_cache
@@ -0,0 +1,489 @@
+# src/services/stats_rollup.py
+"""
+统计汇总引擎 - 增量维护 AnalysisStats，面板查询读汇总行而不是扫描原始记录
+
+日汇总: 每天 × 每个维度取值一行（all / department / source / topic / grade），
+        包含情感、风险、审核计数、热度与平均置信度
+周/月汇总: 由日汇总行相加得到（平均值按记录数加权）
+
+哪些天需要重算:
+    - 新增记录：与上次汇总时的最大记录 ID（水位线）比较，
+      新记录所在的日期即为脏日期，其他进程（采集脚本、数据生成脚本）写入的记录也能发现
+    - 已有记录被修改（审核状态、近重复簇大小等）：写入方在同一事务中调用 mark_records_dirty，
+      记录 ID 写入 stats_dirty_records 表，跨进程、重启后都不会丢
+重算一天只扫描当天的记录；面板查询前调用 refresh()，没有变化时只多两次主键 MAX 查询。
+
+水位线保存在库中（stats_rollup_state 单行），与汇总行在同一事务中提交，换机器、新容器不会丢。
+首次构建（已有历史数据但还没有水位线）要扫描全部记录，不在面板请求中执行：
+refresh() 发现没有水位线时在后台线程启动 build_all（跨进程互斥），完成前面板统计为空；
+也可以用 scripts/build_stats_rollup.py 手动构建。
+
+面板按窗口查询时，窗口 [now - days, now] 的第一天只覆盖一部分，这部分直接按原始记录统计，
+其余整天拆成整月、整周和零散的天，分别读月/周/日汇总行；
+读取的汇总行数只与维度取值数有关，原始记录最多扫描一天。
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+import logging
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.database.models import (
+    SentimentRecord, AnalysisStats, StatsDirtyRecord, StatsRollupState,
+    SentimentType, RiskLevel, ReviewStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+# 水位线所在行的 id（stats_rollup_state 只有这一行）
+ROLLUP_STATE_ID = 1
+# 后台首次构建的跨进程锁（见 state_store），失败后至少间隔 BUILD_RETRY_SECONDS 再重试
+BUILD_LOCK = "stats_rollup_build"
+BUILD_RETRY_SECONDS = 5 * 60
+# 新记录的自增 ID 不一定按提交顺序出现，水位线回看一段 ID 避免漏掉晚提交的记录
+WATERMARK_LOOKBACK = 1000
+
+DIMENSIONS = {
+    "all": None,
+    "department": SentimentRecord.author_department,
+    "source": SentimentRecord.source,
+    "topic": SentimentRecord.main_topic,
+    "grade": SentimentRecord.author_grade,
+}
+
+COUNT_COLUMNS = (
+    "total_records", "positive_count", "negative_count", "neutral_count",
+    "low_risk_count", "medium_risk_count", "high_risk_count", "critical_risk_count",
+    "heat", "pending_review_count", "completed_review_count",
+)
+
+_refresh_lock = threading.Lock()
+
+# 后台首次构建：每个进程最多一个构建线程
+_build_thread: Optional[threading.Thread] = None
+_build_failed_at = 0.0
+_build_thread_lock = threading.Lock()
+
+
+def mark_records_dirty(session, record_ids: Iterable[int]) -> None:
+    """
+    已有记录被修改时调用（与修改在同一事务中，不提交）：
+    其所在日期的汇总在下次 refresh 时重算
+    """
+    ids = sorted({rid for rid in record_ids if rid})
+    if ids:
+        now = datetime.now()
+        session.execute(
+            insert(StatsDirtyRecord.__table__),
+            [{"record_id": rid, "marked_at": now} for rid in ids],
+        )
+
+
+def load_watermark(session) -> Optional[int]:
+    """已汇总到的最大记录 ID，还没有构建过时返回 None"""
+    return session.execute(
+        select(StatsRollupState.max_record_id).where(StatsRollupState.id == ROLLUP_STATE_ID)
+    ).scalar()
+
+
+def save_watermark(session, max_record_id: int) -> None:
+    """在当前事务中写入水位线（不提交，与汇总行一起提交）"""
+    table = StatsRollupState.__table__
+    values = {"max_record_id": max_record_id, "updated_at": datetime.now()}
+    updated = session.execute(
+        update(table).where(table.c.id == ROLLUP_STATE_ID).values(**values)
+    ).rowcount
+    if not updated:
+        session.execute(insert(table).values(id=ROLLUP_STATE_ID, **values))
+
+
+def reset_rollup_state(session) -> None:
+    """清空全部记录时在同一事务中调用（不提交）：水位线归零，之后的新记录增量汇总"""
+    save_watermark(session, 0)
+
+
+def start_background_build(batch_days: int = 31) -> bool:
+    """在后台线程执行 build_all；本进程已有构建在运行或刚失败不久时返回 False"""
+    global _build_thread
+    with _build_thread_lock:
+        if _build_thread is not None and _build_thread.is_alive():
+            return False
+        if time.monotonic() - _build_failed_at < BUILD_RETRY_SECONDS and _build_failed_at:
+            return False
+        _build_thread = threading.Thread(
+            target=_background_build, args=(batch_days,), name="stats-rollup-build", daemon=True
+        )
+        _build_thread.start()
+    return True
+
+
+def _background_build(batch_days: int) -> None:
+    global _build_failed_at
+    from src.crawler.state_store import acquire_lock, release_lock
+    from src.database.connection import SessionLocal
+    from src.services.response_cache import bump_data_version
+
+    if not acquire_lock(BUILD_LOCK):
+        logger.info("[StatsRollup] 其他进程正在构建汇总")
+        return
+    session = SessionLocal()
+    try:
+        days = StatsRollup(session).build_all(batch_days=batch_days)
+        bump_data_version()
+        logger.info(f"[StatsRollup] 后台首次构建完成: {days} 天")
+    except Exception as e:
+        session.rollback()
+        _build_failed_at = time.monotonic()
+        logger.error(f"[StatsRollup] 后台首次构建失败，{BUILD_RETRY_SECONDS}s 后重试: {e}")
+    finally:
+        session.close()
+        release_lock(BUILD_LOCK)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _count_if(*conditions):
+    return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+
+def aggregate_day_query(column, start: datetime, end: datetime):
+    """
+    [start, end) 内按 column 分组的汇总计数语句（column 为 None 时不分组）
+
+    汇总重算与窗口首日都执行它；scripts/benchmark_indexes.py 用同一条语句做基准。
+    """
+    group_cols = [] if column is None else [column]
+    stmt = select(
+        *group_cols,
+        func.count(SentimentRecord.id).label("total_records"),
+        _count_if(SentimentRecord.sentiment == SentimentType.POSITIVE).label("positive_count"),
+        _count_if(SentimentRecord.sentiment == SentimentType.NEGATIVE).label("negative_count"),
+        _count_if(SentimentRecord.sentiment == SentimentType.NEUTRAL).label("neutral_count"),
+        _count_if(SentimentRecord.risk_level == RiskLevel.LOW).label("low_risk_count"),
+        _count_if(SentimentRecord.risk_level == RiskLevel.MEDIUM).label("medium_risk_count"),
+        _count_if(SentimentRecord.risk_level == RiskLevel.HIGH).label("high_risk_count"),
+        _count_if(SentimentRecord.risk_level == RiskLevel.CRITICAL).label("critical_risk_count"),
+        func.coalesce(func.sum(func.coalesce(SentimentRecord.cluster_size, 1)), 0).label("heat"),
+        _count_if(SentimentRecord.review_status == ReviewStatus.PENDING).label("pending_review_count"),
+        _count_if(
+            SentimentRecord.review_status.in_([ReviewStatus.APPROVED, ReviewStatus.REJECTED])
+        ).label("completed_review_count"),
+        func.avg(SentimentRecord.sentiment_confidence).label("avg_sentiment_confidence"),
+        func.avg(SentimentRecord.risk_confidence).label("avg_risk_confidence"),
+    ).where(
+        SentimentRecord.created_at >= start,
+        SentimentRecord.created_at < end,
+    )
+    if column is not None:
+        stmt = stmt.where(column.isnot(None)).group_by(column)
+    return stmt
+
+
+def window_rollup_query(dimension: str, segments: Dict[str, List[datetime]]):
+    """按 StatsRollup._segments 拆出的整月/整周/零散天读汇总行，按维度取值求和"""
+    period_filter = or_(*[
+        and_(AnalysisStats.period_type == period, AnalysisStats.stat_date.in_(dates))
+        for period, dates in segments.items() if dates
+    ])
+    return select(
+        AnalysisStats.dimension_value,
+        *[func.sum(getattr(AnalysisStats, c)).label(c) for c in COUNT_COLUMNS],
+    ).where(
+        AnalysisStats.dimension == dimension,
+        period_filter,
+    ).group_by(AnalysisStats.dimension_value)
+
+
+class StatsRollup:
+    """AnalysisStats 汇总的维护与查询"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ─────── 增量维护 ───────
+
+    def refresh(self) -> int:
+        """重算所有脏日期及其所在周、月的汇总，返回重算的天数"""
+        with _refresh_lock:
+            max_id = self.db.query(func.max(SentimentRecord.id)).scalar() or 0
+            watermark = load_watermark(self.db)
+            if watermark is None:
+                if max_id:
+                    if start_background_build():
+                        logger.warning("[StatsRollup] 汇总尚未构建，已在后台开始首次构建，完成前面板统计为空")
+                    return 0
+                # 空库：直接从零开始增量汇总
+                save_watermark(self.db, 0)
+                self.db.commit()
+                watermark = 0
+
+            if max_id < watermark:
+                # 记录被清空后自增 ID 重新开始：水位线之后的都是新记录
+                watermark = 0
+            dirty_max = self.db.query(func.max(StatsDirtyRecord.id)).scalar()
+            if max_id == watermark and dirty_max is None:
+                return 0
+
+            try:
+                days = self._dirty_days(watermark, max_id, dirty_max)
+                self._rebuild(days)
+                self._clear_dirty(dirty_max)
+                save_watermark(self.db, max_id)
+                self.db.commit()
+            except IntegrityError:
+                # 其他进程同时写入了同一周期的汇总：放弃本次，交给下次 refresh
+                self.db.rollback()
+                logger.warning("[StatsRollup] 汇总写入冲突，下次刷新时重试")
+                return 0
+            except Exception:
+                self.db.rollback()
+                raise
+
+            if days:
+                logger.info(f"[StatsRollup] 已重算 {len(days)} 天的汇总")
+            return len(days)
+
+    def build_all(self, batch_days: int = 31) -> int:
+        """
+        首次构建：重算全部有记录的日期，每 batch_days 天提交一次，水位线随最后一次提交写入
+
+        重复执行结果一致；构建期间新写入的记录会被下次 refresh 当作新记录处理。
+        """
+        max_id = self.db.query(func.max(SentimentRecord.id)).scalar() or 0
+        dirty_max = self.db.query(func.max(StatsDirtyRecord.id)).scalar()
+        days = sorted(self._days_of(SentimentRecord.id <= max_id))
+        for i in range(0, len(days), batch_days):
+            self._rebuild(days[i:i + batch_days])
+            self.db.commit()
+            logger.info(f"[StatsRollup] 首次构建进度: {min(i + batch_days, len(days))}/{len(days)} 天")
+        self._clear_dirty(dirty_max)
+        save_watermark(self.db, max_id)
+        self.db.commit()
+        return len(days)
+
+    def _days_of(self, condition) -> Set[date]:
+        day_col = func.date(SentimentRecord.created_at)
+        return {
+            _as_date(d)
+            for d in self.db.execute(select(day_col).where(condition).distinct()).scalars()
+            if d is not None
+        }
+
+    def _dirty_days(self, watermark: int, max_id: int, dirty_max: Optional[int]) -> Set[date]:
+        """被标记修改的记录与水位线之后的新记录所在的日期"""
+        days: Set[date] = set()
+        if dirty_max is not None:
+            days |= self._days_of(SentimentRecord.id.in_(
+                select(StatsDirtyRecord.record_id).where(StatsDirtyRecord.id <= dirty_max)
+            ))
+        if max_id > watermark:
+            since_id = watermark - WATERMARK_LOOKBACK if watermark else 0
+            days |= self._days_of(SentimentRecord.id > since_id)
+        return days
+
+    def _clear_dirty(self, dirty_max: Optional[int]) -> None:
+        if dirty_max is not None:
+            self.db.execute(delete(StatsDirtyRecord.__table__).where(StatsDirtyRecord.id <= dirty_max))
+
+    def rebuild_days(self, days: Iterable[date]) -> None:
+        """重算指定日期的日汇总，以及这些日期所在的周、月汇总（并提交）"""
+        try:
+            self._rebuild(days)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning("[StatsRollup] 汇总写入冲突，下次刷新时重试")
+
+    def _rebuild(self, days: Iterable[date]) -> None:
+        days = sorted(set(days))
+        for day in days:
+            self._rebuild_daily(day)
+        for week in sorted({_week_start(d) for d in days}):
+            self._rebuild_period("weekly", week, week + timedelta(days=7))
+        for month in sorted({_month_start(d) for d in days}):
+            self._rebuild_period("monthly", month, _next_month(month))
+
+    def _rebuild_daily(self, day: date) -> None:
+        start = _day_start(day)
+        end = start + timedelta(days=1)
+        rows = []
+        for dimension, column in DIMENSIONS.items():
+            rows.extend(self._aggregate_day(dimension, column, start, end))
+        self._fill_top_topics(rows)
+        self._replace("daily", start, rows)
+
+    def _aggregate_day(self, dimension: str, column, start: datetime, end: datetime) -> List[Dict]:
+        """一天内某个维度的分组计数"""
+        rows = []
+        for r in self.db.execute(aggregate_day_query(column, start, end)):
+            values = r._mapping
+            if not values["total_records"]:
+                continue
+            value = "" if column is None else values[column.key]
+            rows.append({
+                "dimension": dimension,
+                "dimension_value": getattr(value, "value", value),
+                **{c: int(values[c]) for c in COUNT_COLUMNS},
+                "avg_sentiment_confidence": self._round(values["avg_sentiment_confidence"]),
+                "avg_risk_confidence": self._round(values["avg_risk_confidence"]),
+            })
+        return rows
+
+    def _rebuild_period(self, period_type: str, start_day: date, end_day: date) -> None:
+        """由日汇总行相加得到周/月汇总"""
+        table = AnalysisStats
+        weighted = lambda col: func.sum(col * table.total_records) / func.nullif(func.sum(table.total_records), 0)
+        records = self.db.query(
+            table.dimension,
+            table.dimension_value,
+            *[func.sum(getattr(table, c)).label(c) for c in COUNT_COLUMNS],
+            weighted(table.avg_sentiment_confidence).label("avg_sentiment_confidence"),
+            weighted(table.avg_risk_confidence).label("avg_risk_confidence"),
+        ).filter(
+            table.period_type == "daily",
+            table.stat_date >= _day_start(start_day),
+            table.stat_date < _day_start(end_day),
+        ).group_by(table.dimension, table.dimension_value).all()
+
+        rows = [
+            {
+                "dimension": r.dimension,
+                "dimension_value": r.dimension_value,
+                **{c: int(getattr(r, c) or 0) for c in COUNT_COLUMNS},
+                "avg_sentiment_confidence": self._round(r.avg_sentiment_confidence),
+                "avg_risk_confidence": self._round(r.avg_risk_confidence),
+            }
+            for r in records
+        ]
+        self._fill_top_topics(rows)
+        self._replace(period_type, _day_start(start_day), rows)
+
+    def _replace(self, period_type: str, stat_date: datetime, rows: List[Dict]) -> None:
+        self.db.execute(delete(AnalysisStats.__table__).where(
+            AnalysisStats.period_type == period_type,
+            AnalysisStats.stat_date == stat_date,
+        ))
+        if rows:
+            now = datetime.now()
+            for row in rows:
+                row.update(period_type=period_type, stat_date=stat_date, created_at=now)
+            self.db.execute(insert(AnalysisStats.__table__), rows)
+
+    @staticmethod
+    def _fill_top_topics(rows: List[Dict]) -> None:
+        """all 维度的行附带当期热度 Top10 话题"""
+        topics = sorted(
+            (r for r in rows if r["dimension"] == "topic"), key=lambda r: -r["heat"]
+        )[:10]
+        top_topics = [{"topic": r["dimension_value"], "count": r["heat"]} for r in topics]
+        for row in rows:
+            # 多行 INSERT 要求各行的键一致
+            row["top_topics"] = top_topics if row["dimension"] == "all" else None
+
+    @staticmethod
+    def _round(value) -> Optional[float]:
+        return round(float(value), 3) if value is not None else None
+
+    # ─────── 查询 ───────
+
+    @staticmethod
+    def window_start(days: int) -> datetime:
+        """面板的 days 窗口起点（now - days，与原始记录查询一致）"""
+        return datetime.now() - timedelta(days=days)
+
+    def _partial_day(self, dimension: str, start: datetime) -> List[Dict]:
+        """窗口第一天中 start 之后的部分，直接按原始记录统计"""
+        end = _day_start(start.date() + timedelta(days=1))
+        return self._aggregate_day(dimension, DIMENSIONS[dimension], start, end)
+
+    @staticmethod
+    def _row_dict(row) -> Dict:
+        values = row._mapping if hasattr(row, "_mapping") else row
+        return {
+            "dimension_value": values["dimension_value"],
+            **{c: int(values[c] or 0) for c in COUNT_COLUMNS},
+        }
+
+    @staticmethod
+    def _segments(start_day: date, end_day: date) -> Dict[str, List[datetime]]:
+        """把 [start_day, end_day) 拆成整月、整周和零散的天"""
+        segments: Dict[str, List[datetime]] = {"daily": [], "weekly": [], "monthly": []}
+        cursor = start_day
+        while cursor < end_day:
+            next_month = _next_month(cursor)
+            # 跨入一个完整月份的周改按天读，让游标落在月初以使用月汇总
+            week_blocks_month = cursor + timedelta(days=7) > next_month and _next_month(next_month) <= end_day
+            if cursor.day == 1 and next_month <= end_day:
+                segments["monthly"].append(_day_start(cursor))
+                cursor = next_month
+            elif cursor.weekday() == 0 and cursor + timedelta(days=7) <= end_day and not week_blocks_month:
+                segments["weekly"].append(_day_start(cursor))
+                cursor += timedelta(days=7)
+            else:
+                segments["daily"].append(_day_start(cursor))
+                cursor += timedelta(days=1)
+        return segments
+
+    def window_totals(self, dimension: str, days: int) -> List[Dict]:
+        """窗口内某个维度各取值的计数之和: [{dimension_value, 各计数列}]"""
+        start = self.window_start(days)
+        first_full_day = start.date() + timedelta(days=1)
+        end_day = date.today() + timedelta(days=1)
+
+        totals: Dict[str, Dict] = {}
+        rows = [self._row_dict(r) for r in self._partial_day(dimension, start)]
+        segments = self._segments(first_full_day, end_day)
+        if any(segments.values()):
+            rows += [self._row_dict(r) for r in self.db.execute(window_rollup_query(dimension, segments))]
+
+        for row in rows:
+            total = totals.setdefault(row["dimension_value"], dict.fromkeys(COUNT_COLUMNS, 0))
+            for c in COUNT_COLUMNS:
+                total[c] += row[c]
+        return [{"dimension_value": value, **counts} for value, counts in totals.items()]
+
+    def daily_rows(self, days: int, dimension: str = "all") -> List[Dict]:
+        """窗口内逐日的计数（按日期升序）: [{stat_date, dimension_value, 各计数列}]"""
+        start = self.window_start(days)
+        partial = [
+            {"stat_date": start.date(), **self._row_dict(r)}
+            for r in self._partial_day(dimension, start)
+        ]
+        rows = self.db.query(
+            AnalysisStats.stat_date,
+            AnalysisStats.dimension_value,
+            *[getattr(AnalysisStats, c) for c in COUNT_COLUMNS],
+        ).filter(
+            AnalysisStats.period_type == "daily",
+            AnalysisStats.dimension == dimension,
+            AnalysisStats.stat_date >= _day_start(start.date() + timedelta(days=1)),
+        ).order_by(AnalysisStats.stat_date).all()
+        return partial + [
+            {"stat_date": _as_date(r.stat_date), **self._row_dict(r)} for r in rows
+        ]
@@ -12,6 +12,7 @@ from src.database.models import (
     Alert, SentimentRecord, User,
     RiskLevel, AlertStatus
 )
+from src.services.response_cache import bump_data_version
 
 
 class AlertManagementSkill(BaseSkill):
@@ -59,32 +60,31 @@ class AlertManagementSkill(BaseSkill):
         page = params.get("page", 1)
         page_size = params.get("page_size", 20)
         
-        query = self.db.query(Alert).join(SentimentRecord)
-        
+        filters = []
         if status:
-            query = query.filter(Alert.status == AlertStatus(status))
+            filters.append(Alert.status == AlertStatus(status))
         if risk_level:
-            query = query.filter(Alert.risk_level == RiskLevel(risk_level))
-        
-        query = query.order_by(Alert.triggered_at.desc())
+            filters.append(Alert.risk_level == RiskLevel(risk_level))
         
-        total = query.count()
-        alerts = query.offset((page - 1) * page_size).limit(page_size).all()
+        total = self.db.query(func.count(Alert.id)).filter(*filters).scalar() or 0
+        rows = self._alert_query().filter(*filters).order_by(
+            Alert.triggered_at.desc()
+        ).offset((page - 1) * page_size).limit(page_size).all()
         
         return {
             "total": total,
             "page": page,
             "page_size": page_size,
-            "alerts": [self._alert_to_dict(a) for a in alerts]
+            "alerts": [self._alert_to_dict(row) for row in rows]
         }
     
     def _get_alert_detail(self, params) -> dict:
         """获取预警详情"""
         alert_id = params.get("alert_id")
-        alert = self.db.query(Alert).get(alert_id)
-        if not alert:
+        row = self._alert_query().filter(Alert.id == alert_id).first()
+        if not row:
             return {"error": f"预警 {alert_id} 不存在"}
-        return self._alert_to_dict(alert)
+        return self._alert_to_dict(row)
     
     def _handle_alert(self, params) -> dict:
         """处理预警"""
@@ -106,7 +106,9 @@ class AlertManagementSkill(BaseSkill):
             alert.resolved_at = datetime.now()
         
         self.db.commit()
-        return {"success": True, "alert": self._alert_to_dict(alert)}
+        bump_data_version()
+        row = self._alert_query().filter(Alert.id == alert_id).first()
+        return {"success": True, "alert": self._alert_to_dict(row)}
     
     def _alert_stats(self, params) -> dict:
         """预警统计"""
@@ -153,24 +155,41 @@ class AlertManagementSkill(BaseSkill):
         )
         self.db.add(alert)
         self.db.commit()
+        bump_data_version()
         self.db.refresh(alert)
         return {"success": True, "alert_id": alert.id}
     
-    def _alert_to_dict(self, alert: Alert) -> dict:
-        record = self.db.query(SentimentRecord).get(alert.record_id) if alert.record_id else None
-        handler = self.db.query(User).get(alert.handler_id) if alert.handler_id else None
+    def _alert_query(self):
+        """
+        预警 + 关联记录内容预览 + 处理人姓名，一条语句取回
+
+        内容在 SQL 中截断，不加载完整的 Text 列，也不再逐条查询记录和处理人。
+        """
+        return self.db.query(
+            Alert,
+            func.substr(SentimentRecord.content, 1, 200).label("content_preview"),
+            User.real_name.label("handler_name"),
+        ).outerjoin(
+            SentimentRecord, Alert.record_id == SentimentRecord.id
+        ).outerjoin(
+            User, Alert.handler_id == User.id
+        )
+    
+    def _alert_to_dict(self, row) -> dict:
+        """row 为 _alert_query() 的结果行"""
+        alert = row.Alert
         
         return {
             "id": alert.id,
             "record_id": alert.record_id,
-            "content": record.content[:200] if record else "",
+            "content": row.content_preview or "",
             "alert_type": alert.alert_type,
             "risk_level": alert.risk_level.value if alert.risk_level else "",
             "status": alert.status.value if alert.status else "",
             "title": alert.title,
             "description": alert.description,
             "ai_suggestion": alert.ai_suggestion,
-            "handler_name": handler.real_name if handler else None,
+            "handler_name": row.handler_name,
             "handler_note": alert.handler_note,
             "triggered_at": alert.triggered_at.isoformat() if alert.triggered_at else None,
             "resolved_at": alert.resolved_at.isoformat() if alert.resolved_at else None,
@@ -184,42 +184,13 @@ class DataAnalysisSkill(BaseSkill):
     
     def _overview_stats(self, start_date, params) -> dict:
         """总览统计 - 可视化面板核心指标"""
-        total = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date
-        ).scalar() or 0
-        
-        # 情感计数
-        positive = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.sentiment == SentimentType.POSITIVE
-        ).scalar() or 0
-        
-        negative = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.sentiment == SentimentType.NEGATIVE
-        ).scalar() or 0
-        
-        # 风险计数
-        high_risk = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
-        ).scalar() or 0
-        
-        # 待审核
-        pending_review = self.db.query(func.count(ReviewTask.id)).filter(
-            ReviewTask.status == ReviewStatus.PENDING
-        ).scalar() or 0
-        
-        # 活跃预警
-        active_alerts = self.db.query(func.count(Alert.id)).filter(
-            Alert.status == AlertStatus.ACTIVE
-        ).scalar() or 0
-        
-        # 今日新增
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = self.db.query(func.count(SentimentRecord.id)).filter(
-            SentimentRecord.created_at >= today_start
-        ).scalar() or 0
+        from src.services.dashboard_service import overview_counts
+
+        counts = overview_counts(self.db, start_date)
+        total = counts["total"]
+        positive = counts["positive"]
+        negative = counts["negative"]
+        high_risk = counts["high_risk"]
         
         return {
             "total_records": total,
@@ -227,32 +198,21 @@ class DataAnalysisSkill(BaseSkill):
             "negative_count": negative,
             "neutral_count": total - positive - negative,
             "high_risk_count": high_risk,
-            "pending_review": pending_review,
-            "active_alerts": active_alerts,
-            "today_new": today_count,
+            "pending_review": counts["pending_review"],
+            "active_alerts": counts["active_alerts"],
+            "today_new": counts["today"],
             "negative_rate": round(negative / total * 100, 1) if total > 0 else 0,
             "high_risk_rate": round(high_risk / total * 100, 1) if total > 0 else 0,
         }
     
     def _emotion_cloud(self, start_date, params) -> dict:
         """情绪词云数据"""
-        records = self.db.query(SentimentRecord.emotions).filter(
-            SentimentRecord.created_at >= start_date,
-            SentimentRecord.emotions.isnot(None)
-        ).all()
-        
-        emotion_counts = {}
-        for r in records:
-            for emotion in (r.emotions or []):
-                emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        # 排序并返回
-        sorted_emotions = sorted(emotion_counts.items(), key=lambda x: -x[1])
-        
+        from src.services.record_terms import term_counts
+
         return {
             "emotions": [
                 {"word": e, "count": c}
-                for e, c in sorted_emotions[:30]
+                for e, c in term_counts(self.db, "emotions", start_date, limit=30)
             ]
         }
     
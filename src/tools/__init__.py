@@ -5,7 +5,7 @@
 from src.tools.sentiment_tool import sentiment_analyzer
 from src.tools.topic_cluster import topic_clusterer
 from src.tools.risk_screener import risk_screener
-from src.tools.knowledge_tool import knowledge_searcher
+from src.tools.knowledge_tool import knowledge_searcher, knowledge_batch_searcher
 
 # 所有可用工具列表
 ALL_TOOLS = [
@@ -20,5 +20,6 @@ __all__ = [
     'topic_clusterer', 
     'risk_screener',
     'knowledge_searcher',
+    'knowledge_batch_searcher',
     'ALL_TOOLS',
 ]
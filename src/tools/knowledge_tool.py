@@ -3,6 +3,7 @@
 知识库查询工具 - 从向量知识库中检索相关信息
 """
 from langchain_core.tools import tool
+from typing import List
 import json
 
 
@@ -40,13 +41,7 @@ def query_knowledge(query: str) -> str:
                 "results": []
             }, ensure_ascii=False)
         
-        # 格式化结果
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "relevance_score": round(1 - score, 2)  # 转换为相关度（越高越好）
-            })
+        formatted_results = _format_results(results)
         
         return json.dumps({
             "found": True,
@@ -62,8 +57,68 @@ def query_knowledge(query: str) -> str:
         }, ensure_ascii=False)
 
 
+@tool
+def query_knowledge_batch(queries: List[str], top_k: int = 3) -> str:
+    """
+    批量从校园心理健康知识库中检索相关信息。
+    所有查询一次性向量化并打分，适合报告生成等需要多次检索的场景。
+    
+    参数:
+        queries: 查询问题列表
+        top_k: 每个查询返回的结果数量
+        
+    返回:
+        JSON字符串，results 与 queries 一一对应
+    """
+    try:
+        from src.data_pipeline import get_knowledge_base
+        
+        kb = get_knowledge_base()
+        
+        if kb.vectorstore is None:
+            return json.dumps({
+                "found": False,
+                "message": "知识库未初始化，请先运行 data_pipeline.py 构建知识库",
+                "results": []
+            }, ensure_ascii=False)
+        
+        batched = kb.search_many_with_scores(queries, k=top_k)
+        
+        return json.dumps({
+            "found": any(batched),
+            "message": f"完成 {len(queries)} 个查询的批量检索",
+            "results": [
+                {
+                    "query": query,
+                    "found": bool(results),
+                    "results": _format_results(results),
+                }
+                for query, results in zip(queries, batched)
+            ]
+        }, ensure_ascii=False)
+        
+    except Exception as e:
+        return json.dumps({
+            "found": False,
+            "message": f"批量查询出错: {str(e)}",
+            "results": []
+        }, ensure_ascii=False)
+
+
+def _format_results(results: list) -> list:
+    """格式化检索结果"""
+    return [
+        {
+            "content": doc.page_content,
+            "relevance_score": round(1 - score, 2)  # 转换为相关度（越高越好）
+        }
+        for doc, score in results
+    ]
+
+
 # 工具实例
 knowledge_searcher = query_knowledge
+knowledge_batch_searcher = query_knowledge_batch
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+# tests/test_basic.py
+"""
+列表接口的查询次数回归测试
+
+预警、审核任务、舆情提及列表的关联数据（记录内容、处理人、审核人）必须随列表一次取回，
+语句数不随页大小增长。使用内存 SQLite，不依赖 MySQL。
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.connection import Base
+from src.database.models import (
+    SentimentRecord, ReviewTask, Alert, User,
+    SentimentType, RiskLevel, ReviewStatus, AlertStatus, DataSource,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+class StatementCounter:
+    """统计 with 块内执行的 SQL 语句数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def _seed(db, n: int) -> None:
+    """n 条记录，每条带一个预警和一个审核任务，处理人/审核人交替指派"""
+    users = [
+        User(username=f"counselor_{i}", password_hash="x", real_name=f"老师{i}", role="counselor")
+        for i in range(3)
+    ]
+    db.add_all(users)
+    db.flush()
+
+    now = datetime.now()
+    for i in range(n):
+        record = SentimentRecord(
+            content="考试周压力很大，" * 40 + str(i),
+            source=DataSource.FORUM,
+            author_id=f"STU{i:04d}",
+            author_department="计算机学院",
+            sentiment=SentimentType.NEGATIVE,
+            emotions=["焦虑"],
+            main_topic="学业压力",
+            risk_level=RiskLevel.HIGH,
+            created_at=now - timedelta(minutes=i),
+        )
+        db.add(record)
+        db.flush()
+        db.add(Alert(
+            record_id=record.id,
+            handler_id=users[i % 3].id if i % 2 else None,
+            risk_level=RiskLevel.HIGH,
+            status=AlertStatus.ACTIVE,
+            title=f"预警 {i}",
+            triggered_at=now - timedelta(minutes=i),
+        ))
+        db.add(ReviewTask(
+            record_id=record.id,
+            reviewer_id=users[i % 3].id if i % 2 else None,
+            status=ReviewStatus.PENDING,
+            priority=i % 5,
+            ai_risk_level=RiskLevel.HIGH,
+        ))
+    db.commit()
+
+
+def _statements(db, call) -> int:
+    db.expunge_all()
+    with StatementCounter(db.get_bind()) as counter:
+        call()
+    return counter.count
+
+
+@pytest.mark.parametrize("size", [5, 20])
+def test_recent_alerts_constant_statements(db, size):
+    from src.services.dashboard_service import DashboardService
+
+    _seed(db, 20)
+    service = DashboardService(db)
+    alerts = service.get_recent_alerts(limit=size)
+    assert len(alerts) == size
+    assert len(alerts[0]["content"]) == 100
+    assert alerts[0]["department"] == "计算机学院"
+    assert _statements(db, lambda: service.get_recent_alerts(limit=size)) == 1
+
+
+@pytest.mark.parametrize("size", [5, 20])
+def test_recent_mentions_constant_statements(db, size):
+    from src.services.dashboard_service import DashboardService
+
+    _seed(db, 20)
+    service = DashboardService(db)
+    mentions = service.get_recent_mentions(limit=size)
+    assert len(mentions) == size
+    assert mentions[0]["text"].endswith("...") and len(mentions[0]["text"]) == 63
+    assert _statements(db, lambda: service.get_recent_mentions(limit=size)) == 1
+
+
+@pytest.mark.parametrize("size", [5, 20])
+def test_alert_list_constant_statements(db, size):
+    from src.skills.alert_skill import AlertManagementSkill
+
+    _seed(db, 20)
+    skill = AlertManagementSkill(db)
+    result = skill.execute("list_alerts", {"page_size": size})
+    assert result["total"] == 20
+    assert len(result["alerts"]) == size
+    assert len(result["alerts"][0]["content"]) == 200
+    assert {a["handler_name"] for a in result["alerts"]} >= {None, "老师1"}
+    # 总数 + 当前页
+    assert _statements(db, lambda: skill.execute("list_alerts", {"page_size": size})) == 2
+
+
+@pytest.mark.parametrize("size", [5, 20])
+def test_review_tasks_constant_statements(db, size):
+    from src.agents.review_agent import ReviewAgent
+
+    _seed(db, 20)
+    agent = ReviewAgent(db)
+    result = agent.get_pending_tasks(page_size=size)
+    assert result["total"] == 20
+    assert len(result["tasks"]) == size
+    assert result["tasks"][0]["priority"] == 4
+    assert {t["reviewer_name"] for t in result["tasks"]} >= {None, "老师1"}
+    # 总数 + 当前页
+    assert _statements(db, lambda: agent.get_pending_tasks(page_size=size)) == 2
@@ -0,0 +1,174 @@
+# tests/test_bulk_importer.py
+"""
+BulkImporter 与内容哈希的单元测试
+
+数据库部分使用内存 SQLite；MySQL 的 ID 回查路径通过关闭方言的 RETURNING 能力模拟。
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import src.crawler.near_duplicate as near_duplicate
+import src.database.connection as connection
+from src.crawler.bulk_importer import BulkImporter, compute_content_hash
+from src.database.models import Alert, DataSource, SentimentRecord
+from src.sentiment.fast_analyzer import analyze_batch
+
+CRITICAL = "XX大学 考试 焦虑 压力 崩溃 不想活了"
+DORM = "XX大学 宿舍 热水恢复了 开心"
+LIBRARY = "图书馆 座位预约 又约不上"
+CANTEEN = "二食堂 新窗口 排队一小时"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    connection.Base.metadata.create_all(engine)
+    connection.SessionLocal.configure(bind=engine)
+    monkeypatch.setattr(near_duplicate, "_index", near_duplicate.NearDuplicateIndex())
+    yield engine
+    connection.SessionLocal.configure(bind=connection.engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = connection.SessionLocal()
+    yield session
+    session.close()
+
+
+def _item(content: str, source=DataSource.WEIBO) -> dict:
+    return {"content": content, "source": source, "content_hash": compute_content_hash(content)}
+
+
+def _rows(items):
+    now = datetime.now()
+    analyses = analyze_batch([item["content"] for item in items])
+    return [BulkImporter.build_record_row(item, a, now) for item, a in zip(items, analyses)]
+
+
+def _contents(session, ids):
+    return [session.get(SentimentRecord, record_id).content for record_id in ids]
+
+
+# ─────── 内容哈希 ───────
+
+@pytest.mark.parametrize("left, right", [
+    ("#XX大学# 食堂涨价。", "XX大学食堂涨价"),
+    ("【热议】宿舍 停水！！", "热议宿舍停水"),
+    ("ＸＸ大学：期末考试", "xx大学期末考试"),
+    ("结束了. 下次再说", "结束了下次再说"),
+])
+def test_hash_ignores_whitespace_and_decorative_punctuation(left, right):
+    assert compute_content_hash(left) == compute_content_hash(right)
+
+
+@pytest.mark.parametrize("left, right", [
+    ("绩点要求 3.5", "绩点要求 35"),
+    ("12:30 食堂停电", "1230 食堂停电"),
+    ("#3号楼 停水", "3号楼 停水"),
+])
+def test_hash_keeps_numbers_significant(left, right):
+    assert compute_content_hash(left) != compute_content_hash(right)
+
+
+def test_hash_of_punctuation_only_text_is_none():
+    assert compute_content_hash(" 。。。！！ ") is None
+    assert compute_content_hash("") is None
+
+
+# ─────── 插入后的 ID 回读 ───────
+
+def test_insert_records_returns_ids_in_row_order(session, engine):
+    assert engine.dialect.insert_executemany_returning_sort_by_parameter_order
+    BulkImporter.insert_records(session, _rows([_item(CANTEEN)]))
+
+    contents = [DORM, LIBRARY, CRITICAL]
+    ids = BulkImporter.insert_records(session, _rows([_item(c) for c in contents]))
+    session.commit()
+    assert len(set(ids)) == 3
+    assert _contents(session, ids) == contents
+
+
+def test_insert_records_reads_ids_back_by_unique_key_without_returning(session, engine, monkeypatch):
+    # MySQL 不支持 RETURNING：多行 INSERT 后按 (source, content_hash) 回查
+    monkeypatch.setattr(engine.dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+    BulkImporter.insert_records(session, _rows([_item(CANTEEN)]))
+
+    items = [_item(DORM), _item(LIBRARY, DataSource.FORUM), _item("！！！"), _item(CRITICAL)]
+    assert items[2]["content_hash"] is None
+    ids = BulkImporter.insert_records(session, _rows(items))
+    session.commit()
+    assert None not in ids and len(set(ids)) == 4
+    assert _contents(session, ids) == [item["content"] for item in items]
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_import_items_attaches_alerts_to_their_records(session, engine, monkeypatch, returning):
+    if not returning:
+        monkeypatch.setattr(engine.dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+
+    result = BulkImporter(commit_size=2).import_items(
+        [_item(DORM), _item(CRITICAL), _item(LIBRARY), _item(CANTEEN)]
+    )
+    assert result["success"] and result["imported"] == 4
+    assert result["alerts_created"] == 1
+
+    alert = session.query(Alert).one()
+    assert session.get(SentimentRecord, alert.record_id).content == CRITICAL
+
+
+# ─────── 内容哈希去重 ───────
+
+def test_drop_known_matches_on_source_and_hash(session):
+    BulkImporter.insert_records(session, _rows([_item(DORM)]))
+    session.commit()
+
+    chunk = [
+        _item(DORM),                       # 库中已有
+        _item(DORM, DataSource.FORUM),     # 内容相同但来源不同
+        _item(LIBRARY), _item(LIBRARY + "！"),  # 本批内重复
+        _item("！！！"), _item("。。。"),      # 没有哈希，不参与去重
+    ]
+    fresh = BulkImporter.drop_known(session, chunk)
+    assert fresh == [chunk[1], chunk[2], chunk[4], chunk[5]]
+
+
+def test_import_items_retries_chunk_after_concurrent_insert(session, monkeypatch):
+    # 另一个导入进程在本批查重之后、写入之前提交了同样的内容
+    real_drop_known = BulkImporter.drop_known
+    calls = []
+
+    def racing_drop_known(session_, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 1:
+            other = connection.SessionLocal()
+            BulkImporter.insert_records(other, _rows([_item(DORM)]))
+            other.commit()
+            other.close()
+            return list(chunk)
+        return real_drop_known(session_, chunk)
+
+    monkeypatch.setattr(BulkImporter, "drop_known", staticmethod(racing_drop_known))
+    result = BulkImporter().import_items([_item(DORM), _item(LIBRARY), _item(CRITICAL)])
+
+    # 唯一索引拒绝写入 → 回滚本批、重新查重后重试一次
+    assert calls == [3, 3]
+    assert result == {
+        "success": True,
+        "imported": 2,
+        "skipped_duplicates": 1,
+        "near_duplicates": 0,
+        "alerts_created": 1,
+    }
+    assert sorted(r.content for r in session.query(SentimentRecord)) == sorted([DORM, LIBRARY, CRITICAL])
+    assert session.query(Alert).count() == 1
+    # 回滚的那次尝试不应在近重复索引中留下待定簇
+    assert len(near_duplicate._index) == 2
@@ -0,0 +1,110 @@
+# tests/test_keyword_budget.py
+"""
+关键词爬取预算的单元测试
+
+覆盖配额按产出分配、死关键词的跳过节奏与恢复、状态持久化；状态写到临时目录。
+"""
+import pytest
+
+from src.crawler import state_store
+from src.crawler.keyword_budget import KeywordBudget
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", tmp_path)
+    return tmp_path
+
+
+def _run(budget, keywords, yields=None, platform="wb", base_notes=20):
+    """规划一次爬取、按 yields {关键词: (new, campus, risky)} 记录产出并结束，返回本次计划"""
+    plan = budget.plan(keywords, [platform], base_notes)
+    for keyword, (new, campus, risky) in (yields or {}).items():
+        if keyword in plan[platform]:
+            budget.record(platform, keyword, fetched=new, new=new, campus=campus, risky=risky)
+    budget.finish_run()
+    return plan[platform]
+
+
+def test_first_plan_explores_every_keyword_with_base_quota():
+    plan = KeywordBudget().plan(["食堂", "宿舍", "食堂"], ["wb", "zhihu"], 20)
+    assert plan == {"wb": {"食堂": 20, "宿舍": 20}, "zhihu": {"食堂": 20, "宿舍": 20}}
+
+
+def test_quota_is_shared_by_value_and_clamped():
+    budget = KeywordBudget(min_notes=5, max_notes=60)
+    _run(budget, ["食堂", "宿舍", "考试"], {"食堂": (10, 5, 2), "宿舍": (1, 0, 0)})
+
+    stats = budget.state["wb"]["keywords"]
+    # value = new + campus + 2 × risky
+    assert stats["食堂"]["value"] == 19
+    assert stats["宿舍"]["value"] == 1
+    assert stats["考试"]["value"] == 0
+
+    # 总配额 20 × 3 = 60，按 value + 1 分配：20/23、2/23、1/23，低于下限的抬到 min_notes
+    plan = budget.plan(["食堂", "宿舍", "考试"], ["wb"], 20)
+    assert plan == {"wb": {"食堂": 52, "宿舍": 5, "考试": 5}}
+
+
+def test_new_keyword_gets_base_quota_next_to_known_ones():
+    budget = KeywordBudget()
+    _run(budget, ["食堂"], {"食堂": (4, 4, 0)})
+    plan = budget.plan(["食堂", "图书馆"], ["wb"], 20)
+    assert plan == {"wb": {"食堂": 20, "图书馆": 20}}
+
+
+def test_dead_keyword_is_skipped_on_backoff_schedule_and_revives():
+    budget = KeywordBudget(max_skip_runs=8)
+    keywords = ["食堂", "冷门"]
+    planned_runs = []
+    for run_no in range(1, 11):
+        if "冷门" in _run(budget, keywords, {"食堂": (3, 1, 0)}):
+            planned_runs.append(run_no)
+    # 连续无产出依次跳过 0、1、3、7 次运行
+    assert planned_runs == [1, 2, 4, 8]
+    assert budget.state["wb"]["keywords"]["冷门"]["idle_runs"] == 4
+
+    # 到期后重新产出：立即恢复每次都爬
+    while "冷门" not in _run(budget, keywords, {"食堂": (3, 1, 0), "冷门": (2, 2, 1)}):
+        pass
+    stat = budget.state["wb"]["keywords"]["冷门"]
+    assert stat["idle_runs"] == 0
+    assert "冷门" in _run(budget, keywords, {"食堂": (3, 1, 0)})
+
+
+def test_skip_is_capped_by_max_skip_runs():
+    budget = KeywordBudget(max_skip_runs=2)
+    planned_runs = [
+        run_no for run_no in range(1, 13)
+        if "冷门" in _run(budget, ["食堂", "冷门"], {"食堂": (3, 1, 0)})
+    ]
+    # 跳过 0、1、2、2… 次
+    assert planned_runs == [1, 2, 4, 7, 10]
+
+
+def test_all_keywords_skipped_keeps_the_earliest_due():
+    budget = KeywordBudget()
+    _run(budget, ["冷门A", "冷门B"])
+    _run(budget, ["冷门A", "冷门B"])
+    # 两个都进入跳过期：仍保留一个，平台不会完全停爬
+    plan = budget.plan(["冷门A", "冷门B"], ["wb"], 20)
+    assert len(plan["wb"]) == 1
+
+
+def test_state_persists_across_instances():
+    _run(KeywordBudget(), ["食堂"], {"食堂": (5, 5, 0)})
+    snapshot = KeywordBudget().snapshot()
+    assert snapshot["wb"]["runs"] == 1
+    assert snapshot["wb"]["keywords"]["食堂"]["new_total"] == 5
+    assert snapshot["wb"]["keywords"]["食堂"]["campus_share"] == 1.0
+
+
+def test_yield_outside_the_plan_is_ignored():
+    budget = KeywordBudget()
+    budget.plan(["食堂"], ["wb"], 20)
+    budget.record("wb", "未规划", new=3)
+    budget.record("zhihu", "食堂", new=3)
+    budget.finish_run()
+    assert list(budget.state) == ["wb"]
+    assert list(budget.state["wb"]["keywords"]) == ["食堂"]
+    assert budget.state["wb"]["keywords"]["食堂"]["last_new"] == 0
@@ -0,0 +1,152 @@
+# tests/test_keyword_engine.py
+"""
+离线关键词引擎的单元测试
+
+extract / from_corpus 需要 jieba（未安装时跳过）；get_keyword_engine 的后台重建与失败退避
+用假的语料读取函数验证，不依赖数据库和 jieba。
+"""
+import threading
+
+import pytest
+
+import src.crawler.keyword_engine as keyword_engine
+import src.crawler.state_store as state_store
+from src.crawler.keyword_engine import IDF_STATE, KeywordEngine, get_keyword_engine
+
+TITLES = [
+    "XX大学食堂涨价引发学生不满",
+    "XX大学食堂饭菜难吃 学生吐槽",
+    "图书馆座位预约系统崩溃 学生抱怨",
+    "宿舍热水停供三天 学生叫苦",
+]
+# "学生"出现在每篇文档中，"食堂"一次都没有
+CORPUS = ["学生 宿舍", "学生 考试", "学生 图书馆", "学生 就业"] * 5 + ["独特的词汇"]
+
+
+@pytest.fixture
+def jieba():
+    return pytest.importorskip("jieba")
+
+
+@pytest.fixture(autouse=True)
+def fresh_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(keyword_engine, "_engine", None)
+    monkeypatch.setattr(keyword_engine, "_engine_built_at", None)
+    monkeypatch.setattr(keyword_engine, "_rebuild_thread", None)
+    monkeypatch.setattr(keyword_engine, "_rebuild_failed_at", 0.0)
+    yield
+    _join_rebuild()
+
+
+def _join_rebuild():
+    thread = keyword_engine._rebuild_thread
+    if thread is not None:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def _cache_idf(built_at: str, doc_freq: dict, doc_count: int):
+    state_store.save_state(IDF_STATE, {
+        "built_at": built_at, "doc_count": doc_count, "doc_freq": doc_freq,
+    })
+
+
+# ─────── extract / from_corpus ───────
+
+def test_from_corpus_counts_documents_and_drops_single_document_terms(jieba):
+    engine = KeywordEngine.from_corpus(CORPUS)
+    assert engine.doc_count == len(CORPUS)
+    assert engine.doc_freq["学生"] == 20
+    assert engine.doc_freq["宿舍"] == 5
+    # 只出现在一篇文档中的词不保存，按最稀有处理
+    assert "独特" not in engine.doc_freq
+    assert engine.idf("独特") > engine.idf("宿舍") > engine.idf("学生")
+
+
+def test_extract_without_idf_ranks_frequent_terms_first(jieba):
+    keywords = KeywordEngine().extract(TITLES, top_k=5)
+    assert keywords[:2] == ["学生", "食堂"]
+    assert len(keywords) == 5
+    assert "的" not in keywords
+
+
+def test_idf_demotes_terms_common_in_corpus(jieba):
+    keywords = KeywordEngine.from_corpus(CORPUS).extract(TITLES, top_k=5)
+    assert keywords[:2] == ["食堂", "学生"]
+
+
+def test_extract_empty_input(jieba):
+    assert KeywordEngine().extract(["", "的了"]) == []
+
+
+# ─────── 共享引擎的后台重建 ───────
+
+def test_stale_engine_served_while_rebuilding(monkeypatch):
+    _cache_idf("2020-01-01T00:00:00", {"学生": 3}, 3)
+    release = threading.Event()
+
+    def slow_corpus():
+        release.wait(5)
+        return ["语料"]
+
+    monkeypatch.setattr(keyword_engine, "_load_corpus", slow_corpus)
+    monkeypatch.setattr(
+        KeywordEngine, "from_corpus", classmethod(lambda cls, texts: cls({"食堂": 2}, 9))
+    )
+
+    # 过期的缓存照常返回，重建在后台进行，不阻塞调用方
+    engine = get_keyword_engine()
+    assert engine.doc_count == 3
+    assert keyword_engine._rebuild_thread.is_alive()
+    assert get_keyword_engine() is engine
+
+    release.set()
+    _join_rebuild()
+    rebuilt = get_keyword_engine()
+    assert rebuilt.doc_count == 9
+    assert state_store.load_state(IDF_STATE)["doc_count"] == 9
+
+
+def test_failed_rebuild_keeps_engine_and_retries_after_backoff(monkeypatch):
+    _cache_idf("2020-01-01T00:00:00", {"学生": 3}, 3)
+    calls = []
+
+    def broken_corpus():
+        calls.append(1)
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(keyword_engine, "_load_corpus", broken_corpus)
+
+    engine = get_keyword_engine()
+    _join_rebuild()
+    assert calls == [1]
+    # 失败后继续使用原引擎，退避期内不再重试，也不把失败当作已重建
+    assert get_keyword_engine() is engine
+    assert keyword_engine._engine_built_at.year == 2020
+    assert not keyword_engine._rebuild_thread.is_alive()
+    assert calls == [1]
+
+    monkeypatch.setattr(keyword_engine, "IDF_RETRY_SECONDS", 0)
+    get_keyword_engine()
+    _join_rebuild()
+    assert calls == [1, 1]
+
+
+def test_fresh_cache_from_another_process_is_adopted(monkeypatch):
+    monkeypatch.setattr(keyword_engine, "_load_corpus", lambda: pytest.fail("不应重建"))
+    # 首次启动没有缓存：返回不带 IDF 的引擎，后台重建时发现其他进程刚写入的缓存直接采用
+    original = keyword_engine._load_cached_engine
+    written = []
+
+    def load_after_other_process():
+        if not written:
+            written.append(1)
+            return original()
+        _cache_idf(keyword_engine.datetime.now().isoformat(timespec="seconds"), {"食堂": 2}, 7)
+        return original()
+
+    monkeypatch.setattr(keyword_engine, "_load_cached_engine", load_after_other_process)
+    assert get_keyword_engine().doc_count == 0
+    _join_rebuild()
+    assert get_keyword_engine().doc_count == 7
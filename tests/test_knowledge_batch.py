@@ -0,0 +1,64 @@
+# tests/test_knowledge_batch.py
+"""
+知识库批量检索的一致性测试
+
+search_many_with_scores 一次向量化、一次检索全部查询，结果（文档与分数）必须与逐条
+search_with_scores 一致。用确定性的假嵌入建临时 Chroma 库，不加载真实模型。
+"""
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_huggingface")
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.data_pipeline import KnowledgeBase
+
+DOCS = [
+    "考试焦虑时可以通过规律作息和分段复习缓解",
+    "学校心理咨询中心开放时间为工作日上午九点至下午五点",
+    "宿舍人际矛盾可以先与辅导员沟通",
+    "就业指导中心每周三举办简历修改讲座",
+    "失眠超过两周建议到校医院就诊",
+]
+QUERIES = ["考试焦虑怎么办", "心理咨询热线", "找工作简历"]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    kb = KnowledgeBase.__new__(KnowledgeBase)
+    kb.persist_dir = str(tmp_path)
+    kb.embeddings = embeddings
+    kb._query_embeddings = None
+    kb.vectorstore = Chroma.from_texts(DOCS, embedding=embeddings, persist_directory=str(tmp_path))
+    return kb
+
+
+def test_batch_scores_match_single_query_search(kb):
+    batched = kb.search_many_with_scores(QUERIES, k=3)
+    assert len(batched) == len(QUERIES)
+    for query, results in zip(QUERIES, batched):
+        single = kb.search_with_scores(query, k=3)
+        assert [doc.page_content for doc, _ in results] == [doc.page_content for doc, _ in single]
+        assert [score for _, score in results] == pytest.approx([score for _, score in single])
+
+
+def test_batch_embeds_all_queries_in_one_call(kb, monkeypatch):
+    calls = []
+    original = kb.embeddings.embed_documents
+
+    def counting(texts):
+        calls.append(list(texts))
+        return original(texts)
+
+    monkeypatch.setattr(type(kb.embeddings), "embed_documents", lambda self, texts: counting(texts))
+    kb.search_many_with_scores(QUERIES, k=2)
+    assert calls == [QUERIES]
+
+
+def test_empty_knowledge_base_returns_empty_lists(kb):
+    kb.vectorstore = None
+    assert kb.search_many_with_scores(QUERIES) == [[], [], []]
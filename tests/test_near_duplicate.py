@@ -0,0 +1,104 @@
+# tests/test_near_duplicate.py
+"""
+近重复簇索引的单元测试
+
+覆盖 assign / bind / discard、待定簇超时清除与淘汰策略，只用内存索引，不依赖数据库。
+"""
+from src.crawler.bulk_importer import compute_content_hash
+from src.crawler.near_duplicate import NearDuplicateIndex
+
+CANTEEN = "XX大学食堂涨价引发学生不满"
+CANTEEN_VARIANT = "XX大学食堂涨价引发学生强烈不满"
+DORM = "某高校宿舍热水停供三天 学生叫苦"
+EXAM = "2026年考研报名人数创新高，教育部回应"
+LIBRARY = "图书馆座位预约系统频繁崩溃，期末复习受影响"
+
+
+def _item(content: str) -> dict:
+    return {"content": content, "content_hash": compute_content_hash(content)}
+
+
+def test_assign_opens_cluster_and_folds_pending_members():
+    index = NearDuplicateIndex()
+    first = _item(CANTEEN)
+    representatives, bumps = index.assign([first, _item(DORM)])
+    assert [item["content"] for item in representatives] == [CANTEEN, DORM]
+    assert first["cluster_size"] == 1
+    assert bumps == {}
+
+    # 代表条目尚未入库：成员只累加在内存中，不产生 cluster_size 更新
+    representatives, bumps = index.assign([_item(CANTEEN_VARIANT)])
+    assert representatives == []
+    assert bumps == {}
+    assert len(index) == 2
+
+
+def test_bind_returns_members_folded_while_pending():
+    index = NearDuplicateIndex()
+    first = _item(CANTEEN)
+    index.assign([first])
+    index.assign([_item(CANTEEN_VARIANT), _item(CANTEEN + "！")])
+
+    assert index.bind([first], [101]) == {101: 2}
+
+    # 入库后再并入的成员直接返回 cluster_size 增量
+    representatives, bumps = index.assign([_item(CANTEEN_VARIANT)])
+    assert representatives == []
+    assert bumps == {101: 1}
+
+
+def test_bind_matches_pending_cluster_by_content_hash():
+    """重放时条目是新的 dict 对象，仍能按 content_hash 找回待定簇"""
+    index = NearDuplicateIndex()
+    index.assign([_item(CANTEEN)])
+    index.assign([_item(CANTEEN_VARIANT)])
+    assert index.bind([_item(CANTEEN)], [7]) == {7: 1}
+
+
+def test_discard_removes_pending_cluster():
+    index = NearDuplicateIndex()
+    first = _item(CANTEEN)
+    index.assign([first])
+    index.discard([first])
+    assert len(index) == 0
+
+    # 簇已撤销，后续近重复内容重新成为代表条目，不会被吞掉
+    representatives, _ = index.assign([_item(CANTEEN_VARIANT)])
+    assert [item["content"] for item in representatives] == [CANTEEN_VARIANT]
+
+    # 已入库的簇不受 discard 影响
+    index.bind(representatives, [9])
+    index.discard(representatives)
+    assert len(index) == 1
+
+
+def test_pending_cluster_expires_without_discard():
+    index = NearDuplicateIndex(pending_ttl=0)
+    index.assign([_item(CANTEEN)])
+    representatives, _ = index.assign([_item(CANTEEN_VARIANT)])
+    assert [item["content"] for item in representatives] == [CANTEEN_VARIANT]
+    assert len(index) == 1
+
+
+def test_evict_skips_pending_clusters():
+    index = NearDuplicateIndex(max_clusters=2)
+    pending = _item(CANTEEN)
+    index.assign([pending])
+
+    bound = [_item(DORM), _item(EXAM), _item(LIBRARY)]
+    index.assign(bound)
+    index.bind(bound, [1, 2, 3])
+
+    # 最早的待定簇保留，依次淘汰最早的已入库簇
+    assert len(index) == 2
+    assert index.bind([pending], [4]) == {}
+    _, bumps = index.assign([_item(CANTEEN_VARIANT), _item(LIBRARY)])
+    assert bumps == {4: 1, 3: 1}
+
+
+def test_seed_respects_max_clusters():
+    index = NearDuplicateIndex(max_clusters=2)
+    index.seed([(1, CANTEEN, 3), (2, DORM, None), (3, EXAM, 1)])
+    assert len(index) == 2
+    _, bumps = index.assign([_item(CANTEEN_VARIANT)])
+    assert bumps == {}
@@ -0,0 +1,134 @@
+# tests/test_news_collector.py
+"""
+NewsCollector 的条件请求缓存、重试与 only_new 差量测试
+
+用替身替换 _polite_get 返回构造好的响应，不访问网络；差量状态写到临时目录。
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.crawler import state_store
+from src.crawler.news_collector import NewsCollector
+
+
+class FakeSource:
+    """按顺序返回预设响应，记录每次请求携带的条件请求头"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def __call__(self, client, url, timeout, headers=None):
+        self.requests.append(dict(headers or {}))
+        status, payload, resp_headers = self.responses.pop(0)
+        request = httpx.Request("GET", url)
+        if payload is None:
+            return httpx.Response(status, headers=resp_headers, request=request)
+        return httpx.Response(status, json=payload, headers=resp_headers, request=request)
+
+
+def _items(*ids):
+    return {"items": [{"id": i, "title": f"热点{i}"} for i in ids]}
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_DIR", tmp_path)
+    return tmp_path
+
+
+def _collector(fake, **kwargs) -> NewsCollector:
+    collector = NewsCollector(politeness_delay=0, **{"max_retries": 0, **kwargs})
+    collector._polite_get = fake
+    return collector
+
+
+def _new_ids(result):
+    return [n["id"] for n in result["news_list"]]
+
+
+def _fetch_all(collector, times, source="weibo"):
+    async def scenario():
+        return [await collector.fetch_source(source) for _ in range(times)]
+    return asyncio.run(scenario())
+
+
+# ─────── 条件请求 ───────
+
+def test_304_reuses_cached_items_and_sends_validators():
+    fake = FakeSource(
+        (200, _items(1, 2), {"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 08:00:00 GMT"}),
+        (304, None, {}),
+    )
+    first, second = _fetch_all(_collector(fake), 2)
+
+    assert fake.requests[0] == {}
+    assert fake.requests[1] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Sat, 17 Oct 2026 08:00:00 GMT",
+    }
+    assert first["not_modified"] is False
+    assert second["status"] == "success" and second["not_modified"] is True
+    assert second["items"] == first["items"] == _items(1, 2)["items"]
+
+
+def test_identical_body_without_validators_is_not_modified():
+    fake = FakeSource(
+        (200, _items(1, 2), {}),
+        (200, _items(1, 2), {}),
+        (200, _items(2, 3), {}),
+    )
+    first, same, changed = _fetch_all(_collector(fake), 3)
+
+    # 没有 ETag / Last-Modified 时不发条件请求，靠响应体哈希判断
+    assert fake.requests == [{}, {}, {}]
+    assert first["not_modified"] is False
+    assert same["not_modified"] is True and same["items"] == first["items"]
+    assert changed["not_modified"] is False
+    assert [n["id"] for n in changed["items"]] == [2, 3]
+
+
+def test_304_without_cached_body_is_an_error():
+    result, = _fetch_all(_collector(FakeSource((304, None, {}))), 1)
+    assert result["status"] == "error"
+    assert result["items"] == []
+
+
+def test_server_errors_are_retried_but_client_errors_are_not():
+    fake = FakeSource((503, None, {}), (200, _items(1), {}))
+    result, = _fetch_all(_collector(fake, max_retries=1, retry_backoff=0), 1)
+    assert result["status"] == "success" and result["attempts"] == 2
+
+    fake = FakeSource((404, None, {}), (200, _items(1), {}))
+    result, = _fetch_all(_collector(fake, max_retries=1, retry_backoff=0), 1)
+    assert result["status"] == "error"
+    assert len(fake.requests) == 1
+
+
+# ─────── only_new ───────
+
+def test_only_new_is_tracked_per_consumer():
+    fake = FakeSource(
+        (200, _items(1, 2), {"ETag": '"v1"'}),
+        (200, _items(1, 2), {"ETag": '"v1"'}),
+        (200, _items(1, 2, 3), {"ETag": '"v2"'}),
+        (304, None, {}),
+    )
+    collector = _collector(fake)
+
+    async def poll(consumer):
+        return await collector.collect_news(["weibo"], only_new=True, consumer=consumer)
+
+    async def scenario():
+        assert _new_ids(await poll("a")) == ["weibo_1", "weibo_2"]
+        assert _new_ids(await poll("b")) == ["weibo_1", "weibo_2"]
+        # a 先取到变化，共享缓存随之更新
+        assert _new_ids(await poll("a")) == ["weibo_3"]
+        # b 的这一轮命中 304（not_modified），仍要按 b 自己的上一轮 ID 得到新条目
+        result = await poll("b")
+        assert result["stats"]["per_source"]["weibo"]["not_modified"] is True
+        assert _new_ids(result) == ["weibo_3"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+# tests/test_response_cache.py
+"""
+面板响应缓存的单元测试
+
+覆盖数据版本号驱动的失效、TTL、单飞计算、旧结果兜底与 ETag / If-None-Match 匹配。
+计算函数不使用传入的数据库会话，不依赖 MySQL。
+"""
+import threading
+
+import pytest
+
+from src.services.response_cache import ResponseCache, bump_data_version, etag_matches
+
+
+class Compute:
+    """记录调用次数，返回 payloads 中的下一个结果（用完后重复最后一个）"""
+
+    def __init__(self, *payloads, gate: threading.Event = None, error: Exception = None):
+        self.payloads = list(payloads)
+        self.gate = gate
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, session):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.payloads.pop(0) if len(self.payloads) > 1 else self.payloads[0]
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(ttl=60, stale_timeout=0.05)
+
+
+def test_hit_until_data_version_bumps(cache):
+    compute = Compute({"total": 1}, {"total": 1}, {"total": 2})
+
+    first = cache.get("overview?days=30", compute)
+    hit = cache.get("overview?days=30", compute)
+    assert (first.status, hit.status) == ("MISS", "HIT")
+    assert hit.etag == first.etag and compute.calls == 1
+
+    # 入库提交后版本号变化：下一次请求重新计算；结果没变时 ETag 不变，客户端仍可得到 304
+    bump_data_version()
+    same = cache.get("overview?days=30", compute)
+    assert same.status == "MISS" and compute.calls == 2
+    assert same.etag == first.etag
+
+    bump_data_version()
+    changed = cache.get("overview?days=30", compute)
+    assert changed.payload == {"total": 2}
+    assert changed.etag != first.etag
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_keys_are_cached_independently(cache):
+    week, month = Compute({"days": 7}), Compute({"days": 30})
+    assert cache.get("overview?days=7", week).payload == {"days": 7}
+    assert cache.get("overview?days=30", month).payload == {"days": 30}
+    assert cache.get("overview?days=7", week).status == "HIT"
+
+
+def test_expired_entry_is_recomputed():
+    cache = ResponseCache(ttl=0)
+    compute = Compute({"total": 1})
+    cache.get("k", compute)
+    assert cache.get("k", compute).status == "MISS"
+    assert compute.calls == 2
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = ResponseCache(ttl=60)
+    gate = threading.Event()
+    compute = Compute({"total": 1}, gate=gate)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join(5)
+    assert compute.calls == 1
+    assert [r.payload for r in results] == [{"total": 1}] * 4
+
+
+def test_failed_recompute_serves_stale_result(cache):
+    cache.get("k", Compute({"total": 1}))
+    bump_data_version()
+    stale = cache.get("k", Compute(error=RuntimeError("db down")))
+    assert stale.status == "STALE" and stale.payload == {"total": 1}
+    assert cache.stats()["stale_served"] == 1
+
+    # 没有旧结果可兜底时把异常交给接口
+    with pytest.raises(RuntimeError):
+        cache.get("other", Compute(error=RuntimeError("db down")))
+
+
+def test_slow_recompute_serves_stale_then_updates(cache):
+    cache.get("k", Compute({"total": 1}))
+    bump_data_version()
+    gate = threading.Event()
+    slow = Compute({"total": 2}, gate=gate)
+
+    assert cache.get("k", slow).status == "STALE"
+    gate.set()
+    # 后台计算完成后写入缓存，之后直接命中新结果
+    for _ in range(100):
+        result = cache.get("k", slow)
+        if result.payload == {"total": 2}:
+            break
+    assert result.payload == {"total": 2}
+    assert slow.calls == 1
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ('"xyz"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches_if_none_match(header, matches):
+    assert etag_matches('"abc"', header) is matches
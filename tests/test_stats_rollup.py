@@ -0,0 +1,204 @@
+# tests/test_stats_rollup.py
+"""
+统计汇总的一致性测试
+
+增量 refresh（新记录、补录到旧日期的记录、被修改并标记为脏的记录）之后的汇总行
+必须与在同一份数据上从零执行 build_all 的结果完全一致；窗口查询与直接统计原始记录一致。
+使用内存 SQLite，不依赖 MySQL。
+"""
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import src.services.stats_rollup as stats_rollup
+from src.crawler.bulk_importer import BulkImporter
+from src.database.connection import Base
+from src.database.models import (
+    AnalysisStats, DataSource, ReviewStatus, RiskLevel, SentimentRecord,
+    SentimentType, StatsRollupState,
+)
+from src.services.stats_rollup import StatsRollup, mark_records_dirty
+
+DEPARTMENTS = ["计算机学院", "外国语学院", "物理学院", None]
+TOPICS = ["食堂", "宿舍", "考试", "就业"]
+GRADES = ["大一", "大三", "研一"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _records(rng: random.Random, n: int, days_back: int, now: datetime):
+    return [
+        SentimentRecord(
+            content=f"记录{rng.random()}",
+            source=rng.choice(list(DataSource)),
+            author_department=rng.choice(DEPARTMENTS),
+            author_grade=rng.choice(GRADES),
+            main_topic=rng.choice(TOPICS),
+            sentiment=rng.choice(list(SentimentType)),
+            sentiment_confidence=round(rng.random(), 2),
+            risk_level=rng.choice(list(RiskLevel)),
+            risk_confidence=round(rng.random(), 2),
+            review_status=rng.choice(list(ReviewStatus)),
+            cluster_size=rng.randint(1, 4),
+            created_at=now - timedelta(days=rng.randint(0, days_back), minutes=rng.randint(0, 1439)),
+        )
+        for _ in range(n)
+    ]
+
+
+def _snapshot(db):
+    """全部汇总行（按周期、日期、维度排序），忽略写入时间"""
+    rows = db.query(AnalysisStats).order_by(
+        AnalysisStats.period_type, AnalysisStats.stat_date,
+        AnalysisStats.dimension, AnalysisStats.dimension_value,
+    ).all()
+    return [
+        {
+            "period": (r.period_type, r.stat_date, r.dimension, r.dimension_value),
+            **{c: getattr(r, c) for c in stats_rollup.COUNT_COLUMNS},
+            "avg": (r.avg_sentiment_confidence, r.avg_risk_confidence),
+            "top_topics": r.top_topics,
+        }
+        for r in rows
+    ]
+
+
+def _full_rebuild_snapshot(db):
+    db.execute(delete(AnalysisStats.__table__))
+    db.execute(delete(StatsRollupState.__table__))
+    db.commit()
+    StatsRollup(db).build_all(batch_days=7)
+    return _snapshot(db)
+
+
+def _assert_periods_match_raw(db):
+    """周/月汇总的 all 维度行与直接统计原始记录一致（不依赖汇总自身的构建路径）"""
+    records = db.query(SentimentRecord.created_at).all()
+    periods = db.query(AnalysisStats).filter(
+        AnalysisStats.period_type.in_(["weekly", "monthly"]),
+        AnalysisStats.dimension == "all",
+    ).all()
+    assert {p.period_type for p in periods} == {"weekly", "monthly"}
+    for p in periods:
+        start = p.stat_date.date()
+        if p.period_type == "weekly":
+            end = start + timedelta(days=7)
+        else:
+            end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        raw = sum(1 for (created_at,) in records if start <= created_at.date() < end)
+        assert p.total_records == raw, (p.period_type, start)
+
+
+@pytest.fixture
+def no_lookback(monkeypatch):
+    # 水位线回看会把测试里的全部记录都算作新记录，关掉后才能分别验证各条增量路径
+    monkeypatch.setattr(stats_rollup, "WATERMARK_LOOKBACK", 0)
+
+
+def test_refresh_of_modified_records_matches_full_rebuild(db, no_lookback):
+    rng = random.Random(46)
+    db.add_all(_records(rng, 400, 70, datetime.now()))
+    db.commit()
+    rollup = StatsRollup(db)
+    assert rollup.build_all(batch_days=7) > 0
+
+    # 已有记录被修改：审核状态与近重复簇大小，写入方在同一事务中标记为脏
+    changed = db.query(SentimentRecord).order_by(SentimentRecord.id).all()[::17]
+    for record in changed:
+        record.review_status = ReviewStatus.APPROVED
+    db.flush()
+    mark_records_dirty(db, [r.id for r in changed])
+    BulkImporter.bump_cluster_sizes(db, {changed[0].id: 5, changed[1].id: 2})
+    db.commit()
+
+    assert rollup.refresh() == len({r.created_at.date() for r in changed})
+    incremental = _snapshot(db)
+    assert incremental == _full_rebuild_snapshot(db)
+
+
+def test_refresh_of_new_records_matches_full_rebuild(db, no_lookback):
+    rng = random.Random(47)
+    now = datetime.now()
+    db.add_all(_records(rng, 400, 70, now))
+    db.commit()
+    rollup = StatsRollup(db)
+    rollup.build_all(batch_days=7)
+
+    # 今天的新记录与补录到旧日期的新记录
+    fresh = _records(rng, 30, 0, now) + _records(rng, 20, 70, now)
+    db.add_all(fresh)
+    db.commit()
+
+    assert rollup.refresh() == len({r.created_at.date() for r in fresh})
+    _assert_periods_match_raw(db)
+    incremental = _snapshot(db)
+    assert incremental == _full_rebuild_snapshot(db)
+
+
+def test_refresh_without_changes_rebuilds_nothing(db):
+    db.add_all(_records(random.Random(1), 50, 10, datetime.now()))
+    db.commit()
+    rollup = StatsRollup(db)
+    rollup.build_all()
+    before = _snapshot(db)
+    assert rollup.refresh() == 0
+    assert _snapshot(db) == before
+
+
+def test_window_totals_match_raw_records(db):
+    now = datetime.now()
+    db.add_all(_records(random.Random(7), 500, 90, now))
+    db.commit()
+    rollup = StatsRollup(db)
+    rollup.build_all()
+
+    for days in (1, 7, 30, 60):
+        start = rollup.window_start(days)
+        raw = Counter(
+            r.main_topic for r in db.query(SentimentRecord).filter(SentimentRecord.created_at >= start)
+        )
+        totals = {row["dimension_value"]: row["total_records"] for row in rollup.window_totals("topic", days)}
+        assert totals == dict(raw), days
+
+
+def test_first_refresh_on_existing_data_builds_in_background(db, monkeypatch):
+    db.add_all(_records(random.Random(3), 20, 5, datetime.now()))
+    db.commit()
+    started = []
+    monkeypatch.setattr(stats_rollup, "start_background_build", lambda: started.append(1) or True)
+
+    # 没有水位线：面板请求不做全量扫描，交给后台构建
+    assert StatsRollup(db).refresh() == 0
+    assert started == [1]
+    assert db.query(AnalysisStats).count() == 0
+
+
+def test_first_refresh_on_empty_database_starts_incremental(db, monkeypatch):
+    monkeypatch.setattr(stats_rollup, "start_background_build", lambda: pytest.fail("空库不需要后台构建"))
+    rollup = StatsRollup(db)
+    assert rollup.refresh() == 0
+    assert stats_rollup.load_watermark(db) == 0
+
+    db.add_all(_records(random.Random(5), 30, 3, datetime.now()))
+    db.commit()
+    assert rollup.refresh() > 0
+    assert _snapshot(db) == _full_rebuild_snapshot(db)